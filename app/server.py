@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IDS Dashboard 后端 API 服务
+功能：提供 GET /api/alerts（过滤、分页）和 GET /api/stats，
+      响应带 ETag / Last-Modified，数据未变化的轮询返回 304；
+      序列化后的响应体按规范化的查询参数做 LRU 缓存，新告警写入时失效；
+      GET /metrics 以 Prometheus 文本格式导出运行指标；
+      --push-port 时在单独端口以 SSE 推送 --follow 跟踪到的新告警
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from flask import Flask, Response, g, request
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import metrics
+from alert_sinks import get_encoder
+from alert_store import AlertStore, DEFAULT_LIMIT
+from stats_aggregator import StatsAggregator
+
+DEFAULT_CACHE_SIZE = 256
+
+# /debug/stacks 单次采样的最长时间（秒）
+MAX_STACK_SECONDS = 30.0
+
+# /api/alerts 接受的查询参数 -> 类型转换
+ALERT_QUERY_PARAMS = {
+    "page": int,
+    "limit": int,
+    "severity": str,
+    "alert_type": str,
+    "source_ip": str,
+    "destination_port": int,
+    "source_subnet": str,
+    "destination_subnet": str,
+    "subnet": str,
+    "exclude_subnet": str,
+    "q": str,
+    "start_time": str,
+    "end_time": str,
+    "cursor": str,
+}
+
+
+class AlertService:
+    """告警数据服务：AlertStore + StatsAggregator，带写入代数
+
+    generation 每次写入新告警时加1，API 层据此生成 ETag 并让缓存失效。
+    last_id 记录已写入告警的最大整数 id，跟踪日志得到的新告警从它往后编号。
+    """
+
+    def __init__(self, store=None, stats=None):
+        self.store = store or AlertStore()
+        self.stats = stats or StatsAggregator()
+        self.generation = 0
+        self.last_id = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.lock = threading.RLock()
+
+    def add_alerts(self, alerts, renumber=False):
+        """写入一批告警，返回条数
+
+        renumber=True 时按写入顺序从 last_id 往后重新编号（跟踪器的 id 从1开始、关联告警的 id 固定为0，
+        直接写入会和已有告警重复）。
+        """
+        count = 0
+        with self.lock:
+            for alert in alerts:
+                if renumber:
+                    self.last_id += 1
+                    alert["id"] = self.last_id
+                else:
+                    alert_id = alert.get("id")
+                    if isinstance(alert_id, int) and alert_id > self.last_id:
+                        self.last_id = alert_id
+                self.store.add(alert)
+                self.stats.add(alert)
+                count += 1
+            if count:
+                self.store.refresh_indexes()
+                self.generation += 1
+                self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        return count
+
+    def query_alerts(self, **params):
+        with self.lock:
+            return self.store.query(**params)
+
+    def stats_snapshot(self):
+        with self.lock:
+            return self.stats.snapshot()
+
+
+class ResponseCache:
+    """序列化响应体的 LRU 缓存；代数变化时整体清空"""
+
+    def __init__(self, max_entries=DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, generation):
+        with self.lock:
+            if generation != self.generation:
+                self.entries.clear()
+                self.generation = generation
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, generation, body):
+        with self.lock:
+            if generation != self.generation:
+                return   # 生成期间有新告警写入，结果已过期
+            self.entries[key] = body
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+def normalize_alert_params(args):
+    """把查询参数规范化为 (参数字典, 缓存键)；未知参数忽略，缺省值补齐"""
+    params = {"page": 1, "limit": DEFAULT_LIMIT}
+    for name, convert in ALERT_QUERY_PARAMS.items():
+        value = args.get(name)
+        if value is None or value == "":
+            continue
+        try:
+            params[name] = convert(value)
+        except ValueError:
+            raise ValueError(f"参数 {name} 格式错误: {value!r}") from None
+    return params, tuple(sorted(params.items()))
+
+
+def create_app(service=None, cache_size=DEFAULT_CACHE_SIZE, encoder="auto", enable_metrics=None):
+    """创建 Flask 应用；service 为 None 时使用空的 AlertService
+
+    enable_metrics 为 True/False 时开启/关闭全局指标采集，None 时保持现状。
+    """
+    if enable_metrics:
+        metrics.enable()
+    elif enable_metrics is not None:
+        metrics.disable()
+    app = Flask(__name__)
+    service = service or AlertService()
+    cache = ResponseCache(cache_size)
+    encode = get_encoder(encoder)
+
+    app.config["ALERT_SERVICE"] = service
+    app.config["RESPONSE_CACHE"] = cache
+
+    def respond(key, build):
+        """按缓存键取响应体（没有就生成），设置 ETag / Last-Modified 并处理条件请求"""
+        key_hash = zlib.crc32(repr(key).encode('utf-8'))
+        generation = service.generation
+        last_modified = service.last_modified
+
+        # 客户端持有的版本仍是最新的：不查询、不序列化，直接返回 304
+        if request.if_none_match.contains(_etag(generation, key_hash)):
+            return _not_modified(generation, key_hash, last_modified)
+
+        body = cache.get(key, generation)
+        if body is None:
+            # 生成数据和读取代数在同一把锁内，保证两者对应
+            with service.lock:
+                generation = service.generation
+                last_modified = service.last_modified
+                data = build()
+            body = encode({"status": "success", "data": data})
+            cache.put(key, generation, body)
+
+        response = Response(body, mimetype="application/json")
+        _set_validators(response, generation, key_hash, last_modified)
+        return response.make_conditional(request)
+
+    def error(message, status=400):
+        body = json.dumps({"status": "error", "message": message}, ensure_ascii=False)
+        return Response(body, status=status, mimetype="application/json")
+
+    @app.before_request
+    def start_timer():
+        if metrics.enabled():
+            g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            metrics.HTTP_SECONDS.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+            metrics.HTTP_REQUESTS.labels(endpoint=endpoint, status=response.status_code).inc()
+        return response
+
+    @app.get("/api/alerts")
+    def list_alerts():
+        try:
+            params, key = normalize_alert_params(request.args)
+            return respond(("alerts",) + key, lambda: service.query_alerts(**params))
+        except ValueError as e:
+            return error(str(e))
+
+    @app.get("/api/stats")
+    def get_stats():
+        # recent_activity 随时间滑动：缓存键带上当前时间桶，没有新告警时最多每个桶刷新一次
+        bucket = int(time.time()) // service.stats.bucket_seconds
+        return respond(("stats", bucket), service.stats_snapshot)
+
+    @app.get("/metrics")
+    def get_metrics():
+        body = metrics.REGISTRY.render(extra=[
+            ("ids_alerts_stored", "gauge", "已加载的告警条数", len(service.store)),
+            ("ids_data_generation", "gauge", "告警数据的写入代数", service.generation),
+            ("ids_response_cache_entries", "gauge", "响应缓存条目数", len(cache.entries)),
+            ("ids_response_cache_hits_total", "counter", "响应缓存命中次数", cache.hits),
+            ("ids_response_cache_misses_total", "counter", "响应缓存未命中次数", cache.misses),
+        ])
+        return Response(body, content_type=metrics.CONTENT_TYPE)
+
+    @app.get("/debug/stacks")
+    def get_stacks():
+        # 按需采样调用栈（折叠栈格式，可直接生成火焰图）；只在开启指标时可用
+        if not metrics.enabled():
+            return error("未开启指标采集", 404)
+        try:
+            seconds = float(request.args.get("seconds", 1.0))
+        except ValueError:
+            return error("参数 seconds 格式错误")
+        seconds = min(max(seconds, 0.01), MAX_STACK_SECONDS)
+        return Response(metrics.sample_stacks(seconds), content_type="text/plain; charset=utf-8")
+
+    return app
+
+
+def _etag(generation, key_hash):
+    return f"{generation}-{key_hash:08x}"
+
+
+def _set_validators(response, generation, key_hash, last_modified):
+    response.set_etag(_etag(generation, key_hash))
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True   # 每次都要带条件请求来验证
+
+
+def _not_modified(generation, key_hash, last_modified):
+    response = Response(status=304)
+    _set_validators(response, generation, key_hash, last_modified)
+    return response
+
+
+def load_alerts(path):
+    """读取解析结果文件（JSON数组或 NDJSON）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def main():
+    """主函数 - 加载解析结果并启动 API 服务"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+
+    parser = argparse.ArgumentParser(description="IDS Dashboard API 服务")
+    parser.add_argument("--data", default=os.path.join(data_dir, 'parsed_logs.json'), help="解析结果文件")
+    parser.add_argument("--follow", help="持续跟踪的 Snort 告警日志")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--correlate", action="store_true",
+                        help="跟踪日志时检测端口扫描和 DDoS，合成告警一并入库")
+    parser.add_argument("--aggregate", type=int, metavar="SECONDS",
+                        help="跟踪日志时合并窗口内相同 rule_id/源IP/目的端口 的重复告警")
+    parser.add_argument("--rules", metavar="DIR",
+                        help="Snort 规则元数据目录（sid-msg.map 等），为告警补上分类、参考链接并修正严重程度")
+    parser.add_argument("--geoip", help="IP段 -> 国家代码 CSV，为 top_source_ips 加上 country")
+    parser.add_argument("--push-port", type=int, metavar="PORT",
+                        help="在该端口提供 SSE 实时推送（GET /api/realtime），推送 --follow 跟踪到的新告警")
+    parser.add_argument("--metrics", action="store_true", help="开启运行指标采集（GET /metrics、/debug/stacks）")
+    args = parser.parse_args()
+    if args.push_port and not args.follow:
+        parser.error("--push-port 需要同时指定 --follow")
+
+    stats = None
+    if args.geoip:
+        from geoip import CountryResolver, GeoIpDatabase
+        database = GeoIpDatabase.open(args.geoip)
+        print(f" 已加载 {len(database)} 个IP段: {args.geoip}")
+        stats = StatsAggregator(geoip=CountryResolver(database))
+
+    catalog = None
+    if args.rules:
+        from rule_catalog import RuleCatalog
+        catalog = RuleCatalog.from_directory(args.rules)
+        print(f" 已加载 {len(catalog)} 条规则: {args.rules}")
+
+    service = AlertService(stats=stats)
+    if os.path.exists(args.data):
+        alerts = load_alerts(args.data)
+        if catalog is not None:
+            alerts = catalog.enrich(alerts)
+        count = service.add_alerts(alerts)
+        print(f" 已加载 {count} 条告警: {args.data}")
+    else:
+        print(f" 数据文件不存在: {args.data}")
+
+    if args.follow:
+        from follow_snort_logs import SnortLogFollower
+
+        correlator = None
+        if args.correlate:
+            from correlation import CorrelationEngine
+            correlator = CorrelationEngine()
+        event_filter = None
+        if args.aggregate:
+            from event_filter import EventFilter
+            from stats_aggregator import local_epoch_now
+            event_filter = EventFilter(seconds=args.aggregate)
+        broker = None
+        if args.push_port:
+            from push_broker import PushBroker, start_sse_thread
+            broker = PushBroker()
+            push_loop, _ = start_sse_thread(broker, args.host, args.push_port)
+            print(f" 实时推送: http://{args.host}:{args.push_port}/api/realtime")
+
+        def ingest(alerts):
+            if catalog is not None:
+                catalog.refresh()
+                if alerts:
+                    alerts = catalog.enrich(alerts)
+            if correlator is not None:
+                alerts = list(correlator.correlate(alerts))
+            if event_filter is not None:
+                alerts = [output for alert in alerts for output in event_filter.process(alert)]
+                alerts += event_filter.advance(local_epoch_now())
+            if alerts:
+                service.add_alerts(alerts, renumber=True)
+                if broker is not None:
+                    broker.publish_threadsafe(push_loop, alerts)
+
+        def follow():
+            follower = SnortLogFollower(args.follow)
+            while True:
+                try:
+                    # 没有新数据时每秒产出一次空批次，规则目录的检查和聚合组的到期照常进行
+                    for alerts in follower.follow_batches(idle_timeout=1.0):
+                        ingest(alerts)
+                except Exception:
+                    # 出错的这一批丢弃，记录后继续跟踪，不让线程悄悄退出
+                    print(" 跟踪日志出错，1秒后继续:", file=sys.stderr)
+                    traceback.print_exc()
+                    time.sleep(1.0)
+
+        threading.Thread(target=follow, daemon=True).start()
+        print(f" 正在跟踪日志: {args.follow}")
+
+    if args.metrics:
+        metrics.dump_stacks_on_signal()
+    create_app(service, enable_metrics=args.metrics or None).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警数据模型
+功能：紧凑的告警记录类型 Alert 和列式容器 AlertBatch，
+      降低大量告警常驻内存时的开销，并可与 parse_line 的字典/JSON格式无损互转
+"""
+
+import calendar
+import re
+import sys
+import time
+from array import array
+
+# parse_line 输出的字段（按输出顺序）
+ALERT_FIELDS = (
+    "id", "timestamp", "source_ip", "source_port", "destination_ip", "destination_port",
+    "protocol", "alert_type", "classification", "severity", "rule_id", "raw_summary"
+)
+
+_STANDARD_KEYS = frozenset(ALERT_FIELDS)
+
+# 字符串字段中重复度高、适合驻留的部分
+_INTERNED_FIELDS = ("protocol", "alert_type", "classification", "severity")
+
+TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})', re.ASCII)
+
+# 列中表示"该条告警没有这个字段"的占位值
+MISSING = object()
+
+
+def timestamp_to_epoch(timestamp):
+    """把 "YYYY-MM-DD HH:MM:SS" 转成整数秒（按UTC换算，不做时区转换）；格式不对返回 None
+
+    只接受能原样还原的时间字符串，保证 epoch_to_timestamp 往返无损。
+    """
+    if not isinstance(timestamp, str):
+        return None
+
+    match = TIMESTAMP_RE.fullmatch(timestamp)
+    if match is None:
+        return None
+
+    year, month, day, hour, minute, second = map(int, match.groups())
+    if not (1 <= month <= 12 and 1 <= day <= calendar.monthrange(year, month)[1]
+            and hour < 24 and minute < 60 and second < 60 and year >= 1):
+        return None
+
+    return calendar.timegm((year, month, day, hour, minute, second))
+
+
+def epoch_to_timestamp(epoch):
+    """timestamp_to_epoch 的逆操作"""
+    # strftime 的 %Y 不给1000年以前的年份补零，这里显式按4位输出
+    tm = time.gmtime(epoch)
+    return (f"{tm.tm_year:04d}-{tm.tm_mon:02d}-{tm.tm_mday:02d} "
+            f"{tm.tm_hour:02d}:{tm.tm_min:02d}:{tm.tm_sec:02d}")
+
+
+def ipv4_to_int(ip):
+    """把规范的点分十进制IPv4地址转成32位整数；不规范的返回 None"""
+    if not isinstance(ip, str):
+        return None
+
+    parts = ip.split('.')
+    if len(parts) != 4:
+        return None
+
+    value = 0
+    for part in parts:
+        # 拒绝前导零、非ASCII数字等不能原样还原的写法
+        if not (part.isascii() and part.isdigit()) or (len(part) > 1 and part[0] == '0'):
+            return None
+        octet = int(part)
+        if octet > 255:
+            return None
+        value = (value << 8) | octet
+
+    return value
+
+
+def int_to_ipv4(value):
+    """ipv4_to_int 的逆操作"""
+    return f"{value >> 24}.{(value >> 16) & 255}.{(value >> 8) & 255}.{value & 255}"
+
+
+class Alert:
+    """单条告警记录，用 __slots__ 代替字典"""
+
+    __slots__ = ALERT_FIELDS + ("extra",)
+
+    def __init__(self, id=0, timestamp="", source_ip="0.0.0.0", source_port=0,
+                 destination_ip="0.0.0.0", destination_port=0, protocol="TCP",
+                 alert_type="Unknown Alert", classification="Unknown", severity="MEDIUM",
+                 rule_id="0:0:0", raw_summary="", extra=None):
+        self.id = id
+        self.timestamp = timestamp
+        self.source_ip = source_ip
+        self.source_port = source_port
+        self.destination_ip = destination_ip
+        self.destination_port = destination_port
+        self.protocol = protocol
+        self.alert_type = alert_type
+        self.classification = classification
+        self.severity = severity
+        self.rule_id = rule_id
+        self.raw_summary = raw_summary
+        # 标准字段以外的键（如攻击场景数据里的 description、payload）
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, data):
+        """由 parse_line 格式的字典构造，重复度高的字符串会被驻留"""
+        alert = cls.__new__(cls)
+
+        for field in ALERT_FIELDS:
+            setattr(alert, field, data.get(field, MISSING))
+        for field in _INTERNED_FIELDS:
+            value = getattr(alert, field)
+            if type(value) is str:
+                setattr(alert, field, sys.intern(value))
+
+        alert.extra = None
+        if data.keys() != _STANDARD_KEYS:
+            alert.extra = {key: value for key, value in data.items() if key not in _STANDARD_KEYS} or None
+        return alert
+
+    def to_dict(self):
+        """转回 parse_line 格式的字典"""
+        data = {}
+        for field in ALERT_FIELDS:
+            value = getattr(self, field)
+            if value is not MISSING:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        if not isinstance(other, Alert):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"Alert({self.to_dict()!r})"
+
+
+# ==================== 列式存储 ====================
+
+class _IntColumn:
+    """整数列：array 存储，放不下的值（越界、非整数、缺失）记在溢出表里"""
+
+    def __init__(self, typecode, default=0):
+        self.data = array(typecode)
+        self.overflow = {}
+        self.default = default
+
+    def append(self, value):
+        if type(value) is int:
+            try:
+                self.data.append(value)
+                return
+            except OverflowError:
+                pass
+        self.overflow[len(self.data)] = value
+        self.data.append(self.default)
+
+    def get(self, row):
+        if self.overflow and row in self.overflow:
+            return self.overflow[row]
+        return self.data[row]
+
+    def nbytes(self):
+        return self.data.itemsize * len(self.data) + _overflow_nbytes(self.overflow)
+
+
+class _EncodedColumn:
+    """定长编码列（IP、时间戳）：不能无损编码的原值记在溢出表里"""
+
+    def __init__(self, typecode, encode, decode):
+        self.data = array(typecode)
+        self.overflow = {}
+        self.encode = encode
+        self.decode = decode
+
+    def append(self, value):
+        encoded = self.encode(value)
+        if encoded is None:
+            self.overflow[len(self.data)] = value
+            encoded = 0
+        self.data.append(encoded)
+
+    def get(self, row):
+        if self.overflow and row in self.overflow:
+            return self.overflow[row]
+        return self.decode(self.data[row])
+
+    def nbytes(self):
+        return self.data.itemsize * len(self.data) + _overflow_nbytes(self.overflow)
+
+
+class DictionaryColumn:
+    """字典编码列：每个不同的值只存一份，每行只存一个整数编码
+
+    编码数组从 'B' 开始，不同值超过范围时自动加宽到 'H'、'I'。
+    编码 0 固定表示缺失；不可哈希的值记在溢出表里。
+    索引按 (类型, 值) 区分，避免 1 和 True 这类相等的值被合并。
+    """
+
+    def __init__(self, rows=0):
+        self.values = [MISSING]
+        self.index = {}
+        self.codes = array('B', bytes(rows))
+        self.overflow = {}
+
+    def code_of(self, value):
+        """返回值对应的编码，不存在时返回 None"""
+        return self.index.get((type(value), value))
+
+    def append(self, value):
+        if value is MISSING:
+            self.codes.append(0)
+            return
+
+        key = (type(value), value)
+        try:
+            code = self.index.get(key)
+        except TypeError:
+            self.overflow[len(self.codes)] = value
+            self.codes.append(0)
+            return
+
+        if code is None:
+            code = self.index[key] = len(self.values)
+            self.values.append(value)
+            if code > 255 and self.codes.typecode == 'B':
+                self.codes = array('H', self.codes)
+            elif code > 65535 and self.codes.typecode == 'H':
+                self.codes = array('I', self.codes)
+        self.codes.append(code)
+
+    def get(self, row):
+        if self.overflow and row in self.overflow:
+            return self.overflow[row]
+        return self.values[self.codes[row]]
+
+    def nbytes(self):
+        size = self.codes.itemsize * len(self.codes) + sys.getsizeof(self.values) + sys.getsizeof(self.index)
+        size += sum(sys.getsizeof(value) for value in self.values[1:])
+        return size + _overflow_nbytes(self.overflow)
+
+
+def _overflow_nbytes(overflow):
+    if not overflow:
+        return 0
+    return sys.getsizeof(overflow) + sum(sys.getsizeof(value) for value in overflow.values())
+
+
+class AlertBatch:
+    """告警列式容器
+
+    - id、端口用 array 存整数
+    - 时间戳存为整数秒，IP 存为32位整数
+    - 协议、严重程度、分类、告警类型、规则ID、摘要做字典编码
+    - 非标准的值、额外字段和键顺序同样能无损存取
+    """
+
+    def __init__(self):
+        self.ids = _IntColumn('q')
+        self.timestamps = _EncodedColumn('q', timestamp_to_epoch, epoch_to_timestamp)
+        self.source_ips = _EncodedColumn('I', ipv4_to_int, int_to_ipv4)
+        self.source_ports = _IntColumn('H')
+        self.destination_ips = _EncodedColumn('I', ipv4_to_int, int_to_ipv4)
+        self.destination_ports = _IntColumn('H')
+        self.protocol = DictionaryColumn()
+        self.alert_type = DictionaryColumn()
+        self.classification = DictionaryColumn()
+        self.severity = DictionaryColumn()
+        self.rule_id = DictionaryColumn()
+        self.raw_summary = DictionaryColumn()
+
+        self.columns = {
+            "id": self.ids,
+            "timestamp": self.timestamps,
+            "source_ip": self.source_ips,
+            "source_port": self.source_ports,
+            "destination_ip": self.destination_ips,
+            "destination_port": self.destination_ports,
+            "protocol": self.protocol,
+            "alert_type": self.alert_type,
+            "classification": self.classification,
+            "severity": self.severity,
+            "rule_id": self.rule_id,
+            "raw_summary": self.raw_summary,
+        }
+        # 每行的键顺序（字典编码），保证还原出的字典连JSON输出顺序都不变
+        self.layouts = DictionaryColumn()
+        self._length = 0
+
+    @classmethod
+    def from_dicts(cls, alerts):
+        batch = cls()
+        batch.extend(alerts)
+        return batch
+
+    def append(self, alert):
+        """追加一条告警（字典或 Alert），返回其行号"""
+        if isinstance(alert, Alert):
+            alert = alert.to_dict()
+
+        columns = self.columns
+        for field, column in columns.items():
+            column.append(alert.get(field, MISSING))
+
+        if alert.keys() != _STANDARD_KEYS:
+            # 额外字段单独成列，之前的行视为缺失
+            for key in alert:
+                if key not in columns:
+                    columns[key] = DictionaryColumn(self._length)
+                    columns[key].append(alert[key])
+
+        self.layouts.append(tuple(alert))
+        self._length += 1
+        return self._length - 1
+
+    def extend(self, alerts):
+        for alert in alerts:
+            self.append(alert)
+
+    def __len__(self):
+        return self._length
+
+    def get_dict(self, row):
+        """取出一行，还原为 parse_line 格式的字典"""
+        if row < 0:
+            row += self._length
+        if not 0 <= row < self._length:
+            raise IndexError("AlertBatch 行号越界")
+
+        columns = self.columns
+        return {field: columns[field].get(row) for field in self.layouts.get(row)}
+
+    def __getitem__(self, row):
+        return Alert.from_dict(self.get_dict(row))
+
+    def iter_dicts(self):
+        for row in range(self._length):
+            yield self.get_dict(row)
+
+    def __iter__(self):
+        for row in range(self._length):
+            yield self[row]
+
+    def memory_usage(self):
+        """估算容器占用的字节数"""
+        size = sys.getsizeof(self) + self.layouts.nbytes()
+        return size + sum(column.nbytes() for column in self.columns.values())
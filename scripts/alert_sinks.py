@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警输出
+功能：把告警（或任意可JSON序列化的记录）流式写出为 NDJSON 或紧凑JSON数组，
+      记录从迭代器逐条取出、按块写入，整文件输出先写临时文件再原子替换；
+      安装了 orjson 时自动使用它编码
+"""
+
+import json
+import os
+
+import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 缓冲区累计到这么多字节时写一次文件
+DEFAULT_FLUSH_BYTES = 1024 * 1024
+
+NDJSON_EXTENSIONS = ('.ndjson', '.jsonl')
+
+# 临时文件按 0666 创建，由内核套用 umask，权限与普通 open() 创建的文件相同
+_TEMP_FLAGS = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, 'O_BINARY', 0)
+
+
+# ==================== 编码 ====================
+
+def _encode_json(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _encode_orjson(record):
+    try:
+        return orjson.dumps(record)
+    except TypeError:
+        # orjson 不支持的值（非字符串键、超过64位的整数等）交给标准库
+        return _encode_json(record)
+
+
+def get_encoder(backend="auto"):
+    """返回 记录 -> UTF-8 字节 的紧凑编码函数
+
+    backend: "auto"（有 orjson 就用）、"orjson" 或 "json"
+    """
+    if backend == "auto":
+        backend = "orjson" if orjson is not None else "json"
+    if backend == "orjson":
+        if orjson is None:
+            raise ValueError("未安装 orjson")
+        return _encode_orjson
+    if backend == "json":
+        return _encode_json
+    raise ValueError(f"未知的编码后端: {backend}")
+
+
+def _encode_indented(record):
+    # json.dumps 会转义字符串中的换行，这里的换行只来自缩进
+    return json.dumps(record, indent=2, ensure_ascii=False).replace('\n', '\n  ').encode('utf-8')
+
+
+# ==================== 原子写文件 ====================
+
+class AtomicFile:
+    """先写同目录下的临时文件，commit 时用 os.replace 替换目标文件
+
+    出错（或未 commit 就关闭）时删除临时文件，目标文件保持原样。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        prefix = os.path.join(directory or '.', f'.{os.path.basename(path)}.')
+        while True:
+            self.temp_path = f'{prefix}{os.urandom(6).hex()}.tmp'
+            try:
+                fd = os.open(self.temp_path, _TEMP_FLAGS, 0o666)
+                break
+            except FileExistsError:
+                continue
+        self.f = os.fdopen(fd, 'wb')
+
+    def write(self, data):
+        self.f.write(data)
+
+    def commit(self):
+        self.f.close()
+        os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        self.f.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+
+class _ChunkWriter:
+    """把小段数据攒成块再写出"""
+
+    def __init__(self, f, flush_bytes):
+        self.f = f
+        self.flush_bytes = flush_bytes
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.size += len(data)
+        if self.size >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            with metrics.stage("write"):
+                self.f.write(b''.join(self.parts))
+            metrics.BYTES_WRITTEN.inc(self.size)
+            self.parts = []
+            self.size = 0
+
+
+# ==================== 输出 ====================
+
+class JsonArraySink:
+    """JSON数组输出：默认紧凑格式；indent=2 时与 json.dump(indent=2, ensure_ascii=False) 的输出相同"""
+
+    def __init__(self, path, encoder="auto", flush_bytes=DEFAULT_FLUSH_BYTES, indent=None):
+        self.path = path
+        self.flush_bytes = flush_bytes
+        self.indent = indent
+        if indent is None:
+            self.encode = get_encoder(encoder)
+        elif indent == 2:
+            self.encode = _encode_indented
+        else:
+            raise ValueError("indent 只支持 None 或 2")
+
+    def write(self, records):
+        """写出全部记录（原子替换目标文件），返回条数"""
+        if self.indent is None:
+            first, separator, end = b'[', b',', b']'
+        else:
+            first, separator, end = b'[\n  ', b',\n  ', b'\n]'
+
+        encode = metrics.timed(self.encode, "serialize")
+        count = 0
+        with AtomicFile(self.path) as f:
+            out = _ChunkWriter(f, self.flush_bytes)
+            for record in records:
+                out.write(separator if count else first)
+                out.write(encode(record))
+                count += 1
+            out.write(end if count else b'[]')
+            out.flush()
+        return count
+
+
+class NdjsonSink:
+    """NDJSON（每行一条JSON）输出
+
+    append=True 时追加到文件末尾：每块只包含完整的行，用一次 write 写出；
+    append=False 时写临时文件后原子替换。
+    """
+
+    def __init__(self, path, append=True, encoder="auto", flush_bytes=DEFAULT_FLUSH_BYTES):
+        self.path = path
+        self.append = append
+        self.flush_bytes = flush_bytes
+        self.encode = get_encoder(encoder)
+
+    def write(self, records):
+        """写出全部记录，返回条数"""
+        if not self.append:
+            with AtomicFile(self.path) as f:
+                return self._write_lines(f, records)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'ab', buffering=0) as f:
+            return self._write_lines(f, records)
+
+    def _write_lines(self, f, records):
+        encode = metrics.timed(self.encode, "serialize")
+        out = _ChunkWriter(f, self.flush_bytes)
+        count = 0
+        for record in records:
+            out.write(encode(record) + b'\n')
+            count += 1
+        out.flush()
+        return count
+
+
+def open_sink(path, output_format=None, **options):
+    """按格式（"json"、"ndjson"；不指定时看扩展名）创建输出"""
+    if output_format is None:
+        output_format = "ndjson" if path.endswith(NDJSON_EXTENSIONS) else "json"
+    if output_format == "ndjson":
+        return NdjsonSink(path, append=options.pop("append", False), **options)
+    if output_format == "json":
+        return JsonArraySink(path, **options)
+    raise ValueError(f"未知的输出格式: {output_format}")
+
+
+def write_json_document(document, path, indent=None, encoder="auto"):
+    """原子写出单个JSON文档（如API响应示例）；indent=None 时为紧凑格式"""
+    if indent is None:
+        data = get_encoder(encoder)(document)
+    else:
+        data = json.dumps(document, indent=indent, ensure_ascii=False).encode('utf-8')
+    with AtomicFile(path) as f:
+        f.write(data)
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警存储与查询
+功能：在内存中保存告警（基于列式容器 AlertBatch），维护按时间排序的主索引和
+      严重程度、攻击类型、源IP、目的端口的二级索引、源/目的IP的子网索引和文本字段的倒排索引，
+      支撑 GET /api/alerts 的过滤、全文检索、分页（page/limit 与游标）查询
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+
+from alert_model import AlertBatch, timestamp_to_epoch
+from ip_index import CidrSet, IpRangeIndex
+from search_index import SearchIndex
+
+# 支持二级索引的字段
+INDEXED_FIELDS = ("severity", "alert_type", "source_ip", "destination_port")
+
+# 子网过滤条件（取值为逗号分隔的 CIDR）-> 检查的IP字段；
+# subnet 为源或目的IP任一在子网内，exclude_subnet 为源和目的IP都不在子网内
+SUBNET_FILTERS = {
+    "source_subnet": ("source_ip",),
+    "destination_subnet": ("destination_ip",),
+    "subnet": ("source_ip", "destination_ip"),
+    "exclude_subnet": ("source_ip", "destination_ip"),
+}
+
+# 子网内（或全文检索命中）的告警数不超过时间范围内候选行数的这个比例时，用索引取出行号驱动查询，否则逐行检查
+SUBNET_DRIVER_RATIO = 0.25
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 1000
+
+# 多条件查询总数缓存的条目上限（LRU）
+COUNT_CACHE_SIZE = 256
+
+# 排序键的上界（同一秒内行号不会超过它）
+_MAX_ROW = 2 ** 63 - 1
+
+
+class AlertStore:
+    """内存告警存储
+
+    - 主索引：全部行号按 (时间戳, 行号) 排序，查询结果按时间从新到旧返回
+    - 二级索引：字段值 -> 行号数组，同样按 (时间戳, 行号) 排序
+    - 时间戳无法解析的告警按 1970-01-01 排序（排在最旧处）
+
+    告警基本按时间顺序到达时每条写入只是数组追加；乱序到达的告警用二分插入。
+    """
+
+    def __init__(self):
+        self.batch = AlertBatch()
+        self.primary = array('I')
+        self.indexes = {field: {} for field in INDEXED_FIELDS}
+        # 源/目的IP列（32位整数）上的排序索引，回答子网查询
+        self.ip_indexes = {
+            "source_ip": IpRangeIndex(self.batch.source_ips),
+            "destination_ip": IpRangeIndex(self.batch.destination_ips),
+        }
+        # 文本字段的倒排索引，回答 q= 全文检索
+        self.search_index = SearchIndex(self.batch)
+        # 时间戳列本身就是排序键的第一部分（无法解析的时间戳在列中存为0）
+        self._epochs = self.batch.timestamps.data
+        self._sort_key = lambda row: (self._epochs[row], row)
+        # 每次写入加1，用于缓存失效判断
+        self.generation = 0
+        # 多条件查询的总数缓存（同一条件翻页时不重复计数）；LRU，代数变化时清空
+        self._count_cache = OrderedDict()
+        self._count_generation = None
+
+    def __len__(self):
+        return len(self.batch)
+
+    # ==================== 写入 ====================
+
+    def add(self, alert):
+        """写入一条 parse_line 格式的告警，返回其行号"""
+        row = self.batch.append(alert)
+        self._index(self.primary, row)
+        self.search_index.add(row, alert)
+
+        for field in INDEXED_FIELDS:
+            value = alert.get(field)
+            if value is None:
+                continue
+            try:
+                rows = self.indexes[field].get(value)
+            except TypeError:
+                continue   # 不可哈希的值不进索引
+            if rows is None:
+                rows = self.indexes[field][value] = array('I')
+            self._index(rows, row)
+
+        self.generation += 1
+        return row
+
+    def extend(self, alerts):
+        for alert in alerts:
+            self.add(alert)
+        self.refresh_indexes()
+
+    def refresh_indexes(self):
+        """在写入方整理子网索引，查询时就不用等排序（逐条 add 的调用方每批写完后调用）"""
+        for index in self.ip_indexes.values():
+            index.refresh()
+
+    def _index(self, rows, row):
+        # 新行号总是最大的，时间不早于数组末尾时直接追加
+        if not rows or self._epochs[rows[-1]] <= self._epochs[row]:
+            rows.append(row)
+        else:
+            insort(rows, row, key=self._sort_key)
+
+    # ==================== 查询 ====================
+
+    def get(self, row):
+        return self.batch.get_dict(row)
+
+    def query(self, page=1, limit=DEFAULT_LIMIT, cursor=None, start_time=None, end_time=None, q=None, **filters):
+        """按条件查询告警，结果按时间从新到旧
+
+        filters 为 INDEXED_FIELDS 中字段的取值，或 SUBNET_FILTERS 中的子网条件
+        （逗号分隔的 CIDR 字符串或 CidrSet）；start_time/end_time 为
+        "YYYY-MM-DD HH:MM:SS" 字符串或整数秒（闭区间）；q 为全文检索条件
+        （语法见 search_index.parse_query）。
+        传入 cursor（上一页返回的 next_cursor）时按游标翻页，忽略 page。
+
+        返回 {"alerts": [...], "pagination": {"page", "limit", "total", "pages", "next_cursor"}}。
+        """
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        page = max(1, int(page))
+
+        subnets = {}
+        for field in list(filters):
+            if field in SUBNET_FILTERS:
+                subnets[field] = filters[field] = CidrSet.parse(filters[field])
+            elif field not in self.indexes:
+                raise ValueError(f"不支持按 {field} 过滤")
+
+        start = _to_epoch(start_time, "start_time")
+        end = _to_epoch(end_time, "end_time")
+        matched = self.search_index.search(q) if q else None
+
+        # 选出时间范围内最短的行号列表驱动查询，其余条件逐行检查
+        candidates = []
+        for field, value in filters.items():
+            if field in subnets:
+                continue
+            try:
+                rows = self.indexes[field].get(value)
+            except TypeError:
+                rows = None
+            if rows is None:
+                return _result([], page, limit, 0, None)
+            candidates.append((rows, *self._time_range(rows, start, end), field, value))
+
+        # 范围小的子网条件用子网索引取出行号，参与驱动列表的选择；范围大的只逐行检查
+        scans = []
+        for field, cidrs in subnets.items():
+            rows = None
+            if field != "exclude_subnet":
+                rows = self._subnet_rows(field, cidrs, min((c[2] - c[1] for c in candidates),
+                                                           default=len(self.primary)))
+            if rows is None:
+                scans.append((field, cidrs))
+            else:
+                candidates.append((rows, *self._time_range(rows, start, end), field, cidrs))
+
+        # 全文检索的结果按行号排序：命中少时按 (时间戳, 行号) 重排后参与驱动，否则逐行二分检查
+        if matched is not None:
+            if not matched:
+                return _result([], page, limit, 0, None)
+            shortest = min((c[2] - c[1] for c in candidates), default=len(self.primary))
+            if len(matched) <= shortest * SUBNET_DRIVER_RATIO:
+                rows = array('I', sorted(matched, key=self._sort_key))
+                candidates.append((rows, *self._time_range(rows, start, end), "q", matched))
+            else:
+                scans.append(("q", matched))
+
+        others = []
+        if candidates:
+            driver, lo, hi, _, _ = min(candidates, key=lambda c: c[2] - c[1])
+            others = [c for c in candidates if c[0] is not driver]
+            checks = [self._checker(field, value) for _, _, _, field, value in others]
+        else:
+            driver = self.primary
+            lo, hi = self._time_range(driver, start, end)
+            checks = []
+        checks += [self._checker(field, value) for field, value in scans]
+
+        if checks:
+            total = self._cached_count(filters, start, end, q,
+                                       lambda: self._count(driver, lo, hi, others, checks, scans))
+        else:
+            total = hi - lo
+
+        if cursor is not None:
+            key = _decode_cursor(cursor)
+            hi = min(hi, bisect_left(driver, key, lo, hi, key=self._sort_key))
+            skip = 0
+        else:
+            skip = (page - 1) * limit
+
+        # 多找一条符合条件的行判断后面是否还有数据，逐行检查的条件可能把剩下的行全部排除
+        rows = []
+        position = hi
+        while position > lo and len(rows) <= limit:
+            position -= 1
+            row = driver[position]
+            if checks and not all(check(row) for check in checks):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            rows.append(row)
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows.pop()
+            last = rows[-1]
+            next_cursor = f"{self._epochs[last]}.{last}"
+
+        return _result([self.batch.get_dict(row) for row in rows], page, limit, total, next_cursor)
+
+    def _cached_count(self, filters, start, end, q, count):
+        cache = self._count_cache
+        if self._count_generation != self.generation:
+            cache.clear()
+            self._count_generation = self.generation
+        key = (tuple(sorted(filters.items(), key=repr)), start, end, q or None)
+        total = cache.get(key)
+        if total is None:
+            total = cache[key] = count()
+            if len(cache) > COUNT_CACHE_SIZE:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        return total
+
+    def _time_range(self, rows, start, end):
+        lo, hi = 0, len(rows)
+        if start is not None:
+            lo = bisect_left(rows, (start, -1), key=self._sort_key)
+        if end is not None:
+            hi = bisect_right(rows, (end, _MAX_ROW), lo, key=self._sort_key)
+        return lo, hi
+
+    def _checker(self, field, value):
+        if field == "q":
+            return self.search_index.checker(value)
+        if field in SUBNET_FILTERS:
+            checks = [self.ip_indexes[ip_field].checker(value) for ip_field in SUBNET_FILTERS[field]]
+            if field == "exclude_subnet":
+                return lambda row: not any(check(row) for check in checks)
+            if len(checks) == 1:
+                return checks[0]
+            return lambda row: any(check(row) for check in checks)
+        get = self.batch.columns[field].get
+        return lambda row: get(row) == value
+
+    def _subnet_rows(self, field, cidrs, limit):
+        """子网内的告警不多于 limit * SUBNET_DRIVER_RATIO 时返回按 (时间戳, 行号) 排序的行号，否则返回 None"""
+        ip_fields = SUBNET_FILTERS[field]
+        if sum(self.ip_indexes[ip_field].count(cidrs) for ip_field in ip_fields) > limit * SUBNET_DRIVER_RATIO:
+            return None
+        rows = set()
+        for ip_field in ip_fields:
+            rows.update(self.ip_indexes[ip_field].rows(cidrs))
+        return array('I', sorted(rows, key=self._sort_key))
+
+    def _count(self, driver, lo, hi, others, checks, scans=()):
+        # 驱动列表远短于其他列表（或有只能逐行检查的条件）时逐行检查，否则各索引在时间范围内的行号求交集
+        if scans or (hi - lo) * 8 < sum(rows_hi - rows_lo for _, rows_lo, rows_hi, _, _ in others):
+            return sum(1 for position in range(lo, hi) if all(check(driver[position]) for check in checks))
+        matched = set(driver[lo:hi]).intersection(*(rows[rows_lo:rows_hi] for rows, rows_lo, rows_hi, _, _ in others))
+        return len(matched)
+
+
+def _to_epoch(value, name):
+    if value is None or value == "":
+        return None
+    if isinstance(value, int):
+        return value
+    epoch = timestamp_to_epoch(value)
+    if epoch is None:
+        raise ValueError(f"{name} 格式应为 YYYY-MM-DD HH:MM:SS: {value!r}")
+    return epoch
+
+
+def _decode_cursor(cursor):
+    try:
+        epoch, row = cursor.split('.')
+        return int(epoch), int(row)
+    except (AttributeError, ValueError):
+        raise ValueError(f"无效的游标: {cursor!r}") from None
+
+
+def _result(alerts, page, limit, total, next_cursor):
+    return {
+        "alerts": alerts,
+        "pagination": {
+            "page": page,
+            "limit": limit,
+            "total": total,
+            "pages": math.ceil(total / limit),
+            "next_cursor": next_cursor
+        }
+    }
@@ -4,11 +4,13 @@
 API数据生成器 - 为前后端开发准备测试数据
 """
 
-import json
 import os
 from datetime import datetime, timedelta
 import random
 
+from alert_sinks import write_json_document
+from alert_store import AlertStore
+
 class APIDataGenerator:
     """生成符合API格式的测试数据"""
     
@@ -112,19 +114,13 @@ def main():
     alerts_data = APIDataGenerator.generate_alerts_data(100)
     alerts_file = '../data/api_test/alerts.json'
     
-    with open(alerts_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "status": "success",
-            "data": {
-                "alerts": alerts_data[:20],  # 第一页20条
-                "pagination": {
-                    "page": 1,
-                    "limit": 20,
-                    "total": len(alerts_data),
-                    "pages": 5
-                }
-            }
-        }, f, indent=2, ensure_ascii=False)
+    store = AlertStore()
+    store.extend(alerts_data)
+    
+    write_json_document({
+        "status": "success",
+        "data": store.query(page=1, limit=20)  # 第一页20条，按时间从新到旧
+    }, alerts_file)
     
     print(f"    已生成到: {alerts_file}")
     print(f"   包含 {len(alerts_data)} 条攻击记录，分页展示")
@@ -134,11 +130,10 @@ def main():
     stats_data = APIDataGenerator.generate_stats_data()
     stats_file = '../data/api_test/stats.json'
     
-    with open(stats_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "status": "success",
-            "data": stats_data
-        }, f, indent=2, ensure_ascii=False)
+    write_json_document({
+        "status": "success",
+        "data": stats_data
+    }, stats_file)
     
     print(f"    已生成到: {stats_file}")
     print(f"   包含总览、分布、TOP IP等统计信息")
@@ -148,11 +143,10 @@ def main():
     realtime_data = [APIDataGenerator.generate_realtime_alert() for _ in range(5)]
     realtime_file = '../data/api_test/realtime_examples.json'
     
-    with open(realtime_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "status": "success",
-            "data": realtime_data
-        }, f, indent=2, ensure_ascii=False)
+    write_json_document({
+        "status": "success",
+        "data": realtime_data
+    }, realtime_file)
     
     print(f"    已生成到: {realtime_file}")
     print(f"   包含5条实时攻击示例")
@@ -167,7 +161,12 @@ def main():
                 "page": "页码 (默认: 1)",
                 "limit": "每页数量 (默认: 20)",
                 "severity": "过滤严重程度",
-                "start_time": "开始时间"
+                "alert_type": "过滤攻击类型",
+                "source_ip": "过滤源IP",
+                "destination_port": "过滤目的端口",
+                "start_time": "开始时间",
+                "end_time": "结束时间",
+                "cursor": "游标翻页 (上一页返回的 pagination.next_cursor)"
             },
             "response_example": {
                 "status": "success",
@@ -188,8 +187,8 @@ def main():
     }
     
     api_doc_file = '../data/api_test/api_examples.json'
-    with open(api_doc_file, 'w', encoding='utf-8') as f:
-        json.dump(api_examples, f, indent=2, ensure_ascii=False)
+    # 接口说明给人看，保留缩进
+    write_json_document(api_examples, api_doc_file, indent=2)
     
     print(f"    已生成到: {api_doc_file}")
     print(f"   API接口说明文档")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析器与处理流程基准测试
+功能：用固定种子生成不同规模的日志语料，测量 parse_line、parse_file、stream_file、
+      序列化和统计聚合的吞吐量（条/秒、MB/秒）、单条延迟（p50/p99）和峰值内存，
+      结果写成JSON，可与保存的基线比较并按阈值判断性能回退
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from itertools import islice
+
+from alert_sinks import NdjsonSink, get_encoder, write_json_document
+from generate_snort_logs import DEFAULT_SEED, SnortLogGenerator
+from parse_snort_logs import SnortLogParser, iter_log_entries
+from stats_aggregator import StatsAggregator
+
+BENCHMARKS = ("parse_line", "parse_file", "stream_file", "serialize", "stats")
+DEFAULT_SIZES = ("10k",)
+DEFAULT_THRESHOLD = 0.10
+
+# parse_line、serialize、stats 最多使用的记录数（这些测试需要把记录放在内存里）
+DEFAULT_SAMPLE_LIMIT = 1000000
+
+# 比较基线时检查的指标：(指标, 是否越大越好)
+COMPARED_METRICS = (("records_per_sec", True), ("p99_us", False), ("peak_rss_mb", False))
+
+_SIZE_SUFFIXES = {"k": 1000, "m": 1000000}
+
+
+def parse_size(text):
+    """"10k" -> 10000，"1m" -> 1000000"""
+    text = str(text).strip().lower()
+    multiplier = _SIZE_SUFFIXES.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in _SIZE_SUFFIXES else text
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        raise ValueError(f"无效的规模: {text!r}") from None
+
+
+def size_label(count):
+    for suffix, multiplier in (("m", 1000000), ("k", 1000)):
+        if count >= multiplier and count % multiplier == 0:
+            return f"{count // multiplier}{suffix}"
+    return str(count)
+
+
+def prepare_corpus(count, corpus_dir, seed=DEFAULT_SEED):
+    """生成（或复用已生成的）固定种子语料，返回文件路径"""
+    path = os.path.join(corpus_dir, f"corpus-{size_label(count)}-{seed}.log")
+    if not os.path.exists(path):
+        SnortLogGenerator(count, seed=seed).write(path)
+    return path
+
+
+# ==================== 单项测试 ====================
+
+def _percentiles(samples_ns):
+    if not samples_ns:
+        return None, None
+    samples_ns.sort()
+    p50 = samples_ns[len(samples_ns) // 2]
+    p99 = samples_ns[min(len(samples_ns) - 1, int(len(samples_ns) * 0.99))]
+    return p50 / 1000, p99 / 1000
+
+
+def _timed_each(func, items):
+    """逐条调用 func 并记录每次耗时（纳秒）"""
+    clock = time.perf_counter_ns
+    samples = []
+    append = samples.append
+    for item in items:
+        start = clock()
+        func(item)
+        append(clock() - start)
+    return samples
+
+
+def _load_entries(corpus, limit):
+    with open(corpus, 'r', encoding='utf-8') as f:
+        return list(islice(iter_log_entries(f), limit))
+
+
+def _input_size(entries):
+    # 条目之间的空行也计入输入大小
+    return sum(len(entry) + 2 for entry in entries)
+
+
+def bench_parse_line(corpus, workdir, sample_limit):
+    entries = _load_entries(corpus, sample_limit)
+    size = _input_size(entries)
+    parse_line = SnortLogParser.parse_line
+
+    start = time.perf_counter()
+    for entry in entries:
+        parse_line(entry)
+    seconds = time.perf_counter() - start
+    return len(entries), size, seconds, _timed_each(parse_line, entries)
+
+
+def bench_parse_file(corpus, workdir, sample_limit):
+    output = os.path.join(workdir, "parsed.json")
+    start = time.perf_counter()
+    alerts = SnortLogParser.parse_file(corpus, output)
+    seconds = time.perf_counter() - start
+    return len(alerts), os.path.getsize(corpus), seconds, None
+
+
+def bench_stream_file(corpus, workdir, sample_limit):
+    output = os.path.join(workdir, "parsed.ndjson")
+    start = time.perf_counter()
+    count = SnortLogParser.stream_file(corpus, output)
+    seconds = time.perf_counter() - start
+    return count, os.path.getsize(corpus), seconds, None
+
+
+def bench_serialize(corpus, workdir, sample_limit):
+    alerts = SnortLogParser.parse_many(_load_entries(corpus, sample_limit))
+    output = os.path.join(workdir, "serialized.ndjson")
+    start = time.perf_counter()
+    NdjsonSink(output, append=False).write(alerts)
+    seconds = time.perf_counter() - start
+    return len(alerts), os.path.getsize(output), seconds, _timed_each(get_encoder(), alerts)
+
+
+def bench_stats(corpus, workdir, sample_limit):
+    entries = _load_entries(corpus, sample_limit)
+    alerts = SnortLogParser.parse_many(entries)
+    start = time.perf_counter()
+    StatsAggregator().add_many(alerts)
+    seconds = time.perf_counter() - start
+    return len(alerts), _input_size(entries), seconds, _timed_each(StatsAggregator().add, alerts)
+
+
+_BENCHMARK_FUNCS = {
+    "parse_line": bench_parse_line,
+    "parse_file": bench_parse_file,
+    "stream_file": bench_stream_file,
+    "serialize": bench_serialize,
+    "stats": bench_stats,
+}
+
+
+def run_one(name, corpus, sample_limit=DEFAULT_SAMPLE_LIMIT, repeat=1):
+    """在当前进程中运行一项测试，返回结果字典（吞吐量取 repeat 次中最好的一次）"""
+    func = _BENCHMARK_FUNCS[name]
+    best = None
+    with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            records, size, seconds, samples = func(corpus, workdir, sample_limit)
+            if best is None or seconds < best[2]:
+                best = (records, size, seconds, samples)
+
+    records, size, seconds, samples = best
+    p50, p99 = _percentiles(samples)
+    return {
+        "records": records,
+        "bytes": size,
+        "seconds": round(seconds, 6),
+        "records_per_sec": round(records / seconds, 1) if seconds else None,
+        "mb_per_sec": round(size / seconds / 1024 / 1024, 2) if seconds else None,
+        "p50_us": None if p50 is None else round(p50, 3),
+        "p99_us": None if p99 is None else round(p99, 3),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _peak_rss_mb():
+    # resource 只在 Unix 上有；拿不到时返回 None，比较时跳过这一项
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位是 KB，macOS 上是字节
+    return round(peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _run_isolated(args):
+    return run_one(*args)
+
+
+# ==================== 运行与比较 ====================
+
+def run_benchmarks(sizes=DEFAULT_SIZES, benchmarks=BENCHMARKS, corpus_dir=None, seed=DEFAULT_SEED,
+                   sample_limit=DEFAULT_SAMPLE_LIMIT, repeat=1, isolate=True):
+    """运行基准测试，返回 {"meta": {...}, "results": {"测试名/规模": {...}}}
+
+    isolate=True 时每项测试在新启动的子进程中运行，峰值内存只包含该项测试。
+    """
+    corpus_dir = corpus_dir or os.path.join(tempfile.gettempdir(), "ids-benchmark-corpus")
+    os.makedirs(corpus_dir, exist_ok=True)
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for size in sizes:
+        count = parse_size(size)
+        corpus = prepare_corpus(count, corpus_dir, seed)
+        for name in benchmarks:
+            if name not in _BENCHMARK_FUNCS:
+                raise ValueError(f"未知的测试项: {name}")
+            task = (name, corpus, sample_limit, repeat)
+            if isolate:
+                with context.Pool(1) as pool:
+                    result = pool.apply(_run_isolated, (task,))
+            else:
+                result = run_one(*task)
+            results[f"{name}/{size_label(count)}"] = result
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "sample_limit": sample_limit,
+            "repeat": repeat,
+            "isolated": isolate,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """与基线比较，返回超过阈值的回退列表
+
+    吞吐量下降、p99 延迟或峰值内存上升超过 threshold（相对值）即视为回退；
+    只比较两边都有的测试项和指标。
+    """
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if not base:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change < -threshold) if higher_is_better else (change > threshold):
+                regressions.append({"benchmark": key, "metric": metric,
+                                    "baseline": old, "current": new, "change": round(change, 4)})
+    return regressions
+
+
+def format_results(report):
+    lines = [f"{'测试项':<20}{'条数':>10}{'条/秒':>14}{'MB/秒':>10}{'p50(us)':>10}{'p99(us)':>10}{'峰值内存(MB)':>14}"]
+    for key, result in report["results"].items():
+        p50 = "-" if result["p50_us"] is None else f"{result['p50_us']:.2f}"
+        p99 = "-" if result["p99_us"] is None else f"{result['p99_us']:.2f}"
+        rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f}"
+        lines.append(f"{key:<20}{result['records']:>10}{result['records_per_sec']:>14,.0f}"
+                     f"{result['mb_per_sec']:>10.1f}{p50:>10}{p99:>10}{rss:>14}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """主函数 - 运行基准测试，写出结果并与基线比较；有回退时返回码为1"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    bench_dir = os.path.join(os.path.dirname(script_dir), 'data', 'benchmarks')
+
+    parser = argparse.ArgumentParser(description="解析器与处理流程基准测试")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help="语料规模，逗号分隔，如 10k,1m,10m")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="测试项，逗号分隔")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=1, help="每项重复次数，取最好的一次")
+    parser.add_argument("--sample-limit", type=int, default=DEFAULT_SAMPLE_LIMIT,
+                        help="parse_line/serialize/stats 最多使用的记录数")
+    parser.add_argument("--corpus-dir", default=os.path.join(bench_dir, 'corpus'))
+    parser.add_argument("--output", default=os.path.join(bench_dir, 'latest.json'), help="结果文件")
+    parser.add_argument("--baseline", help="与此基线文件比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="回退阈值（相对值）")
+    parser.add_argument("--save-baseline", help="同时把结果保存为基线文件")
+    parser.add_argument("--no-isolate", action="store_true", help="在当前进程中运行（峰值内存不准确）")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes.split(","), args.benchmarks.split(","), args.corpus_dir, args.seed,
+                            args.sample_limit, args.repeat, not args.no_isolate)
+    print(format_results(report))
+    write_json_document(report, args.output, indent=2)
+    print(f"\n 结果已保存到: {args.output}")
+    if args.save_baseline:
+        write_json_document(report, args.save_baseline, indent=2)
+        print(f" 基线已保存到: {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n 发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）:")
+            for item in regressions:
+                print(f"   {item['benchmark']} {item['metric']}: {item['baseline']} -> {item['current']} "
+                      f"({item['change']:+.1%})")
+            return 1
+        print(f"\n 与基线相比没有超过 {args.threshold:.0%} 的回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
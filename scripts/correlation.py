@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警关联检测（端口扫描 / DDoS）
+功能：在解析后的告警流上，按滑动时间窗统计每个源IP访问的不同目的端口数（端口扫描）
+      和每个目的IP收到的不同源IP数（DDoS），超过阈值时产生一条合成的检测告警。
+      不同值计数用按时间分片的 HyperLogLog，伪造源IP的洪泛下内存同样有界
+"""
+
+import math
+from collections import OrderedDict
+
+import metrics
+from alert_model import timestamp_to_epoch
+
+DEFAULT_WINDOW = 60
+DEFAULT_SCAN_THRESHOLD = 20      # 窗口内一个源IP访问的不同端口数
+DEFAULT_DDOS_THRESHOLD = 100     # 窗口内一个目的IP收到的不同源IP数
+DEFAULT_PRECISION = 7            # HyperLogLog 寄存器数 2^7=128，标准误差约 9%
+DEFAULT_MAX_KEYS = 50000         # 每类检测同时跟踪的键数上限
+PANES = 4                        # 滑动窗口切成的时间片数
+SPARSE_LIMIT = 16                # 不同值不超过这个数时精确记录，不分配寄存器
+
+# 合成告警的规则ID（gid 900 为关联检测自用）
+SCAN_RULE_ID = "900:1:1"
+DDOS_RULE_ID = "900:2:1"
+
+_POWERS = [2.0 ** -rank for rank in range(66)]
+_HASH_MASK = 2 ** 64 - 1
+
+_DETECTIONS = metrics.REGISTRY.counter(
+    "ids_correlation_alerts_total", "关联检测产生的告警数", ["kind"])
+_TRACKED_KEYS = metrics.QUEUE_DEPTH.labels(queue="correlation_keys")
+
+
+def _hash64(value):
+    # 整数的 hash() 就是它本身（端口号只占低16位），再过一遍 MurmurHash3 的 fmix64 让各位充分混合
+    h = hash(value) & _HASH_MASK
+    h = ((h ^ (h >> 33)) * 0xFF51AFD7ED558CCD) & _HASH_MASK
+    h = ((h ^ (h >> 33)) * 0xC4CEB9FE1A85EC53) & _HASH_MASK
+    return h ^ (h >> 33)
+
+
+def _alpha(m):
+    if m == 16:
+        return 0.673
+    if m == 32:
+        return 0.697
+    if m == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / m)
+
+
+def _estimate(m, inverse_sum, zeros):
+    """由寄存器的 sum(2^-r) 和零寄存器个数估计基数（小基数用线性计数修正）"""
+    estimate = _alpha(m) * m * m / inverse_sum
+    if estimate <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)
+    return estimate
+
+
+class HyperLogLog:
+    """HyperLogLog 不同值计数器：2^precision 个一字节寄存器"""
+
+    __slots__ = ("precision", "registers")
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError("precision 应在 4~16 之间")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value):
+        """加入一个值，寄存器有变化时返回 True"""
+        index, rank = _register(_hash64(value), self.precision)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("precision 不同的 HyperLogLog 不能合并")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def estimate(self):
+        registers = self.registers
+        return _estimate(len(registers), sum(_POWERS[rank] for rank in registers), registers.count(0))
+
+    def __len__(self):
+        return round(self.estimate())
+
+
+def _register(hashed, precision):
+    """哈希值 -> (寄存器编号, 其余位中第一个1的位置)"""
+    rest = hashed >> precision
+    return hashed & ((1 << precision) - 1), 64 - precision - rest.bit_length() + 1
+
+
+class SlidingDistinctCounter:
+    """最近 window 秒内不同值个数的估计
+
+    窗口切成 PANES 个时间片（另保留正在写入的一片），每片一组 HyperLogLog 寄存器，另维护所有存活片的逐位最大值
+    以及它的 sum(2^-r) 和零寄存器个数，加入一个值和取估计值都是 O(1)；
+    时间片滚动时才重算一次最大值（每片每个键一次）。实际覆盖的时间为 window 到 window + 一片。
+    不同值不超过 SPARSE_LIMIT 个时只记录 值 -> 最近时间，精确计数。
+    """
+
+    __slots__ = ("window", "precision", "pane_width", "values", "panes",
+                 "merged", "inverse_sum", "zeros")
+
+    def __init__(self, window=DEFAULT_WINDOW, precision=DEFAULT_PRECISION):
+        self.window = window
+        self.precision = precision
+        self.pane_width = max(1, math.ceil(window / PANES))
+        self.values = {}        # 精确模式：值 -> 最近出现的时间
+        self.panes = None       # 估计模式：[(时间片编号, 寄存器), ...]，从旧到新
+        self.merged = None
+        self.inverse_sum = 0.0
+        self.zeros = 0
+
+    def add(self, value, epoch):
+        """在 epoch 时刻加入一个值，返回窗口内不同值个数的估计"""
+        if self.panes is None:
+            values = self.values
+            if value in values:
+                if epoch > values[value]:
+                    values[value] = epoch
+            else:
+                values[value] = epoch
+                if len(values) > SPARSE_LIMIT:
+                    self._expire_values(epoch)
+                    if len(self.values) > SPARSE_LIMIT:
+                        self._to_registers(epoch)
+                        return _estimate(len(self.merged), self.inverse_sum, self.zeros)
+            return self._count_values(epoch)
+
+        self._insert(_hash64(value), epoch)
+        return _estimate(len(self.merged), self.inverse_sum, self.zeros)
+
+    def _count_values(self, epoch):
+        oldest = epoch - self.window
+        return sum(1 for seen in self.values.values() if seen > oldest)
+
+    def _expire_values(self, epoch):
+        oldest = epoch - self.window
+        self.values = {value: seen for value, seen in self.values.items() if seen > oldest}
+
+    def _to_registers(self, epoch):
+        values = self.values
+        self.values = None
+        self.panes = []
+        self.merged = bytearray(1 << self.precision)
+        self.inverse_sum = float(len(self.merged))
+        self.zeros = len(self.merged)
+        for value, seen in sorted(values.items(), key=lambda item: item[1]):
+            self._insert(_hash64(value), seen)
+
+    def _insert(self, hashed, epoch):
+        pane_id = epoch // self.pane_width
+        panes = self.panes
+        if not panes or pane_id > panes[-1][0]:
+            registers = bytearray(len(self.merged))
+            live = [pane for pane in panes if pane[0] >= pane_id - PANES]
+            if len(live) != len(panes):
+                self.panes = panes = live
+                self._remerge()
+            panes.append((pane_id, registers))
+        else:
+            for candidate_id, registers in reversed(panes):
+                if candidate_id == pane_id:
+                    break
+            else:
+                if pane_id < panes[-1][0] - PANES:
+                    return   # 早于窗口的乱序告警
+                # 窗口内但没有对应时间片（中间空闲过），插入到合适的位置
+                registers = bytearray(len(self.merged))
+                position = next(i for i, pane in enumerate(panes) if pane[0] > pane_id)
+                panes.insert(position, (pane_id, registers))
+
+        index, rank = _register(hashed, self.precision)
+        if rank > registers[index]:
+            registers[index] = rank
+            old = self.merged[index]
+            if rank > old:
+                self.merged[index] = rank
+                self.inverse_sum += _POWERS[rank] - _POWERS[old]
+                if old == 0:
+                    self.zeros -= 1
+
+    def _remerge(self):
+        m = len(self.merged)
+        if not self.panes:
+            self.merged = bytearray(m)
+        elif len(self.panes) == 1:
+            self.merged = bytearray(self.panes[0][1])
+        else:
+            self.merged = bytearray(map(max, *(registers for _, registers in self.panes)))
+        self.inverse_sum = sum(_POWERS[rank] for rank in self.merged)
+        self.zeros = self.merged.count(0)
+
+    def nbytes(self):
+        if self.panes is None:
+            return len(self.values) * 2 * 8
+        return len(self.merged) * (len(self.panes) + 1)
+
+
+class _Tracker:
+    __slots__ = ("counter", "quiet_until")
+
+    def __init__(self, window, precision):
+        self.counter = SlidingDistinctCounter(window, precision)
+        self.quiet_until = None
+
+
+class _Detector:
+    """一类检测：按 key_field 分组统计 value_field 的不同值个数"""
+
+    def __init__(self, key_field, value_field, threshold, window, precision, max_keys):
+        self.key_field = key_field
+        self.value_field = value_field
+        self.threshold = threshold
+        self.window = window
+        self.precision = precision
+        self.max_keys = max_keys
+        self.trackers = OrderedDict()   # 按最近使用排序，超过上限时淘汰最久未出现的键
+        self.evicted = 0
+
+    def observe(self, alert, epoch):
+        """返回 (键, 估计值)；未达阈值或处于静默期时返回 None"""
+        key = alert.get(self.key_field)
+        value = alert.get(self.value_field)
+        if key is None or value is None:
+            return None
+
+        trackers = self.trackers
+        tracker = trackers.get(key)
+        if tracker is None:
+            if len(trackers) >= self.max_keys:
+                trackers.popitem(last=False)
+                self.evicted += 1
+            tracker = trackers[key] = _Tracker(self.window, self.precision)
+        else:
+            trackers.move_to_end(key)
+
+        estimate = tracker.counter.add(value, epoch)
+        if estimate < self.threshold:
+            return None
+        # 同一个键一个窗口内只报一次
+        if tracker.quiet_until is not None and epoch < tracker.quiet_until:
+            return None
+        tracker.quiet_until = epoch + self.window
+        return key, round(estimate)
+
+
+class CorrelationEngine:
+    """端口扫描和 DDoS 关联检测
+
+    - 端口扫描：一个源IP在 window 秒内访问的不同目的端口数达到 scan_threshold
+    - DDoS：一个目的IP在 window 秒内收到的不同源IP数达到 ddos_threshold
+    - 阈值为 None 时关闭对应检测；每个键一个窗口内最多报一次
+    - max_keys：每类检测同时跟踪的键数上限，超过时淘汰最久未出现的键
+
+    时间取告警自身的时间戳，时间戳无法解析的告警不参与统计；合成告警（规则ID为
+    SCAN_RULE_ID / DDOS_RULE_ID）不会被再次统计。每条告警的处理是常数时间。
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, scan_threshold=DEFAULT_SCAN_THRESHOLD,
+                 ddos_threshold=DEFAULT_DDOS_THRESHOLD, precision=DEFAULT_PRECISION,
+                 max_keys=DEFAULT_MAX_KEYS):
+        if window <= 0:
+            raise ValueError("window 必须大于0")
+        self.window = int(window)
+        self.detectors = {}
+        if scan_threshold is not None:
+            self.detectors["scan"] = _Detector("source_ip", "destination_port", scan_threshold,
+                                               self.window, precision, max_keys)
+        if ddos_threshold is not None:
+            self.detectors["ddos"] = _Detector("destination_ip", "source_ip", ddos_threshold,
+                                               self.window, precision, max_keys)
+        self.detected = 0
+        # 相邻告警的时间戳大多相同，缓存上一次的转换结果
+        self._last_timestamp = None
+        self._last_epoch = None
+
+    def process(self, alert):
+        """统计一条告警，返回由它触发的合成告警列表（通常为空）"""
+        rule_id = alert.get("rule_id")
+        if rule_id == SCAN_RULE_ID or rule_id == DDOS_RULE_ID:
+            return []
+
+        timestamp = alert.get("timestamp")
+        if timestamp == self._last_timestamp:
+            epoch = self._last_epoch
+        else:
+            epoch = timestamp_to_epoch(timestamp)
+            self._last_timestamp, self._last_epoch = timestamp, epoch
+        if epoch is None:
+            return []
+
+        output = []
+        for kind, detector in self.detectors.items():
+            found = detector.observe(alert, epoch)
+            if found is not None:
+                output.append(self._meta_alert(kind, alert, *found))
+                _DETECTIONS.labels(kind=kind).inc()
+        if output:
+            self.detected += len(output)
+        if metrics.enabled():
+            _TRACKED_KEYS.set(self.tracked_keys())
+        return output
+
+    def correlate(self, alerts):
+        """逐条产出原告警，触发检测时紧随其后产出合成告警"""
+        for alert in alerts:
+            yield alert
+            yield from self.process(alert)
+
+    def tracked_keys(self):
+        return sum(len(detector.trackers) for detector in self.detectors.values())
+
+    def memory_usage(self):
+        """估算计数器占用的字节数（不含 Python 对象头）"""
+        return sum(tracker.counter.nbytes() for detector in self.detectors.values()
+                   for tracker in detector.trackers.values())
+
+    def _meta_alert(self, kind, alert, key, estimate):
+        if kind == "scan":
+            return {
+                "id": 0,
+                "timestamp": alert.get("timestamp"),
+                "source_ip": key,
+                "source_port": 0,
+                "destination_ip": alert.get("destination_ip"),
+                "destination_port": 0,
+                "protocol": alert.get("protocol", "TCP"),
+                "alert_type": "Port Scan Detected",
+                "classification": "Attempted Information Leak",
+                "severity": "HIGH",
+                "rule_id": SCAN_RULE_ID,
+                "raw_summary": f"{key} probed ~{estimate} distinct ports in {self.window}s",
+                "distinct_ports": estimate,
+                "window": self.window,
+            }
+        return {
+            "id": 0,
+            "timestamp": alert.get("timestamp"),
+            "source_ip": "0.0.0.0",
+            "source_port": 0,
+            "destination_ip": key,
+            "destination_port": alert.get("destination_port", 0),
+            "protocol": alert.get("protocol", "TCP"),
+            "alert_type": "DDoS Detected",
+            "classification": "Attempted Denial of Service",
+            "severity": "CRITICAL",
+            "rule_id": DDOS_RULE_ID,
+            "raw_summary": f"{key} received traffic from ~{estimate} distinct sources in {self.window}s",
+            "distinct_sources": estimate,
+            "window": self.window,
+        }
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警事件过滤（仿 Snort event_filter）
+功能：位于解析器输出和下游（输出文件、存储、推送）之间，把同一个键
+      （默认 rule_id、source_ip、destination_port）在滑动窗口内的重复告警合并成
+      一条带 count、first_seen、last_seen 的聚合告警，压缩攻击洪泛产生的大量相同告警。
+      状态保存在有上限的哈希表中，按事件时间用时间轮到期
+"""
+
+import metrics
+from alert_model import epoch_to_timestamp, timestamp_to_epoch
+
+DEFAULT_KEY = ("rule_id", "source_ip", "destination_port")
+DEFAULT_SECONDS = 60
+DEFAULT_MAX_GROUPS = 100000
+WHEEL_SLOTS = 4096
+
+_SUPPRESSED = metrics.REGISTRY.counter(
+    "ids_alerts_suppressed_total", "被事件过滤合并掉的告警条数")
+_GROUP_DEPTH = metrics.QUEUE_DEPTH.labels(queue="event_filter_groups")
+
+
+class _Group:
+    """一个键当前窗口内的聚合状态"""
+
+    __slots__ = ("key", "start", "latest", "deadline", "passed",
+                 "alert", "count", "first_seen", "last_seen")
+
+    def __init__(self, key, epoch):
+        self.key = key
+        self.start = epoch        # 窗口内最早、最晚的告警时间（决定到期时间）
+        self.latest = epoch
+        self.deadline = None
+        self.passed = 0           # 已直接放行的条数
+        self.alert = None         # 第一条被合并的告警（聚合告警以它为模板）
+        self.count = 0            # 被合并的条数
+        self.first_seen = None
+        self.last_seen = None
+
+
+class EventFilter:
+    """按键合并重复告警
+
+    - seconds：滑动窗口，同一个键相邻两条告警间隔小于 seconds 秒时归入同一组
+    - max_span：一组最长持续的秒数（默认 seconds 的10倍），持续的洪泛也会按这个间隔输出聚合告警
+    - limit：每组前 limit 条原样立即放行（Snort 的 limit 类型），其余合并，聚合告警的 count 只计合并的条数；
+      默认1，偶发的告警不延迟，只有重复的才等组到期后输出；0 表示全部合并
+    - max_groups：同时跟踪的组数上限，超过时提前输出最早建立的组
+
+    时间取告警自身的时间戳（事件时间），回放历史日志的结果与实时处理相同；
+    时间戳无法解析的告警直接放行。组到期由时间轮驱动：每组挂在到期秒对应的槽位上，
+    时间前进时只检查经过的槽位；组被续期时不移动，到槽位时发现未到期再挂到新的槽位。
+    """
+
+    def __init__(self, key=DEFAULT_KEY, seconds=DEFAULT_SECONDS, max_span=None, limit=1,
+                 max_groups=DEFAULT_MAX_GROUPS):
+        if seconds <= 0:
+            raise ValueError("seconds 必须大于0")
+        self.key = tuple(key)
+        self.seconds = int(seconds)
+        self.max_span = int(max_span) if max_span is not None else self.seconds * 10
+        self.limit = limit
+        self.max_groups = max_groups
+
+        self.groups = {}
+        self.slots = [[] for _ in range(WHEEL_SLOTS)]
+        self.now = None          # 已处理到的事件时间（秒）
+        self.suppressed = 0
+
+    # ==================== 处理 ====================
+
+    def process(self, alert):
+        """处理一条告警，返回此时应输出的告警列表（可能为空）"""
+        epoch = timestamp_to_epoch(alert.get("timestamp"))
+        if epoch is None:
+            return [alert]
+
+        output = self.advance(epoch) if self.now is None or epoch > self.now else []
+
+        key = tuple(alert.get(field) for field in self.key)
+        group = self.groups.get(key)
+        if group is None:
+            if len(self.groups) >= self.max_groups:
+                self._close(self.groups[next(iter(self.groups))], output)
+            group = self.groups[key] = _Group(key, epoch)
+            group.deadline = epoch + self.seconds
+            self._schedule(group)
+            _GROUP_DEPTH.set(len(self.groups))
+        else:
+            group.start = min(group.start, epoch)
+            group.latest = max(group.latest, epoch)
+            group.deadline = min(group.latest + self.seconds, group.start + self.max_span)
+
+        if group.passed < self.limit:
+            group.passed += 1
+            output.append(alert)
+        elif group.count == 0:
+            group.alert = alert
+            group.count = 1
+            group.first_seen = group.last_seen = epoch
+        else:
+            group.count += 1
+            group.first_seen = min(group.first_seen, epoch)
+            group.last_seen = max(group.last_seen, epoch)
+            self.suppressed += 1
+            _SUPPRESSED.inc()
+        return output
+
+    def filter(self, alerts):
+        """对告警流做过滤，逐条产出输出的告警；输入结束时输出所有未到期的组"""
+        for alert in alerts:
+            yield from self.process(alert)
+        yield from self.flush()
+
+    def advance(self, now):
+        """把事件时间推进到 now（如实时跟踪时空闲，用当前时间），返回到期输出的聚合告警"""
+        output = []
+        if self.now is None:
+            self.now = now
+            return output
+        if now <= self.now:
+            return output
+
+        # 推进超过一圈时每个槽位只需检查一次
+        ticks = range(self.now + 1, now + 1) if now - self.now < WHEEL_SLOTS else range(WHEEL_SLOTS)
+        self.now = now
+        for tick in ticks:
+            slot = self.slots[tick % WHEEL_SLOTS]
+            if not slot:
+                continue
+            self.slots[tick % WHEEL_SLOTS] = []
+            for group in slot:
+                if self.groups.get(group.key) is not group:
+                    continue   # 已提前输出
+                if group.deadline <= now:
+                    self._close(group, output)
+                else:
+                    self._schedule(group)
+        _GROUP_DEPTH.set(len(self.groups))
+        return output
+
+    def flush(self):
+        """输出全部未到期的组（按建立顺序）"""
+        output = []
+        for group in list(self.groups.values()):
+            self._close(group, output)
+        self.slots = [[] for _ in range(WHEEL_SLOTS)]
+        _GROUP_DEPTH.set(0)
+        return output
+
+    # ==================== 内部 ====================
+
+    def _schedule(self, group):
+        # 乱序到达的旧告警可能已经过了到期时间，挂到下一秒的槽位上
+        tick = group.deadline if self.now is None or group.deadline > self.now else self.now + 1
+        self.slots[tick % WHEEL_SLOTS].append(group)
+
+    def _close(self, group, output):
+        """结束一组，有被合并的告警时把聚合告警加到 output"""
+        del self.groups[group.key]
+        if group.count:
+            aggregated = dict(group.alert)
+            aggregated["count"] = group.count
+            aggregated["first_seen"] = epoch_to_timestamp(group.first_seen)
+            aggregated["last_seen"] = epoch_to_timestamp(group.last_seen)
+            output.append(aggregated)
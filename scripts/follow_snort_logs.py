@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snort日志实时跟踪器
+功能：像 tail -F 一样跟踪 raw_snort_alerts.log，实时解析新写入的告警
+"""
+
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import time
+
+import metrics
+from parse_snort_logs import SnortLogParser, find_last_record_end, split_log_entries
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+_BYTES_READ = metrics.BYTES_READ.labels(source="follow")
+_PENDING_DEPTH = metrics.QUEUE_DEPTH.labels(queue="follow_pending_bytes")
+
+
+class InotifyWaiter:
+    """基于 inotify 的等待器：监视日志所在目录，文件有变化时立即唤醒"""
+
+    def __init__(self, path):
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self.name = os.fsencode(os.path.basename(path))
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+        # 监视目录而不是文件本身，这样轮转后新建的同名文件也能收到事件
+        directory = os.fsencode(os.path.dirname(os.path.abspath(path)))
+        if libc.inotify_add_watch(self.fd, directory, WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch 失败")
+
+    def wait(self, timeout):
+        """等待目标文件的事件，超时返回 False"""
+        deadline = time.monotonic() + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return False
+
+            if self._drain():
+                return True
+
+    def reset(self):
+        """inotify 不需要退避状态"""
+
+    def _drain(self):
+        """读出所有待处理事件，返回其中是否有目标文件的事件"""
+        matched = False
+
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return matched
+
+            offset = 0
+            while offset < len(data):
+                _, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b'\0')
+                offset += name_len
+                if name == self.name:
+                    matched = True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollWaiter:
+    """没有 inotify 时的轮询等待器：空闲时轮询间隔按指数退避"""
+
+    def __init__(self, min_interval=0.005, max_interval=0.1):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def wait(self, timeout):
+        time.sleep(min(self.interval, timeout))
+        self.interval = min(self.interval * 2, self.max_interval)
+        return True
+
+    def reset(self):
+        """有新数据时回到最短轮询间隔"""
+        self.interval = self.min_interval
+
+    def close(self):
+        pass
+
+
+class SnortLogFollower:
+    """Snort日志跟踪器
+
+    - 按 inode 和文件大小识别日志轮转与截断
+    - 未以空行结束的半条记录暂存，直到结束符到达
+    - 可选的检查点文件记录已处理的字节偏移，重启后从断点继续
+    """
+
+    def __init__(self, path, checkpoint_path=None, use_inotify=True,
+                 chunk_size=1024 * 1024, min_poll_interval=0.005, max_poll_interval=0.1):
+        self.path = path
+        self.checkpoint_path = checkpoint_path
+        self.chunk_size = chunk_size
+
+        self._file = None
+        self._inode = None
+        self._offset = 0          # 已完整处理的字节数（不含暂存的半条记录）
+        self._pending = b''
+        self._next_id = 1
+        self._stopped = False
+
+        self._waiter = None
+        if use_inotify:
+            try:
+                self._waiter = InotifyWaiter(path)
+            except (OSError, AttributeError):
+                self._waiter = None
+        if self._waiter is None:
+            self._waiter = PollWaiter(min_poll_interval, max_poll_interval)
+
+        self._load_checkpoint()
+
+    # ==================== 读取 ====================
+
+    def read_available(self):
+        """读取当前可用的全部完整记录，返回解析结果列表（不阻塞）"""
+        alerts = []
+
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+
+        if self._file is not None and stat is not None:
+            if stat.st_ino != self._inode:
+                # 已轮转：先读完旧文件剩余内容，再切换到新文件
+                alerts.extend(self._read_new_data(final=True))
+                self._close_file()
+            elif stat.st_size < self._offset + len(self._pending):
+                # 已截断：从头开始
+                self._offset = 0
+                self._pending = b''
+                self._file.seek(0)
+
+        if self._file is None:
+            if stat is None:
+                return alerts
+            self._open_file(stat)
+
+        alerts.extend(self._read_new_data())
+
+        if alerts:
+            self._waiter.reset()
+            self._save_checkpoint()
+
+        return alerts
+
+    def follow(self, idle_timeout=1.0):
+        """持续跟踪日志文件，逐条产出新告警，直到调用 stop()"""
+        for alerts in self.follow_batches(idle_timeout):
+            yield from alerts
+
+    def follow_batches(self, idle_timeout=1.0):
+        """持续跟踪日志文件，按批产出新告警，直到调用 stop()
+
+        等待 idle_timeout 秒仍没有新数据时产出空列表，调用方可借此做定时工作
+        """
+        deadline = time.monotonic() + idle_timeout
+        while not self._stopped:
+            alerts = self.read_available()
+            if alerts:
+                yield alerts
+                deadline = time.monotonic() + idle_timeout
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                yield []
+                deadline = time.monotonic() + idle_timeout
+                continue
+            self._waiter.wait(remaining)
+
+    def seek_to_end(self):
+        """跳过文件中已有的内容，之后只产出新写入的记录"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        self._close_file()
+        self._inode = stat.st_ino
+        self._offset = stat.st_size
+        self._pending = b''
+
+    def stop(self):
+        self._stopped = True
+
+    def close(self):
+        self._close_file()
+        self._waiter.close()
+
+    def _open_file(self, stat):
+        self._file = open(self.path, 'rb')
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            # 新文件或检查点已失效
+            self._offset = 0
+        self._inode = stat.st_ino
+        self._pending = b''
+        self._file.seek(self._offset)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read_new_data(self, final=False):
+        """读取文件新增内容并解析其中的完整记录
+
+        final=True 表示文件不会再写入（已被轮转），末尾的半条记录也一并解析。
+        """
+        alerts = []
+
+        while True:
+            with metrics.stage("read"):
+                data = self._file.read(self.chunk_size)
+            if not data:
+                break
+            _BYTES_READ.inc(len(data))
+
+            search_from = max(0, len(self._pending) - 2)
+            self._pending += data
+            end = find_last_record_end(self._pending, search_from)
+            if end < 0:
+                continue
+
+            alerts.extend(self._parse(self._pending[:end]))
+            self._offset += end
+            self._pending = self._pending[end:]
+
+        if final and self._pending:
+            alerts.extend(self._parse(self._pending))
+            self._offset += len(self._pending)
+            self._pending = b''
+
+        _PENDING_DEPTH.set(len(self._pending))
+        return alerts
+
+    def _parse(self, data):
+        entries = split_log_entries(data.decode('utf-8', errors='replace'))
+        alerts = SnortLogParser.parse_many(entries)
+
+        for alert in alerts:
+            alert["id"] = self._next_id
+            self._next_id += 1
+
+        return alerts
+
+    # ==================== 检查点 ====================
+
+    def _load_checkpoint(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            self._inode = checkpoint["inode"]
+            self._offset = checkpoint["offset"]
+            self._next_id = checkpoint["next_id"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f" 检查点文件无效，从头开始: {e}")
+
+    def _save_checkpoint(self):
+        if not self.checkpoint_path:
+            return
+
+        checkpoint = {"inode": self._inode, "offset": self._offset, "next_id": self._next_id}
+        temp_path = self.checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+def main():
+    """主函数 - 跟踪 data/raw_snort_alerts.log 并打印新告警"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+
+    log_file = os.path.join(data_dir, 'raw_snort_alerts.log')
+    checkpoint_file = os.path.join(data_dir, 'follow_checkpoint.json')
+
+    print(f" 开始跟踪: {log_file} (Ctrl+C 退出)")
+    follower = SnortLogFollower(log_file, checkpoint_file)
+
+    try:
+        for alert in follower.follow():
+            print(f"  [{alert['severity']}] {alert['timestamp']} "
+                  f"{alert['source_ip']} -> {alert['destination_ip']}:{alert['destination_port']} "
+                  f"{alert['alert_type']}")
+    except KeyboardInterrupt:
+        print("\n 已停止跟踪")
+    finally:
+        follower.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,195 +2,522 @@
 # -*- coding: utf-8 -*-
 """
 Snort日志数据生成器 - 完整版
-生成多种格式的Snort模拟数据
+生成多种格式的Snort模拟数据；SnortLogGenerator 按固定种子流式生成
+任意条数的 alert_full 格式告警，用于解析器压力测试
 """
 
+import argparse
+import calendar
 import json
+import math
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-import os
+from itertools import accumulate
+
+from alert_sinks import AtomicFile
 
-# 确保data目录存在
-if not os.path.exists('../data'):
-    os.makedirs('../data')
-if not os.path.exists('../data/attack_scenarios'):
-    os.makedirs('../data/attack_scenarios')
-
-print("=" * 50)
-print("Snort数据生成器 - 完整版")
-print("=" * 50)
-
-# ==================== 1. 生成基础测试数据 ====================
-print("\n1. 生成基础测试数据...")
-base_data = []
-for i in range(20):
-    base_data.append({
-        "id": i,
-        "timestamp": (datetime.now() - timedelta(hours=random.randint(0, 72))).isoformat(),
-        "source_ip": f"10.0.{random.randint(1, 255)}.{random.randint(1, 255)}",
-        "destination_ip": "192.168.1.100",
-        "alert_type": random.choice(["Port Scan", "SQL Injection", "DDoS", "XSS"]),
-        "severity": random.choice(["LOW", "MEDIUM", "HIGH", "CRITICAL"]),
-        "protocol": random.choice(["TCP", "UDP", "ICMP"])
-    })
-
-with open('../data/sample_logs.json', 'w', encoding='utf-8') as f:
-    json.dump(base_data, f, indent=2, ensure_ascii=False)
-print("✅ 已生成 20 条基础数据到 data/sample_logs.json")
-
-# ==================== 2. 生成原始Snort格式日志 ====================
-print("\n2. 生成原始Snort格式日志...")
-raw_logs = []
-for i in range(15):
-    timestamp = (datetime.now() - timedelta(minutes=random.randint(0, 10080))).strftime("%m/%d-%H:%M:%S.%f")[:23]
-    src_ip = f"10.0.{random.randint(1, 255)}.{random.randint(1, 255)}"
-    dst_port = random.choice([80, 443, 22, 3389])
-    
-    alert = f"""[**] [1:{1000000+i}:1] TEST ALERT {i} [**]
-[Classification: Test Classification] [Priority: {random.randint(1, 3)}]
-{timestamp} {src_ip}:{random.randint(1024, 65535)} -> 192.168.1.100:{dst_port}
-TCP TTL:64 TOS:0x0 ID:{random.randint(1000, 9999)} IpLen:20 DgmLen:150
+# ==================== 原始告警模板 ====================
+
+RAW_ALERT_TEMPLATE = """[**] [1:{sid}:1] {message} [**]
+[Classification: {classification}] [Priority: {priority}]
+{timestamp} {source_ip}:{source_port} -> {destination_ip}:{destination_port}
+{protocol} TTL:64 TOS:0x0 ID:{packet_id} IpLen:20 DgmLen:{length}
 """
-    raw_logs.append(alert)
-
-with open('../data/raw_snort_alerts.log', 'w', encoding='utf-8') as f:
-    f.write("\n".join(raw_logs))
-print("✅ 已生成 15 条原始Snort日志到 data/raw_snort_alerts.log")
-
-# ==================== 3. 生成结构化详细数据 ====================
-print("\n3. 生成结构化详细数据...")
-detailed_logs = []
-attack_types = [
-    {"name": "SQL Injection", "priority": 1, "port": 80},
-    {"name": "XSS Attack", "priority": 1, "port": 443},
-    {"name": "Port Scan", "priority": 3, "port": 22},
-    {"name": "DDoS Attack", "priority": 1, "port": 80},
-    {"name": "Brute Force", "priority": 2, "port": 3389},
-    {"name": "Malware Download", "priority": 1, "port": 443}
+
+
+def format_raw_alert(sid, message, classification, priority, timestamp, source_ip, source_port,
+                     destination_ip, destination_port, protocol="TCP", packet_id=0, length=150, xref=None):
+    """渲染一条 alert_full 格式的原始告警（以换行结尾，条目之间需再加一个空行）
+
+    timestamp 为 "MM/DD-HH:MM:SS.ffffff"；xref 不为 None 时追加一行 [Xref => ...]。
+    """
+    alert = RAW_ALERT_TEMPLATE.format(
+        sid=sid, message=message, classification=classification, priority=priority,
+        timestamp=timestamp, source_ip=source_ip, source_port=source_port,
+        destination_ip=destination_ip, destination_port=destination_port,
+        protocol=protocol, packet_id=packet_id, length=length)
+    if xref is not None:
+        alert += f"[Xref => {xref}]\n"
+    return alert
+
+
+# ==================== 压力测试数据 ====================
+
+DEFAULT_SEED = 42
+DEFAULT_START = "2026-02-04 00:00:00"
+DEFAULT_DURATION = 86400          # 秒
+DEFAULT_ATTACKERS = 5000          # 背景流量中的攻击源IP数
+DEFAULT_ZIPF_S = 1.1              # 攻击源IP的 Zipf 分布参数，越大越集中在少数IP
+DEFAULT_EPISODE_SHARE = 0.1       # 端口扫描/DDoS 突发事件占总条数的比例
+DIURNAL_AMPLITUDE = 0.6           # 日周期波动幅度（相对均值）
+DIURNAL_PEAK_HOUR = 14            # 告警最多的时刻
+
+# 每个时间片预计生成的条数；时间片是渲染和并行的单位
+SLICE_RECORDS = 20000
+MAX_SLICE_SECONDS = 3600
+
+# 背景流量的规则（与示例数据中的攻击类型对应）：sid, 描述, 分类, 优先级, 协议, 目的端口, 权重
+BACKGROUND_RULES = [
+    (1000001, "SQL Injection", "Web Application Attack", 1, "TCP", 80, 20),
+    (1000002, "XSS Attack", "Web Application Attack", 1, "TCP", 443, 15),
+    (1000003, "Port Scan", "Attempted Information Leak", 3, "TCP", 22, 25),
+    (1000004, "DDoS Attack", "Attempted Denial of Service", 1, "TCP", 80, 5),
+    (1000005, "Brute Force", "Attempted Administrator Privilege Gain", 2, "TCP", 3389, 20),
+    (1000006, "Malware Download", "Trojan Activity", 1, "TCP", 443, 5),
+    (1000007, "DNS Amplification", "Attempted Denial of Service", 2, "UDP", 53, 5),
+    (1000008, "ICMP Ping Sweep", "Misc Activity", 4, "ICMP", 0, 5),
 ]
+PORT_SCAN_RULE = (1000003, "Port Scan", "Attempted Information Leak", 3, "TCP")
+DDOS_RULE = (1000004, "DDoS Attack", "Attempted Denial of Service", 1, "TCP")
+
+# 端口扫描按此顺序扫过端口（前8个与示例场景相同）
+SCAN_PORTS = [22, 80, 443, 3389, 8080, 21, 25, 53] + [port for port in range(1, 1025)
+                                                      if port not in (21, 22, 25, 53, 80, 443)]
+
+# 被保护的服务器
+TARGET_IPS = ["192.168.1.100", "192.168.1.101", "192.168.1.102", "192.168.1.10"]
+
+# 每条告警渲染为9段字符串：规则头、秒级时间戳、微秒、源IP、源端口、目的IP、规则尾、包ID、包长度，
+# 段与段之间的固定文字预先拼进各段，数字预先转成字符串
+_PACKET_LENGTH_TABLE = [f"{40 + i * 6}\n\n" for i in range(256)]
+_TARGET_TABLE = TARGET_IPS * (256 // len(TARGET_IPS))
+_SEGMENTS = 9
+_SECOND_STRS = [f"{s:02d}." for s in range(60)]
+
+# 65536 项的大表共约18MB，第一次生成时才建立，只用 format_raw_alert 的模块不必承担
+_large_tables = None
+
+
+def _get_large_tables():
+    """返回 (包ID表, 源端口表, DDoS 源IP表)，各 65536 项"""
+    global _large_tables
+    if _large_tables is None:
+        _large_tables = (
+            [f"{i} IpLen:20 DgmLen:" for i in range(65536)],
+            # 源端口取 32768~65535（Linux 默认的临时端口从32768起），每个端口正好占两项，等概率
+            [f"{32768 + (i & 32767)} -> " for i in range(65536)],
+            # DDoS 的源IP取自 10.0.0.0/16
+            [f"10.0.{i >> 8}.{i & 255}:" for i in range(65536)],
+        )
+    return _large_tables
+
+
+def _rule_segments(sid, message, classification, priority, protocol, destination_port):
+    """规则相关的两段：规则头（前两行）和规则尾（目的端口到包ID之前）"""
+    head = f"[**] [1:{sid}:1] {message} [**]\n[Classification: {classification}] [Priority: {priority}]\n"
+    tail = f":{destination_port}\n{protocol} TTL:64 TOS:0x0 ID:"
+    return head, tail
+
+
+def _lookup_table(items, weights, size):
+    """按权重把 items 分配到 size 个位置（最大余数法，每项至少一个位置），用随机下标查表即按权重抽样"""
+    total = sum(weights)
+    shares = [max(1, int(size * weight / total)) for weight in weights]
+    # 多分配的位置从份额最大的项里扣回，不足的按余数补给各项
+    while sum(shares) > size:
+        shares[shares.index(max(shares))] -= 1
+    remainders = sorted(range(len(items)), key=lambda i: size * weights[i] / total - shares[i], reverse=True)
+    for i in remainders[:size - sum(shares)]:
+        shares[i] += 1
+    table = []
+    for item, share in zip(items, shares):
+        table.extend([item] * share)
+    return table
+
+
+def _pick(rng, table, k):
+    """从 256 或 65536 项的表中等概率抽取 k 项"""
+    if len(table) == 256:
+        return list(map(table.__getitem__, rng.randbytes(k)))
+    return list(map(table.__getitem__, memoryview(rng.randbytes(2 * k)).cast('H')))
+
+
+def _uniform_offsets(rng, k, span):
+    """k 个 [0, span) 内的随机整数（64位随机数取模，偏差可忽略）"""
+    return list(map(span.__rmod__, memoryview(rng.randbytes(8 * k)).cast('Q')))
+
+
+class SnortLogGenerator:
+    """按固定种子生成大量 alert_full 格式告警
+
+    - 背景流量：按日周期曲线分布在 [start, start + duration) 内，攻击源IP服从 Zipf 分布
+    - 突发事件：端口扫描（单个源IP依次扫过各端口）和 DDoS（大量源IP打同一目标的80端口），
+      在短时间内密集出现，约占 episode_share 的条数
+    - 时间线切成时间片，每个时间片用 (seed, 时间片序号) 单独播种，整片渲染成一个字符串；
+      因此输出只取决于参数，与 workers 数无关，条目按时间顺序排列
+
+    生成的日志可直接用 SnortLogParser 解析。时间戳不含年份，解析器（SnortTimestampDecoder）
+    按参考时间（默认当前时间）推断：取日期合法、且不晚于 参考时间 + FUTURE_SLACK 的最近一年，
+    所以跨年的日志也能归到正确的年份。
+    """
+
+    def __init__(self, count, seed=DEFAULT_SEED, start=DEFAULT_START, duration=DEFAULT_DURATION,
+                 attackers=DEFAULT_ATTACKERS, zipf_s=DEFAULT_ZIPF_S, episode_share=DEFAULT_EPISODE_SHARE):
+        if count < 0:
+            raise ValueError("count 不能为负数")
+        if duration <= 0:
+            raise ValueError("duration 必须大于0")
+        self.count = count
+        self.seed = seed
+        self.start = calendar.timegm(time.strptime(start, "%Y-%m-%d %H:%M:%S"))
+        self.duration = duration
+
+        rng = random.Random(seed)
+
+        # 攻击源IP池，第 k 个IP的权重为 1 / k^s
+        self.attackers = [f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+                          for _ in range(attackers)]
+        self.attacker_table = _lookup_table([f"{ip}:" for ip in self.attackers],
+                                            [1 / (rank ** zipf_s) for rank in range(1, attackers + 1)], 65536)
+        self.rule_table = _lookup_table([_rule_segments(*rule[:6]) for rule in BACKGROUND_RULES],
+                                        [rule[6] for rule in BACKGROUND_RULES], 256)
+        self.scan_rules = [_rule_segments(*PORT_SCAN_RULE, port) for port in SCAN_PORTS]
+        self.ddos_rule = _rule_segments(*DDOS_RULE, 80)
+
+        # 时间片：让每片大约 SLICE_RECORDS 条
+        slice_seconds = duration * SLICE_RECORDS / max(count, 1)
+        self.slice_seconds = max(1, min(MAX_SLICE_SECONDS, int(slice_seconds)))
+        self.slice_count = math.ceil(duration / self.slice_seconds)
+
+        episode_records = int(count * episode_share)
+        self.episodes = self._plan_episodes(rng, episode_records)
+        self.background = count - episode_records
+
+        # 背景流量按日周期曲线的累计分布分到各时间片（四舍五入到整数，总数精确）
+        weights = [self._diurnal_rate(self.start + (i + 0.5) * self.slice_seconds)
+                   * (min(duration, (i + 1) * self.slice_seconds) - i * self.slice_seconds)
+                   for i in range(self.slice_count)]
+        total_weight = sum(weights)
+        self.slice_bounds = [round(self.background * cumulative / total_weight)
+                             for cumulative in accumulate(weights, initial=0)]
+
+    @staticmethod
+    def _diurnal_rate(epoch):
+        hour = (epoch % 86400) / 3600
+        return 1 + DIURNAL_AMPLITUDE * math.cos(2 * math.pi * (hour - DIURNAL_PEAK_HOUR) / 24)
+
+    def _plan_episodes(self, rng, total):
+        """规划突发事件：[(类型, 开始偏移秒, 持续秒数, 条数, 源IP, 目的IP)]，条数合计为 total"""
+        if total <= 0:
+            return []
+        count = max(1, min(total // 500, 10000))
+        sizes = [total // count + (1 if i < total % count else 0) for i in range(count)]
+        episodes = []
+        for size in sizes:
+            kind = "scan" if rng.random() < 0.5 else "ddos"
+            length = min(self.duration, rng.uniform(30, 120) if kind == "scan" else rng.uniform(60, 300))
+            offset = rng.uniform(0, self.duration - length)
+            source = f"10.0.{rng.randint(1, 255)}.{rng.randint(1, 255)}"
+            episodes.append((kind, offset, length, size, source, rng.choice(TARGET_IPS)))
+        episodes.sort(key=lambda episode: episode[1])
+        return episodes
+
+    # ==================== 生成 ====================
+
+    def render_slice(self, index):
+        """渲染第 index 个时间片内的全部告警，返回 (文本, 条数)"""
+        rng = random.Random(self.seed * 1000003 + index)
+        packet_id_table, source_port_table, botnet_table = _get_large_tables()
+        slice_start = index * self.slice_seconds
+        slice_end = min(self.duration, slice_start + self.slice_seconds)
+        span_us = int((slice_end - slice_start) * 1000000)
 
-for i in range(50):
-    attack = random.choice(attack_types)
-    severity_map = {1: "CRITICAL", 2: "HIGH", 3: "MEDIUM"}
-    
-    detailed_logs.append({
-        "id": i,
-        "timestamp": (datetime.now() - timedelta(minutes=random.randint(0, 10080))).strftime("%Y-%m-%d %H:%M:%S"),
-        "source_ip": f"{random.randint(1, 223)}.{random.randint(1, 255)}.{random.randint(1, 255)}.{random.randint(1, 255)}",
-        "destination_ip": "192.168.1.100",
-        "destination_port": attack["port"],
-        "protocol": random.choice(["TCP", "UDP"]),
-        "alert_type": attack["name"],
-        "severity": severity_map.get(attack["priority"], "LOW"),
-        "priority": attack["priority"],
-        "classification": "Web Application Attack" if attack["priority"] == 1 else "Network Attack",
-        "description": f"{attack['name']} attempt detected",
-        "action": random.choice(["ALERT", "BLOCK", "PASS"]),
-        "bytes": random.randint(100, 5000),
-        "packets": random.randint(1, 10)
-    })
-
-with open('../data/parsed_logs.json', 'w', encoding='utf-8') as f:
-    json.dump(detailed_logs, f, indent=2, ensure_ascii=False)
-print("✅ 已生成 50 条详细数据到 data/parsed_logs.json")
-
-# ==================== 4. 生成攻击场景数据 ====================
-print("\n4. 生成攻击场景数据...")
-
-# 4.1 端口扫描场景
-print("  - 生成端口扫描场景...")
-port_scan = []
-attacker_ip = "10.0.99.99"
-base_time = datetime.now() - timedelta(hours=1)
-
-for port in [22, 80, 443, 3389, 8080, 21, 25, 53]:
-    port_scan.append({
-        "timestamp": (base_time + timedelta(seconds=random.randint(1, 10))).strftime("%Y-%m-%d %H:%M:%S"),
-        "source_ip": attacker_ip,
-        "destination_ip": "192.168.1.100",
-        "destination_port": port,
-        "alert_type": "Port Scan",
-        "severity": "MEDIUM",
-        "description": f"Port scan attempt on port {port}"
-    })
-
-with open('../data/attack_scenarios/port_scan.json', 'w', encoding='utf-8') as f:
-    json.dump(port_scan, f, indent=2, ensure_ascii=False)
-
-# 4.2 DDoS攻击场景
-print("  - 生成DDoS攻击场景...")
-ddos_attack = []
-start_time = datetime.now() - timedelta(minutes=30)
-
-for i in range(20):
-    ddos_attack.append({
-        "timestamp": (start_time + timedelta(seconds=i*2)).strftime("%Y-%m-%d %H:%M:%S"),
-        "source_ip": f"10.0.{random.randint(1, 255)}.{random.randint(1, 255)}",
-        "destination_ip": "192.168.1.100",
-        "destination_port": 80,
-        "alert_type": "DDoS Attack",
-        "severity": "CRITICAL",
-        "description": f"DDoS flood packet {i+1}"
-    })
-
-with open('../data/attack_scenarios/ddos_attack.json', 'w', encoding='utf-8') as f:
-    json.dump(ddos_attack, f, indent=2, ensure_ascii=False)
-
-# 4.3 SQL注入场景
-print("  - 生成SQL注入场景...")
-sql_injection = []
-for i in range(5):
-    sql_injection.append({
-        "timestamp": (datetime.now() - timedelta(minutes=random.randint(1, 60))).strftime("%Y-%m-%d %H:%M:%S"),
-        "source_ip": f"10.0.{random.randint(1, 255)}.{random.randint(1, 255)}",
-        "destination_ip": "192.168.1.100",
-        "destination_port": 80,
-        "alert_type": "SQL Injection",
-        "severity": "HIGH",
-        "description": f"SQL injection attempt with payload: SELECT * FROM users WHERE 1=1",
-        "payload": "SELECT * FROM users WHERE 1=1 OR '1'='1'"
-    })
-
-with open('../data/attack_scenarios/sql_injection.json', 'w', encoding='utf-8') as f:
-    json.dump(sql_injection, f, indent=2, ensure_ascii=False)
-
-# ==================== 5. 生成统计信息 ====================
-print("\n5. 生成统计信息文件...")
-stats = {
-    "generated_at": datetime.now().isoformat(),
-    "total_records": len(base_data) + len(detailed_logs),
-    "file_summary": {
-        "sample_logs.json": len(base_data),
-        "raw_snort_alerts.log": len(raw_logs),
-        "parsed_logs.json": len(detailed_logs),
-        "attack_scenarios": {
-            "port_scan.json": len(port_scan),
-            "ddos_attack.json": len(ddos_attack),
-            "sql_injection.json": len(sql_injection)
+        # 背景流量：时间片内均匀分布的偏移（微秒）
+        n = self.slice_bounds[index + 1] - self.slice_bounds[index]
+        offsets = _uniform_offsets(rng, n, span_us)
+        rules = _pick(rng, self.rule_table, n)
+        sources = _pick(rng, self.attacker_table, n)
+        targets = _pick(rng, _TARGET_TABLE, n)
+
+        # 突发事件：条目按固定间隔排满整个持续时间
+        for kind, offset, length, size, source, target in self.episodes:
+            if offset >= slice_end:
+                break
+            if offset + length <= slice_start:
+                continue
+            step = length / size
+            first = max(0, math.ceil((slice_start - offset) / step))
+            last = min(size, math.ceil((slice_end - offset) / step))
+            if first >= last:
+                continue
+            offsets.extend(max(0, int((offset + i * step - slice_start) * 1000000)) for i in range(first, last))
+            targets.extend([target] * (last - first))
+            if kind == "scan":
+                rules.extend(self.scan_rules[i % len(SCAN_PORTS)] for i in range(first, last))
+                sources.extend([f"{source}:"] * (last - first))
+            else:
+                rules.extend([self.ddos_rule] * (last - first))
+                sources.extend(_pick(rng, botnet_table, last - first))
+
+        total = len(offsets)
+        if not total:
+            return "", 0
+
+        # 按时间排序；源端口、包ID、包长度与顺序无关，直接按排好的位置抽取
+        order = sorted(range(total), key=offsets.__getitem__)
+        offsets.sort()
+        rules = list(map(rules.__getitem__, order))
+
+        # 时间片内每一秒的时间戳前缀 "MM/DD-HH:MM:SS."
+        base = self.start + slice_start
+        skew = base % 60
+        span = math.ceil(slice_end - slice_start) + 1
+        minutes = [time.strftime("%m/%d-%H:%M:", time.gmtime(base - skew + m * 60))
+                   for m in range((skew + span) // 60 + 1)]
+        seconds = [minutes[s // 60] + _SECOND_STRS[s % 60] for s in range(skew, skew + span)]
+
+        # 按列填充：每一列用一次切片赋值写入，整片 join 成一个字符串
+        parts = [None] * (_SEGMENTS * total)
+        parts[0::_SEGMENTS] = [rule[0] for rule in rules]
+        parts[1::_SEGMENTS] = map(seconds.__getitem__, map((1000000).__rfloordiv__, offsets))
+        parts[2::_SEGMENTS] = map("%06d ".__mod__, map((1000000).__rmod__, offsets))
+        parts[3::_SEGMENTS] = map(sources.__getitem__, order)
+        parts[4::_SEGMENTS] = _pick(rng, source_port_table, total)
+        parts[5::_SEGMENTS] = map(targets.__getitem__, order)
+        parts[6::_SEGMENTS] = [rule[1] for rule in rules]
+        parts[7::_SEGMENTS] = _pick(rng, packet_id_table, total)
+        parts[8::_SEGMENTS] = _pick(rng, _PACKET_LENGTH_TABLE, total)
+        return "".join(parts), total
+
+    def iter_chunks(self, workers=1):
+        """按时间顺序逐个时间片生成 (文本, 条数)"""
+        if workers == 1:
+            for index in range(self.slice_count):
+                yield self.render_slice(index)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(self.render_slice, range(self.slice_count), chunksize=4)
+
+    def write(self, path, workers=1):
+        """把全部告警写入 path（临时文件写完后原子替换），返回 (条数, 字节数)"""
+        records = 0
+        size = 0
+        with AtomicFile(path) as f:
+            for text, count in self.iter_chunks(workers):
+                data = text.encode('ascii')
+                f.write(data)
+                records += count
+                size += len(data)
+        return records, size
+
+
+# ==================== 示例数据集 ====================
+
+def generate_sample_data(data_dir, seed=None):
+    """生成示例数据集（基础数据、原始日志、详细数据、攻击场景、统计信息），返回统计信息"""
+    rng = random.Random(seed)
+    scenarios_dir = os.path.join(data_dir, 'attack_scenarios')
+    os.makedirs(scenarios_dir, exist_ok=True)
+
+    print("=" * 50)
+    print("Snort数据生成器 - 完整版")
+    print("=" * 50)
+
+    # ==================== 1. 生成基础测试数据 ====================
+    print("\n1. 生成基础测试数据...")
+    base_data = []
+    for i in range(20):
+        base_data.append({
+            "id": i,
+            "timestamp": (datetime.now() - timedelta(hours=rng.randint(0, 72))).isoformat(),
+            "source_ip": f"10.0.{rng.randint(1, 255)}.{rng.randint(1, 255)}",
+            "destination_ip": "192.168.1.100",
+            "alert_type": rng.choice(["Port Scan", "SQL Injection", "DDoS", "XSS"]),
+            "severity": rng.choice(["LOW", "MEDIUM", "HIGH", "CRITICAL"]),
+            "protocol": rng.choice(["TCP", "UDP", "ICMP"])
+        })
+
+    with open(os.path.join(data_dir, 'sample_logs.json'), 'w', encoding='utf-8') as f:
+        json.dump(base_data, f, indent=2, ensure_ascii=False)
+    print("✅ 已生成 20 条基础数据到 data/sample_logs.json")
+
+    # ==================== 2. 生成原始Snort格式日志 ====================
+    print("\n2. 生成原始Snort格式日志...")
+    raw_logs = []
+    for i in range(15):
+        timestamp = (datetime.now() - timedelta(minutes=rng.randint(0, 10080))).strftime("%m/%d-%H:%M:%S.%f")[:23]
+        src_ip = f"10.0.{rng.randint(1, 255)}.{rng.randint(1, 255)}"
+        dst_port = rng.choice([80, 443, 22, 3389])
+
+        alert = format_raw_alert(1000000 + i, f"TEST ALERT {i}", "Test Classification", rng.randint(1, 3),
+                                 timestamp, src_ip, rng.randint(1024, 65535), "192.168.1.100", dst_port,
+                                 packet_id=rng.randint(1000, 9999))
+        raw_logs.append(alert)
+
+    with open(os.path.join(data_dir, 'raw_snort_alerts.log'), 'w', encoding='utf-8') as f:
+        f.write("\n".join(raw_logs))
+    print("✅ 已生成 15 条原始Snort日志到 data/raw_snort_alerts.log")
+
+    # ==================== 3. 生成结构化详细数据 ====================
+    print("\n3. 生成结构化详细数据...")
+    detailed_logs = []
+    attack_types = [
+        {"name": "SQL Injection", "priority": 1, "port": 80},
+        {"name": "XSS Attack", "priority": 1, "port": 443},
+        {"name": "Port Scan", "priority": 3, "port": 22},
+        {"name": "DDoS Attack", "priority": 1, "port": 80},
+        {"name": "Brute Force", "priority": 2, "port": 3389},
+        {"name": "Malware Download", "priority": 1, "port": 443}
+    ]
+
+    for i in range(50):
+        attack = rng.choice(attack_types)
+        severity_map = {1: "CRITICAL", 2: "HIGH", 3: "MEDIUM"}
+
+        detailed_logs.append({
+            "id": i,
+            "timestamp": (datetime.now() - timedelta(minutes=rng.randint(0, 10080))).strftime("%Y-%m-%d %H:%M:%S"),
+            "source_ip": f"{rng.randint(1, 223)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}",
+            "destination_ip": "192.168.1.100",
+            "destination_port": attack["port"],
+            "protocol": rng.choice(["TCP", "UDP"]),
+            "alert_type": attack["name"],
+            "severity": severity_map.get(attack["priority"], "LOW"),
+            "priority": attack["priority"],
+            "classification": "Web Application Attack" if attack["priority"] == 1 else "Network Attack",
+            "description": f"{attack['name']} attempt detected",
+            "action": rng.choice(["ALERT", "BLOCK", "PASS"]),
+            "bytes": rng.randint(100, 5000),
+            "packets": rng.randint(1, 10)
+        })
+
+    with open(os.path.join(data_dir, 'parsed_logs.json'), 'w', encoding='utf-8') as f:
+        json.dump(detailed_logs, f, indent=2, ensure_ascii=False)
+    print("✅ 已生成 50 条详细数据到 data/parsed_logs.json")
+
+    # ==================== 4. 生成攻击场景数据 ====================
+    print("\n4. 生成攻击场景数据...")
+
+    # 4.1 端口扫描场景
+    print("  - 生成端口扫描场景...")
+    port_scan = []
+    attacker_ip = "10.0.99.99"
+    base_time = datetime.now() - timedelta(hours=1)
+
+    for port in [22, 80, 443, 3389, 8080, 21, 25, 53]:
+        port_scan.append({
+            "timestamp": (base_time + timedelta(seconds=rng.randint(1, 10))).strftime("%Y-%m-%d %H:%M:%S"),
+            "source_ip": attacker_ip,
+            "destination_ip": "192.168.1.100",
+            "destination_port": port,
+            "alert_type": "Port Scan",
+            "severity": "MEDIUM",
+            "description": f"Port scan attempt on port {port}"
+        })
+
+    with open(os.path.join(scenarios_dir, 'port_scan.json'), 'w', encoding='utf-8') as f:
+        json.dump(port_scan, f, indent=2, ensure_ascii=False)
+
+    # 4.2 DDoS攻击场景
+    print("  - 生成DDoS攻击场景...")
+    ddos_attack = []
+    start_time = datetime.now() - timedelta(minutes=30)
+
+    for i in range(20):
+        ddos_attack.append({
+            "timestamp": (start_time + timedelta(seconds=i*2)).strftime("%Y-%m-%d %H:%M:%S"),
+            "source_ip": f"10.0.{rng.randint(1, 255)}.{rng.randint(1, 255)}",
+            "destination_ip": "192.168.1.100",
+            "destination_port": 80,
+            "alert_type": "DDoS Attack",
+            "severity": "CRITICAL",
+            "description": f"DDoS flood packet {i+1}"
+        })
+
+    with open(os.path.join(scenarios_dir, 'ddos_attack.json'), 'w', encoding='utf-8') as f:
+        json.dump(ddos_attack, f, indent=2, ensure_ascii=False)
+
+    # 4.3 SQL注入场景
+    print("  - 生成SQL注入场景...")
+    sql_injection = []
+    for i in range(5):
+        sql_injection.append({
+            "timestamp": (datetime.now() - timedelta(minutes=rng.randint(1, 60))).strftime("%Y-%m-%d %H:%M:%S"),
+            "source_ip": f"10.0.{rng.randint(1, 255)}.{rng.randint(1, 255)}",
+            "destination_ip": "192.168.1.100",
+            "destination_port": 80,
+            "alert_type": "SQL Injection",
+            "severity": "HIGH",
+            "description": f"SQL injection attempt with payload: SELECT * FROM users WHERE 1=1",
+            "payload": "SELECT * FROM users WHERE 1=1 OR '1'='1'"
+        })
+
+    with open(os.path.join(scenarios_dir, 'sql_injection.json'), 'w', encoding='utf-8') as f:
+        json.dump(sql_injection, f, indent=2, ensure_ascii=False)
+
+    # ==================== 5. 生成统计信息 ====================
+    print("\n5. 生成统计信息文件...")
+    stats = {
+        "generated_at": datetime.now().isoformat(),
+        "total_records": len(base_data) + len(detailed_logs),
+        "file_summary": {
+            "sample_logs.json": len(base_data),
+            "raw_snort_alerts.log": len(raw_logs),
+            "parsed_logs.json": len(detailed_logs),
+            "attack_scenarios": {
+                "port_scan.json": len(port_scan),
+                "ddos_attack.json": len(ddos_attack),
+                "sql_injection.json": len(sql_injection)
+            }
+        },
+        "severity_distribution": {
+            "CRITICAL": sum(1 for log in detailed_logs if log["severity"] == "CRITICAL"),
+            "HIGH": sum(1 for log in detailed_logs if log["severity"] == "HIGH"),
+            "MEDIUM": sum(1 for log in detailed_logs if log["severity"] == "MEDIUM"),
+            "LOW": sum(1 for log in detailed_logs if log["severity"] == "LOW")
         }
-    },
-    "severity_distribution": {
-        "CRITICAL": sum(1 for log in detailed_logs if log["severity"] == "CRITICAL"),
-        "HIGH": sum(1 for log in detailed_logs if log["severity"] == "HIGH"),
-        "MEDIUM": sum(1 for log in detailed_logs if log["severity"] == "MEDIUM"),
-        "LOW": sum(1 for log in detailed_logs if log["severity"] == "LOW")
     }
-}
-
-with open('../data/data_statistics.json', 'w', encoding='utf-8') as f:
-    json.dump(stats, f, indent=2, ensure_ascii=False)
-
-print("\n" + "=" * 50)
-print("🎉 数据生成完成！")
-print("=" * 50)
-print("\n📁 生成的文件:")
-print("  ✅ data/sample_logs.json          - 20条基础数据")
-print("  ✅ data/raw_snort_alerts.log      - 15条原始Snort日志")
-print("  ✅ data/parsed_logs.json          - 50条详细数据")
-print("  ✅ data/attack_scenarios/port_scan.json")
-print("  ✅ data/attack_scenarios/ddos_attack.json")
-print("  ✅ data/attack_scenarios/sql_injection.json")
-print("  ✅ data/data_statistics.json      - 数据统计信息")
-print("\n📊 数据统计:")
-print(f"  总记录数: {stats['total_records']}")
-print(f"  严重程度分布: {stats['severity_distribution']}")
\ No newline at end of file
+
+    with open(os.path.join(data_dir, 'data_statistics.json'), 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 50)
+    print("🎉 数据生成完成！")
+    print("=" * 50)
+    print("\n📁 生成的文件:")
+    print("  ✅ data/sample_logs.json          - 20条基础数据")
+    print("  ✅ data/raw_snort_alerts.log      - 15条原始Snort日志")
+    print("  ✅ data/parsed_logs.json          - 50条详细数据")
+    print("  ✅ data/attack_scenarios/port_scan.json")
+    print("  ✅ data/attack_scenarios/ddos_attack.json")
+    print("  ✅ data/attack_scenarios/sql_injection.json")
+    print("  ✅ data/data_statistics.json      - 数据统计信息")
+    print("\n📊 数据统计:")
+    print(f"  总记录数: {stats['total_records']}")
+    print(f"  严重程度分布: {stats['severity_distribution']}")
+    return stats
+
+
+def main(argv=None):
+    """主函数 - 不带 --count 时生成示例数据集，带 --count 时生成压力测试日志"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+
+    parser = argparse.ArgumentParser(description="Snort 模拟数据生成器")
+    parser.add_argument("--count", type=int, help="生成指定条数的 alert_full 格式告警（压力测试）")
+    parser.add_argument("--output", default=os.path.join(data_dir, 'generated_alerts.log'), help="压力测试日志的输出文件")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="随机种子")
+    parser.add_argument("--start", default=DEFAULT_START, help="起始时间 YYYY-MM-DD HH:MM:SS")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="时间跨度（秒）")
+    parser.add_argument("--attackers", type=int, default=DEFAULT_ATTACKERS, help="背景流量的攻击源IP数")
+    parser.add_argument("--workers", type=int, default=1, help="并行渲染的进程数")
+    args = parser.parse_args(argv)
+
+    if args.count is None:
+        generate_sample_data(data_dir, args.seed)
+        return
+
+    generator = SnortLogGenerator(args.count, seed=args.seed, start=args.start,
+                                  duration=args.duration, attackers=args.attackers)
+    started = time.perf_counter()
+    records, size = generator.write(args.output, workers=args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"✅ 已生成 {records} 条告警到 {args.output}")
+    print(f"   {size / 1024 / 1024:.1f}MB，耗时 {elapsed:.2f} 秒（{size / 1024 / 1024 / elapsed:.1f}MB/s）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线 IP 归属国家查询
+功能：从 CSV 加载 IP 段 -> 国家代码 表，存成按起始地址排序的整数数组，用 bisect 查找；
+      前置有界 LRU 缓存（攻击源IP高度集中）；支持整批告警的富化；
+      第一次加载后生成二进制缓存文件，之后加载只需读入数组，不再解析 CSV
+
+CSV 每行为 "起始IP,结束IP,国家代码[,...]"（IP 可以是点分/冒号形式或十进制整数，
+兼容 IP2Location LITE、DB-IP 等格式）或 "CIDR,国家代码[,...]"；首行表头和 # 注释行跳过。
+"""
+
+import argparse
+import csv
+import ipaddress
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+from alert_sinks import AtomicFile
+from ip_index import parse_ip
+
+DEFAULT_CACHE_SIZE = 4096
+
+# 查不到（私有地址、不在表中、不是合法IP）时返回的国家代码
+UNKNOWN_COUNTRY = "UNKNOWN"
+
+# 二进制缓存：魔数、源CSV的 mtime_ns 和大小、国家代码表字节数、IPv4/IPv6 段数
+CACHE_MAGIC = b'IDSGEO01'
+CACHE_HEADER = struct.Struct('<8sqqIII')
+
+
+def _parse_address(text):
+    text = text.strip()
+    if text.isdigit():
+        value = int(text)
+        return (4 if value < 2 ** 32 else 6), value
+    return parse_ip(text)
+
+
+def _parse_row(row):
+    """CSV 行 -> (版本, 起始, 结束, 国家代码)；不是数据行时返回 None"""
+    fields = [field.strip() for field in row]
+    if not fields or not fields[0] or fields[0].startswith('#'):
+        return None
+
+    if '/' in fields[0] and len(fields) >= 2:
+        try:
+            network = ipaddress.ip_network(fields[0], strict=False)
+        except ValueError:
+            return None
+        return network.version, int(network.network_address), int(network.broadcast_address), fields[1]
+
+    if len(fields) < 3:
+        return None
+    start, end = _parse_address(fields[0]), _parse_address(fields[1])
+    if start is None or end is None or start[0] != end[0] or start[1] > end[1]:
+        return None
+    return start[0], start[1], end[1], fields[2]
+
+
+class GeoIpDatabase:
+    """IP 段表：每个地址族三列（起始、结束、国家编号），按起始地址排序，段之间不重叠"""
+
+    def __init__(self):
+        self.countries = []
+        self.v4 = (array('I'), array('I'), array('H'))
+        # IPv6 地址是128位整数，array 放不下，用列表
+        self.v6 = ([], [], array('H'))
+
+    def __len__(self):
+        return len(self.v4[0]) + len(self.v6[0])
+
+    @classmethod
+    def from_rows(cls, ranges):
+        """由 (版本, 起始, 结束, 国家代码) 序列构造；重叠的段以起始地址较小的为准"""
+        database = cls()
+        codes = {}
+        for version in (4, 6):
+            starts, ends, country_ids = database.v4 if version == 4 else database.v6
+            for _, start, end, country in sorted(item for item in ranges if item[0] == version):
+                if ends and start <= ends[-1]:
+                    if end <= ends[-1]:
+                        continue
+                    start = ends[-1] + 1
+                code = codes.get(country)
+                if code is None:
+                    code = codes[country] = len(database.countries)
+                    database.countries.append(country)
+                starts.append(start)
+                ends.append(end)
+                country_ids.append(code)
+        return database
+
+    @classmethod
+    def from_csv(cls, path):
+        """解析 CSV；无法识别的行（表头、注释）跳过，没有任何数据行时报错"""
+        ranges = []
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for line_number, row in enumerate(csv.reader(f), 1):
+                parsed = _parse_row(row)
+                if parsed is not None:
+                    version, start, end, country = parsed
+                    ranges.append((version, start, end, country.upper()))
+                elif line_number > 1 and row and row[0].strip() and not row[0].lstrip().startswith('#'):
+                    raise ValueError(f"{path} 第{line_number}行格式错误: {','.join(row)[:80]!r}")
+        if not ranges:
+            raise ValueError(f"{path} 中没有IP段数据")
+        return cls.from_rows(ranges)
+
+    # ==================== 二进制缓存 ====================
+
+    def save(self, path, source_mtime_ns=0, source_size=0):
+        countries = '\n'.join(self.countries).encode('utf-8')
+        v4_starts, v4_ends, v4_codes = self.v4
+        v6_starts, v6_ends, v6_codes = self.v6
+        with AtomicFile(path) as f:
+            f.write(CACHE_HEADER.pack(CACHE_MAGIC, source_mtime_ns, source_size, len(countries),
+                                      len(v4_starts), len(v6_starts)))
+            f.write(countries)
+            for column in (v4_starts, v4_ends, v4_codes):
+                f.write(_little_endian(column).tobytes())
+            f.write(b''.join(value.to_bytes(16, 'big') for value in v6_starts))
+            f.write(b''.join(value.to_bytes(16, 'big') for value in v6_ends))
+            f.write(_little_endian(v6_codes).tobytes())
+
+    @classmethod
+    def load(cls, path):
+        """读取二进制缓存，返回 (数据库, 源 mtime_ns, 源大小)"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < CACHE_HEADER.size:
+            raise ValueError(f"GeoIP 缓存文件损坏: {path}")
+        magic, mtime_ns, size, countries_size, v4_count, v6_count = CACHE_HEADER.unpack_from(data)
+        if magic != CACHE_MAGIC:
+            raise ValueError(f"不是 GeoIP 缓存文件: {path}")
+        expected = CACHE_HEADER.size + countries_size + v4_count * 10 + v6_count * 34
+        if len(data) != expected:
+            raise ValueError(f"GeoIP 缓存文件损坏: {path}")
+
+        database = cls()
+        offset = CACHE_HEADER.size
+        text = data[offset:offset + countries_size].decode('utf-8')
+        database.countries = text.split('\n') if text else []
+        offset += countries_size
+        for column, itemsize in zip(database.v4, (4, 4, 2)):
+            column.frombytes(data[offset:offset + v4_count * itemsize])
+            _from_little_endian(column)
+            offset += v4_count * itemsize
+        for column in database.v6[:2]:
+            column.extend(int.from_bytes(data[position:position + 16], 'big')
+                          for position in range(offset, offset + v6_count * 16, 16))
+            offset += v6_count * 16
+        database.v6[2].frombytes(data[offset:offset + v6_count * 2])
+        _from_little_endian(database.v6[2])
+        return database, mtime_ns, size
+
+    @classmethod
+    def open(cls, csv_path, cache_path=None):
+        """加载 CSV：缓存文件与 CSV 的修改时间、大小一致时直接读缓存，否则解析 CSV 并重写缓存"""
+        cache_path = cache_path or csv_path + '.bin'
+        stat = os.stat(csv_path)
+        try:
+            database, mtime_ns, size = cls.load(cache_path)
+            if mtime_ns == stat.st_mtime_ns and size == stat.st_size:
+                return database
+        except (OSError, ValueError):
+            pass
+
+        database = cls.from_csv(csv_path)
+        try:
+            database.save(cache_path, stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            print(f" 无法写入 GeoIP 缓存 {cache_path}: {e}")
+        return database
+
+    # ==================== 查询 ====================
+
+    def lookup_int(self, value, version=4):
+        """整数形式的地址所属国家代码；不在任何段内时返回 None"""
+        starts, ends, codes = self.v4 if version == 4 else self.v6
+        index = bisect_right(starts, value) - 1
+        if index >= 0 and value <= ends[index]:
+            return self.countries[codes[index]]
+        return None
+
+    def lookup(self, ip):
+        """IP 地址字符串所属国家代码；查不到或不是合法IP时返回 None"""
+        parsed = parse_ip(ip)
+        if parsed is None:
+            return None
+        return self.lookup_int(parsed[1], parsed[0])
+
+
+def _little_endian(column):
+    if sys.byteorder == 'little':
+        return column
+    swapped = array(column.typecode, column)
+    swapped.byteswap()
+    return swapped
+
+
+def _from_little_endian(column):
+    if sys.byteorder != 'little':
+        column.byteswap()
+
+
+class CountryResolver:
+    """GeoIpDatabase 前面加一层有界 LRU 缓存，并提供整批告警的富化"""
+
+    def __init__(self, database, cache_size=DEFAULT_CACHE_SIZE):
+        self.database = database
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def country(self, ip):
+        """IP 所属国家代码，查不到时为 UNKNOWN_COUNTRY"""
+        if not isinstance(ip, str):
+            return UNKNOWN_COUNTRY
+        with self.lock:
+            country = self.cache.get(ip)
+            if country is not None:
+                self.cache.move_to_end(ip)
+                self.hits += 1
+                return country
+            self.misses += 1
+
+        country = self.database.lookup(ip) or UNKNOWN_COUNTRY
+        with self.lock:
+            self.cache[ip] = country
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return country
+
+    def countries(self, ips):
+        """批量查询：同一批中重复的IP只查一次"""
+        resolved = {}
+        result = []
+        for ip in ips:
+            if not isinstance(ip, str):
+                result.append(UNKNOWN_COUNTRY)
+                continue
+            country = resolved.get(ip)
+            if country is None:
+                country = resolved[ip] = self.country(ip)
+            result.append(country)
+        return result
+
+    def enrich(self, alerts, field="source_ip", key="source_country"):
+        """给一批告警（字典）原地加上 key 字段，返回告警列表"""
+        alerts = list(alerts)
+        for alert, country in zip(alerts, self.countries(alert.get(field) for alert in alerts)):
+            alert[key] = country
+        return alerts
+
+
+def main(argv=None):
+    """命令行：预先生成缓存文件，或查询若干IP"""
+    parser = argparse.ArgumentParser(description="离线 IP 归属国家查询")
+    parser.add_argument("csv", help="IP段CSV文件")
+    parser.add_argument("--cache", help="二进制缓存文件（默认 CSV 路径加 .bin）")
+    parser.add_argument("ips", nargs="*", help="要查询的IP")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    database = GeoIpDatabase.open(args.csv, args.cache)
+    print(f" 已加载 {len(database)} 个IP段，用时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    resolver = CountryResolver(database)
+    for ip in args.ips:
+        print(f"  {ip}: {resolver.country(ip)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+重点对象（heavy hitter）统计
+功能：用 Space-Saving 算法在固定内存内统计出现次数最多的源IP等对象，
+      误差上界可配置，多个进程/分片的统计结果可以合并
+"""
+
+import heapq
+import math
+
+
+class SpaceSaving:
+    """Space-Saving 计数器
+
+    最多跟踪 capacity 个对象；capacity 由 epsilon 决定时为 ceil(1/epsilon)。
+    对任意对象，估计值 count 满足: 真实次数 <= count <= 真实次数 + error，
+    且 error <= total / capacity（即 epsilon * 总次数）。
+
+    计数相同的对象放在同一个桶里，新对象替换最小计数对象时 O(1) 找到替换目标。
+    """
+
+    def __init__(self, capacity=None, epsilon=None):
+        if capacity is None:
+            if epsilon is None:
+                raise ValueError("必须指定 capacity 或 epsilon")
+            capacity = math.ceil(1 / epsilon)
+        if capacity < 1:
+            raise ValueError("capacity 必须大于0")
+
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}     # 对象 -> 估计次数
+        self.errors = {}     # 对象 -> 最大高估量
+        self._buckets = {}   # 次数 -> {对象: None}（按插入顺序的集合）
+        self._min = 0        # 已满时的最小计数
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __contains__(self, item):
+        return item in self.counts
+
+    def add(self, item, count=1):
+        """记录 item 出现 count 次"""
+        self.total += count
+        counts = self.counts
+
+        old = counts.get(item)
+        if old is not None:
+            self._move(item, old, old + count)
+            return
+
+        if len(counts) < self.capacity:
+            self.errors[item] = 0
+            self._insert(item, count)
+            if len(counts) == 1 or count < self._min:
+                self._min = count
+            return
+
+        # 替换计数最小的对象，新对象继承其计数作为误差
+        floor = self._min
+        bucket = self._buckets[floor]
+        victim = next(iter(bucket))
+        self._remove(victim, floor)
+        del self.counts[victim]
+        del self.errors[victim]
+        self.errors[item] = floor
+        self._insert(item, floor + count)
+        if floor not in self._buckets:
+            self._update_min(floor, count)
+
+    def _insert(self, item, count):
+        self.counts[item] = count
+        bucket = self._buckets.get(count)
+        if bucket is None:
+            bucket = self._buckets[count] = {}
+        bucket[item] = None
+
+    def _remove(self, item, count):
+        bucket = self._buckets[count]
+        del bucket[item]
+        if not bucket:
+            del self._buckets[count]
+
+    def _move(self, item, old, new):
+        self._remove(item, old)
+        self._insert(item, new)
+        if old == self._min and old not in self._buckets:
+            self._update_min(old, new - old)
+
+    def _update_min(self, old_min, step):
+        # 单次计数时最小桶只能变成 old_min + 1，否则重新查找
+        if step == 1 and old_min + 1 in self._buckets:
+            self._min = old_min + 1
+        else:
+            self._min = min(self._buckets) if self._buckets else 0
+
+    def estimate(self, item):
+        """返回 (估计次数, 误差)；未跟踪的对象次数不超过当前最小计数"""
+        if item in self.counts:
+            return self.counts[item], self.errors[item]
+        floor = self._min if len(self.counts) >= self.capacity else 0
+        return floor, floor
+
+    def top(self, k=10):
+        """出现次数最多的 k 个对象，返回 [(对象, 估计次数, 误差), ...]"""
+        errors = self.errors
+        items = heapq.nlargest(k, self.counts.items(), key=lambda entry: entry[1])
+        return [(item, count, errors[item]) for item, count in items]
+
+    def merge(self, other):
+        """合并另一个计数器（如其他进程/分片的结果），原地更新并返回 self
+
+        一方没有跟踪的对象按该方的最小计数补齐（已满时），合并后保留计数最大的 capacity 个，
+        误差上界仍为 total / capacity。
+        """
+        self_floor = self._min if len(self.counts) >= self.capacity else 0
+        other_floor = other._min if len(other.counts) >= other.capacity else 0
+
+        merged = {}
+        for item in list(self.counts) + [item for item in other.counts if item not in self.counts]:
+            count_a, error_a = (self.counts[item], self.errors[item]) if item in self.counts else (self_floor, self_floor)
+            count_b, error_b = (other.counts[item], other.errors[item]) if item in other.counts else (other_floor, other_floor)
+            merged[item] = (count_a + count_b, error_a + error_b)
+
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda entry: entry[1][0])
+
+        self.total += other.total
+        self.counts = {}
+        self.errors = {}
+        self._buckets = {}
+        for item, (count, error) in kept:
+            self.errors[item] = error
+            self._insert(item, count)
+        self._min = min(self._buckets) if self._buckets else 0
+        return self
+
+    def to_dict(self):
+        """导出为可 JSON 序列化的结构（对象需为字符串或数字）"""
+        return {
+            "capacity": self.capacity,
+            "total": self.total,
+            "items": [[item, count, self.errors[item]] for item, count in self.counts.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data["capacity"])
+        summary.total = data["total"]
+        for item, count, error in data["items"]:
+            summary.errors[item] = error
+            summary._insert(item, count)
+        summary._min = min(summary._buckets) if summary._buckets else 0
+        return summary
+
+
+class GroupedSpaceSaving:
+    """按分组（严重程度、目的端口等）统计重点对象
+
+    所有分组共用一个以 (分组, 对象) 为键的 Space-Saving 计数器，
+    内存固定，分组数不受限制；每个估计值的误差不超过 total / capacity。
+    """
+
+    def __init__(self, capacity=None, epsilon=None):
+        self.summary = SpaceSaving(capacity, epsilon)
+
+    def add(self, group, item, count=1):
+        self.summary.add((group, item), count)
+
+    def estimate(self, group, item):
+        return self.summary.estimate((group, item))
+
+    def groups_of(self, item):
+        """item 出现在哪些分组中（仅限被跟踪的条目）"""
+        return [group for group, tracked in self.summary.counts if tracked == item]
+
+    def top(self, group, k=10):
+        """某个分组内次数最多的 k 个对象，返回 [(对象, 估计次数, 误差), ...]"""
+        errors = self.summary.errors
+        entries = [(key, count) for key, count in self.summary.counts.items() if key[0] == group]
+        top = heapq.nlargest(k, entries, key=lambda entry: entry[1])
+        return [(key[1], count, errors[key]) for key, count in top]
+
+    def merge(self, other):
+        self.summary.merge(other.summary)
+        return self
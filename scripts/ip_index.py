@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+IP 地址索引
+功能：IP 地址与整数互转（IPv4 为32位，IPv6 为128位），CIDR 集合的 O(log n) 成员判断
+      （用作白名单/黑名单和子网过滤），以及按整数排序的 IP 列索引，
+      用二分查找回答"某些子网内有哪些行"
+"""
+
+import ipaddress
+from array import array
+from bisect import bisect_left, bisect_right
+
+from alert_model import ipv4_to_int
+
+# 排序索引之外暂存的新行数超过它时排成一个新的有序段，否则查询时逐个检查
+MERGE_THRESHOLD = 8192
+# 前一个有序段不到新段的这么多倍时两段合并，段长按这个倍数递增，段数为 O(log n)
+RUN_RATIO = 4
+
+_ROW_BITS = 32
+_ROW_MASK = (1 << _ROW_BITS) - 1
+
+
+def parse_ip(text):
+    """把 IP 地址字符串转成 (版本, 整数)；不合法时返回 None"""
+    value = ipv4_to_int(text)
+    if value is not None:
+        return 4, value
+    if not isinstance(text, str):
+        return None
+    try:
+        address = ipaddress.ip_address(text)
+    except ValueError:
+        return None
+    return address.version, int(address)
+
+
+class CidrSet:
+    """CIDR 集合：合并成互不重叠的整数区间，按起点二分查找
+
+    用作白名单/黑名单或子网过滤条件，每次判断 O(log n)。
+    """
+
+    def __init__(self, networks=()):
+        ranges = {4: [], 6: []}
+        for network in networks:
+            if not isinstance(network, (ipaddress.IPv4Network, ipaddress.IPv6Network)):
+                network = parse_cidr(network)
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        self.ranges = {version: _merge(items) for version, items in ranges.items()}
+        self._starts = {version: [start for start, _ in items] for version, items in self.ranges.items()}
+        self._ends = {version: [end for _, end in items] for version, items in self.ranges.items()}
+
+    @classmethod
+    def parse(cls, value):
+        """由逗号分隔的 CIDR 字符串（或字符串列表、CidrSet）构造"""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, str):
+            value = value.split(',')
+        networks = [item.strip() for item in value if item.strip()]
+        if not networks:
+            raise ValueError("子网不能为空")
+        return cls(networks)
+
+    def contains_int(self, value, version=4):
+        """整数形式的地址是否在集合内"""
+        index = bisect_right(self._starts[version], value) - 1
+        return index >= 0 and value <= self._ends[version][index]
+
+    def __contains__(self, ip):
+        parsed = parse_ip(ip)
+        return parsed is not None and self.contains_int(parsed[1], parsed[0])
+
+    def __bool__(self):
+        return bool(self.ranges[4] or self.ranges[6])
+
+    def __eq__(self, other):
+        return isinstance(other, CidrSet) and self.ranges == other.ranges
+
+    def __hash__(self):
+        return hash((tuple(self.ranges[4]), tuple(self.ranges[6])))
+
+    def __repr__(self):
+        return f"CidrSet({self.networks()!r})"
+
+    def networks(self):
+        """集合对应的最少 CIDR 列表（字符串）"""
+        result = []
+        for version, address in ((4, ipaddress.IPv4Address), (6, ipaddress.IPv6Address)):
+            for start, end in self.ranges[version]:
+                result.extend(str(network) for network in
+                              ipaddress.summarize_address_range(address(start), address(end)))
+        return result
+
+
+def parse_cidr(text):
+    """解析 CIDR（主机位不为0时按所在网络处理）或单个地址"""
+    try:
+        return ipaddress.ip_network(text.strip(), strict=False)
+    except (AttributeError, ValueError):
+        raise ValueError(f"无效的子网: {text!r}") from None
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class IpRangeIndex:
+    """IP 列（alert_model 中以32位整数存储的 IPv4 列）上的排序索引
+
+    键为 (IP << 32) | 行号 的64位整数，按 IP 排序；子网查询是对各有序段的两次二分查找。
+    新写入的行先暂存，查询时逐个检查，积累到 MERGE_THRESHOLD 行排成一个新的有序段；
+    相邻的段长度相差不到 RUN_RATIO 倍时合并（类似 LSM 的分层合并），
+    每个键平均只被合并 O(log n) 次，不会每次都重建整个数组。
+    不能编码为32位整数的值（IPv6、缺失、非法字符串）在列的溢出表里，查询时逐个检查。
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self.runs = []       # 有序段，从旧到新、从长到短
+        self.indexed = 0
+
+    def refresh(self):
+        """把积累够 MERGE_THRESHOLD 的暂存行排进有序段（写入方可以调用，免得查询时才做）"""
+        data = self.column.data
+        overflow = self.column.overflow
+        if len(data) - self.indexed < MERGE_THRESHOLD:
+            return
+        run = sorted((data[row] << _ROW_BITS) | row for row in range(self.indexed, len(data))
+                     if row not in overflow)
+        runs = self.runs
+        while runs and len(runs[-1]) < len(run) * RUN_RATIO:
+            # 两段拼起来排序，timsort 识别出两个有序段后直接归并
+            run = sorted(runs.pop().tolist() + run)
+        runs.append(array('Q', run))
+        self.indexed = len(data)
+
+    def _ranges(self, cidrs):
+        # (有序段, lo, hi) 三元组：段内 [lo, hi) 的键落在 cidrs 内
+        for keys in self.runs:
+            for start, end in cidrs.ranges[4]:
+                lo = bisect_left(keys, start << _ROW_BITS)
+                hi = bisect_right(keys, (end << _ROW_BITS) | _ROW_MASK, lo)
+                if lo < hi:
+                    yield keys, lo, hi
+
+    def rows(self, cidrs):
+        """返回值在 cidrs 内的全部行号（无序）"""
+        self.refresh()
+        rows = []
+        for keys, lo, hi in self._ranges(cidrs):
+            rows.extend(key & _ROW_MASK for key in keys[lo:hi])
+
+        data = self.column.data
+        overflow = self.column.overflow
+        contains = cidrs.contains_int
+        for row in range(self.indexed, len(data)):
+            if row not in overflow and contains(data[row]):
+                rows.append(row)
+        if overflow:
+            rows.extend(row for row, value in overflow.items() if value in cidrs)
+        return rows
+
+    def count(self, cidrs):
+        """值在 cidrs 内的行数的上界估计（暂存行按全部命中计，不含溢出表），用于选择查询计划"""
+        self.refresh()
+        total = len(self.column.data) - self.indexed
+        for _, lo, hi in self._ranges(cidrs):
+            total += hi - lo
+        return total
+
+    def checker(self, cidrs):
+        """返回 行号 -> 是否在 cidrs 内 的判断函数"""
+        data = self.column.data
+        overflow = self.column.overflow
+        contains = cidrs.contains_int
+
+        def check(row):
+            if overflow and row in overflow:
+                return overflow[row] in cidrs
+            return contains(data[row])
+
+        return check
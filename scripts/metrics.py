@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标
+功能：解析器、输出、推送和 API 各阶段的计时、计数器和固定分桶的延迟直方图，
+      以 Prometheus 文本格式导出（GET /metrics）；另有按需采样调用栈的采样分析器。
+      默认关闭：关闭时计数、计时都直接返回，插桩函数恢复为原函数；
+      设置环境变量 IDS_METRICS=1 或调用 enable() 开启
+"""
+
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter as _FrameCounter
+
+# 阶段耗时直方图的默认桶上界（秒）
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_enabled = False
+_instrumented = []   # [(命名空间, 函数名, 原函数, 阶段)]
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    """开启指标采集，并把已登记的插桩函数换成计时版本"""
+    global _enabled
+    _enabled = True
+    for namespace, name, func, stage_name in _instrumented:
+        namespace[name] = _timed_function(func, stage_name)
+
+
+def disable():
+    """关闭指标采集，插桩函数恢复为原函数（已采集的数值保留）"""
+    global _enabled
+    _enabled = False
+    for namespace, name, func, _ in _instrumented:
+        namespace[name] = func
+
+
+# ==================== 指标类型 ====================
+
+def _format_value(value):
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """指标族：同名、不同标签值的一组时间序列"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, **values):
+        """按标签值取子序列（首次使用时创建）"""
+        key = tuple(str(values[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def samples(self):
+        """[(样本名, 标签文本, 值)]"""
+        result = []
+        for key, child in list(self._children.items()):
+            result.extend(child.samples(self.name, self.labelnames, key))
+        return result
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def samples(self, name, labelnames, key):
+        return [(name, _label_text(labelnames, key), self.value)]
+
+
+class _CounterValue(_Value):
+    __slots__ = ()
+
+    def inc(self, amount=1):
+        if _enabled:
+            with self._lock:
+                self.value += amount
+
+
+class _GaugeValue(_Value):
+    __slots__ = ()
+
+    def set(self, value):
+        if _enabled:
+            self.value = value
+
+    def inc(self, amount=1):
+        if _enabled:
+            with self._lock:
+                self.value += amount
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        if not _enabled:
+            return
+        buckets = self.buckets
+        low, high = 0, len(buckets)
+        while low < high:
+            mid = (low + high) // 2
+            if value <= buckets[mid]:
+                high = mid
+            else:
+                low = mid + 1
+        with self._lock:
+            self.counts[low] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, name, labelnames, key):
+        result = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            result.append((f"{name}_bucket", _label_text(labelnames, key, [("le", _format_value(float(bound)))]),
+                           cumulative))
+        labels = _label_text(labelnames, key)
+        result.append((f"{name}_sum", labels, self.sum))
+        result.append((f"{name}_count", labels, self.count))
+        return result
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值（如队列深度）"""
+
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value):
+        self._default.set(value)
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def dec(self, amount=1):
+        self._default.dec(amount)
+
+
+class Histogram(_Metric):
+    """固定分桶的直方图"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(float(bound) for bound in buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+
+class Registry:
+    """指标登记表，负责生成 Prometheus 文本格式"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"指标重复登记: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, extra=()):
+        """生成 Prometheus 文本格式
+
+        extra 为抓取时才计算的额外指标 [(名称, 类型, 说明, 值)]，如缓存条目数。
+        """
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        for name, kind, documentation, value in extra:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ==================== 全局指标 ====================
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "ids_stage_duration_seconds", "各处理阶段每次调用的耗时（秒）", ["stage"])
+RECORDS_PARSED = REGISTRY.counter(
+    "ids_records_parsed_total", "批量/流式解析产出的告警条数")
+TIMESTAMP_FALLBACKS = REGISTRY.counter(
+    "ids_timestamp_fallbacks_total", "时间戳无法转换、原样保留的条数")
+BYTES_READ = REGISTRY.counter(
+    "ids_bytes_read_total", "解析和跟踪读入的日志大小（文本路径按字符计）", ["source"])
+BYTES_WRITTEN = REGISTRY.counter(
+    "ids_bytes_written_total", "输出文件写入的字节数")
+QUEUE_DEPTH = REGISTRY.gauge(
+    "ids_queue_depth", "队列深度", ["queue"])
+HTTP_REQUESTS = REGISTRY.counter(
+    "ids_http_requests_total", "API 请求数", ["endpoint", "status"])
+HTTP_SECONDS = REGISTRY.histogram(
+    "ids_http_request_duration_seconds", "API 请求处理耗时（秒）", ["endpoint"])
+
+
+# ==================== 阶段计时 ====================
+
+class _StageTimer:
+    __slots__ = ("child", "start")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def stage(name):
+    """阶段计时上下文：with stage("parse"): ...；关闭时返回空操作的共享对象"""
+    if not _enabled:
+        return _NULL_TIMER
+    return _StageTimer(STAGE_SECONDS.labels(stage=name))
+
+
+def _timed_function(func, stage_name):
+    child = STAGE_SECONDS.labels(stage=stage_name)
+    clock = time.perf_counter
+
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            child.observe(clock() - start)
+
+    timed.__wrapped__ = func
+    timed.__name__ = func.__name__
+    timed.__doc__ = func.__doc__
+    return timed
+
+
+def timed(func, stage_name):
+    """开启时返回逐次计时的包装函数，关闭时原样返回 func（在取用函数的地方调用一次）"""
+    return _timed_function(func, stage_name) if _enabled else func
+
+
+def instrument(namespace, name, stage_name):
+    """登记一个模块级函数：开启指标时 namespace[name] 换成计时版本，关闭时换回
+
+    用于单条记录级别的热点函数，关闭时没有任何额外开销。
+    """
+    func = namespace[name]
+    _instrumented.append((namespace, name, func, stage_name))
+    if _enabled:
+        namespace[name] = _timed_function(func, stage_name)
+
+
+# ==================== 调用栈采样 ====================
+
+class StackSampler:
+    """采样分析器：后台线程定时抓取其他线程的调用栈，按“折叠栈”计数
+
+    输出格式与 flamegraph.pl / speedscope 的 collapsed 格式相同：每行 "根;...;叶 次数"。
+    """
+
+    def __init__(self, interval=0.005, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.counts = _FrameCounter()
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def sample_once(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample_once()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def folded(self, limit=None):
+        """折叠栈文本，按次数从多到少"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common(limit))
+
+
+def sample_stacks(seconds=1.0, interval=0.005):
+    """在调用线程中阻塞采样 seconds 秒，返回折叠栈文本"""
+    sampler = StackSampler(interval).start()
+    time.sleep(seconds)
+    sampler.stop()
+    return sampler.folded()
+
+
+def dump_stacks_on_signal(signum=None, path=None, seconds=5.0, interval=0.005):
+    """收到信号（默认 SIGUSR1）后采样 seconds 秒，把折叠栈写到 path（默认临时目录下 ids-stacks-<pid>.txt）
+
+    平台没有该信号时（如 Windows 上的 SIGUSR1）不注册，返回 None
+    """
+    if signum is None:
+        signum = getattr(signal, "SIGUSR1", None)
+        if signum is None:
+            return None
+    path = path or os.path.join(tempfile.gettempdir(), f"ids-stacks-{os.getpid()}.txt")
+
+    def dump():
+        text = sample_stacks(seconds, interval)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def handler(signum, frame):
+        threading.Thread(target=dump, name="stack-dump", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return path
+
+
+if os.environ.get("IDS_METRICS", "").lower() in ("1", "true", "yes", "on"):
+    enable()
@@ -7,8 +7,170 @@ Snort日志解析器
 
 import re
 import json
+import mmap
 import os
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import metrics
+from alert_sinks import open_sink
+from snort_timestamp import SnortTimestampDecoder, shared_decoder
+
+# ==================== 预编译正则 ====================
+# 规则头 [**] [GID:SID:REV] Description [**]
+HEADER_RE = re.compile(r'\[\*\*\] \[(\d+):(\d+):(\d+)\] (.+) \[\*\*\]')
+# 分类和优先级 [Classification: ...] [Priority: ...]
+CLASSIFICATION_RE = re.compile(r'\[Classification: (.+?)\]')
+PRIORITY_RE = re.compile(r'\[Priority: (\d+)\]')
+# 网络流信息: timestamp src_ip:src_port -> dst_ip:dst_port
+FLOW_RE = re.compile(
+    r'(\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)\s+'
+    r'(\d+\.\d+\.\d+\.\d+):(\d+)\s+->\s+'
+    r'(\d+\.\d+\.\d+\.\d+):(\d+)'
+)
+# 协议（行首匹配）
+PROTOCOL_RE = re.compile(r'(TCP|UDP|ICMP|HTTP|HTTPS|FTP|SSH|DNS)')
+
+# 单次匹配整条标准格式日志的锚定多行正则（快速路径）
+# 各字段的写法保证：只要它能匹配，结果就与逐行解析完全一致；
+# 不能匹配的非标准条目回退到逐行解析。
+ALERT_RE = re.compile(
+    r'\[\*\*\] \[(\d+):(\d+):(\d+)\] (.+) \[\*\*\][^\n]*\n'
+    r'\[Classification: ([^\[\]\n]+)\] \[Priority: (\d+)\][^\n]*\n'
+    r'(\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)[^\S\n]+'
+    r'(\d+\.\d+\.\d+\.\d+):(\d+)[^\S\n]+->[^\S\n]+'
+    r'(\d+\.\d+\.\d+\.\d+):(\d+)[^\n]*'
+    r'(?:\n(TCP|UDP|ICMP|HTTP|HTTPS|FTP|SSH|DNS))?'
+)
+
+# 字节版本的快速路径正则，直接在内存映射的文件上匹配；
+# 目的端口后不允许紧跟数字或非ASCII字节（文本版的 \d 会把Unicode数字也吃进去）
+ALERT_BYTES_RE = re.compile(
+    rb'\[\*\*\] \[(\d+:\d+:\d+)\] (.+) \[\*\*\][^\n]*\n'
+    rb'\[Classification: ([^\[\]\n]+)\] \[Priority: (\d+)\][^\n]*\n'
+    rb'(\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)[^\S\n]+'
+    rb'(\d+\.\d+\.\d+\.\d+):(\d+)[^\S\n]+->[^\S\n]+'
+    rb'(\d+\.\d+\.\d+\.\d+):(\d+)(?![0-9\x80-\xff])[^\n]*'
+    rb'(?:\n(TCP|UDP|ICMP|HTTP|HTTPS|FTP|SSH|DNS))?'
+)
+# 记录分隔符（空行，LF 或 CRLF）和条目开头的空白
+RECORD_SEPARATOR_RE = re.compile(rb'\n\r?\n')
+LEADING_SPACE_RE = re.compile(rb'[ \t\n\r\x0b\x0c]*')
+
+# 优先级映射到严重程度
+SEVERITY_MAP = {1: "CRITICAL", 2: "HIGH", 3: "MEDIUM", 4: "LOW"}
+
+# 流式读取的分块大小（字符数）和进度输出间隔
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 10000
+
+# 并行解析时每个任务处理的字节数；小于一个范围的文件直接顺序解析
+DEFAULT_RANGE_SIZE = 8 * 1024 * 1024
+
+# 流式解析时每批解析的条目数（解析阶段按批计时）
+PARSE_BATCH = 1024
+
+_TEXT_BYTES_READ = metrics.BYTES_READ.labels(source="text")
+_MMAP_BYTES_READ = metrics.BYTES_READ.labels(source="mmap")
+_IN_FLIGHT_DEPTH = metrics.QUEUE_DEPTH.labels(queue="parse_in_flight")
+
+
+def _convert_timestamp(timestamp_str, decoder):
+    """转换时间格式 MM/DD-HH:MM:SS.ffffff -> YYYY-MM-DD HH:MM:SS（年份由 decoder 推断），无法转换时原样返回"""
+    display = decoder.convert(timestamp_str)
+    if display is None:
+        metrics.TIMESTAMP_FALLBACKS.inc()
+        return timestamp_str
+    return display
+
+
+# 逐条调用的热点函数：开启指标时换成计时版本，关闭时没有额外开销
+metrics.instrument(globals(), "_convert_timestamp", "timestamp")
+
+
+def _parse_entry(text, decoder):
+    """解析一条已去除首尾空白的日志条目"""
+    match = ALERT_RE.match(text)
+    if match is None:
+        return _parse_entry_lines(text, decoder)
+
+    (gid, sid, rev, description, classification, priority,
+     timestamp_str, src_ip, src_port, dst_ip, dst_port, protocol) = match.groups()
+
+    return {
+        "id": 0,
+        "timestamp": _convert_timestamp(timestamp_str, decoder),
+        "source_ip": src_ip,
+        "source_port": int(src_port),
+        "destination_ip": dst_ip,
+        "destination_port": int(dst_port),
+        "protocol": protocol or "TCP",
+        "alert_type": description,
+        "classification": classification,
+        "severity": SEVERITY_MAP.get(int(priority), "MEDIUM"),
+        "rule_id": f"{gid}:{sid}:{rev}",
+        "raw_summary": description[:100]  # 截取前100字符
+    }
+
+
+def _parse_entry_lines(text, decoder):
+    """逐行解析非标准格式的日志条目（慢速路径）"""
+    result = {
+        "id": 0,
+        "timestamp": "",
+        "source_ip": "0.0.0.0",
+        "source_port": 0,
+        "destination_ip": "0.0.0.0",
+        "destination_port": 0,
+        "protocol": "TCP",
+        "alert_type": "Unknown Alert",
+        "classification": "Unknown",
+        "severity": "MEDIUM",
+        "rule_id": "0:0:0",
+        "raw_summary": ""
+    }
+
+    lines = text.split('\n')
+
+    # 解析规则头
+    header_match = HEADER_RE.search(lines[0])
+    if header_match:
+        result["rule_id"] = f"{header_match.group(1)}:{header_match.group(2)}:{header_match.group(3)}"
+        result["alert_type"] = header_match.group(4)
+        result["raw_summary"] = header_match.group(4)[:100]  # 截取前100字符
+
+    # 解析分类和优先级
+    if len(lines) > 1:
+        class_match = CLASSIFICATION_RE.search(lines[1])
+        priority_match = PRIORITY_RE.search(lines[1])
+
+        if class_match:
+            result["classification"] = class_match.group(1)
+
+        if priority_match:
+            result["severity"] = SEVERITY_MAP.get(int(priority_match.group(1)), "MEDIUM")
+
+    # 解析网络流信息
+    if len(lines) > 2:
+        flow_match = FLOW_RE.search(lines[2])
+
+        if flow_match:
+            result["timestamp"] = _convert_timestamp(flow_match.group(1), decoder)
+            result["source_ip"] = flow_match.group(2)
+            result["source_port"] = int(flow_match.group(3))
+            result["destination_ip"] = flow_match.group(4)
+            result["destination_port"] = int(flow_match.group(5))
+
+    # 解析协议（可能在第三或第四行）
+    for i in range(2, min(4, len(lines))):
+        protocol_match = PROTOCOL_RE.match(lines[i])
+        if protocol_match:
+            result["protocol"] = protocol_match.group(1)
+            break
+
+    return result
+
 
 class SnortLogParser:
     """Snort日志解析器类"""
@@ -16,149 +178,362 @@ class SnortLogParser:
     @staticmethod
     def parse_line(log_text):
         """解析单条Snort日志条目"""
-        if not log_text.strip():
+        text = log_text.strip()
+        if not text:
             return None
         
-        result = {
-            "id": 0,
-            "timestamp": "",
-            "source_ip": "0.0.0.0",
-            "source_port": 0,
-            "destination_ip": "0.0.0.0",
-            "destination_port": 0,
-            "protocol": "TCP",
-            "alert_type": "Unknown Alert",
-            "classification": "Unknown",
-            "severity": "MEDIUM",
-            "rule_id": "0:0:0",
-            "raw_summary": ""
-        }
-        
-        lines = log_text.strip().split('\n')
-        
-        # 解析规则头 [**] [GID:SID:REV] Description [**]
-        if len(lines) > 0:
-            header_match = re.search(r'\[\*\*\] \[(\d+):(\d+):(\d+)\] (.+) \[\*\*\]', lines[0])
-            if header_match:
-                result["rule_id"] = f"{header_match.group(1)}:{header_match.group(2)}:{header_match.group(3)}"
-                result["alert_type"] = header_match.group(4)
-                result["raw_summary"] = header_match.group(4)[:100]  # 截取前100字符
-        
-        # 解析分类和优先级 [Classification: ...] [Priority: ...]
-        if len(lines) > 1:
-            class_match = re.search(r'\[Classification: (.+?)\]', lines[1])
-            priority_match = re.search(r'\[Priority: (\d+)\]', lines[1])
+        return _parse_entry(text, shared_decoder())
+    
+    @staticmethod
+    def parse_many(entries):
+        """批量解析日志条目
+
+        结果与逐条调用 parse_line 一一对应（空条目为 None），
+        但年份只取一次，并直接走预编译的单次匹配快速路径。
+        """
+        decoder = shared_decoder()
+        results = []
+        
+        with metrics.stage("parse"):
+            for entry in entries:
+                text = entry.strip()
+                results.append(_parse_entry(text, decoder) if text else None)
+        
+        metrics.RECORDS_PARSED.inc(len(results) - results.count(None))
+        return results
+    
+    @staticmethod
+    def iter_alerts(input_path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """流式解析日志文件，逐条产出带 id 的解析结果
+
+        按固定大小分块读取，不会把整个文件读入内存；
+        id 编号与一次性读取整个文件时完全相同。
+        """
+        decoder = shared_decoder()
+        next_id = 1
+        
+        with open(input_path, 'r', encoding='utf-8') as f:
+            entries = iter_log_entries(f, chunk_size)
+            while True:
+                batch = list(islice(entries, PARSE_BATCH))
+                if not batch:
+                    break
+                
+                with metrics.stage("parse"):
+                    alerts = [_parse_entry(entry, decoder) for entry in batch]
+                metrics.RECORDS_PARSED.inc(len(alerts))
+                
+                for parsed in alerts:
+                    parsed["id"] = next_id
+                    next_id += 1
+                    yield parsed
+    
+    @staticmethod
+    def iter_alerts_mmap(input_path):
+        """基于内存映射的零拷贝解析，逐条产出带 id 的解析结果
+
+        不把文件解码成字符串，直接在映射的字节上查找记录边界和匹配字段；
+        结果与 iter_alerts 完全相同。
+        """
+        if os.path.getsize(input_path) == 0:
+            return
+        
+        decoder = shared_decoder()
+        next_id = 0
+        with open(input_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            _MMAP_BYTES_READ.inc(len(mm))
+            try:
+                for next_id, alert in enumerate(iter_mmap_alerts(mm, 0, len(mm), decoder), 1):
+                    alert["id"] = next_id
+                    yield alert
+            finally:
+                metrics.RECORDS_PARSED.inc(next_id)
+    
+    @staticmethod
+    def iter_alerts_parallel(input_path, workers=None, range_size=DEFAULT_RANGE_SIZE):
+        """多进程并行解析日志文件，按文件顺序逐条产出带 id 的解析结果
+
+        文件被切成对齐到记录边界的字节范围，交给进程池解析后按顺序合并，
+        id 编号与顺序解析完全相同。workers 为进程数（默认CPU核数）。
+        """
+        ranges = plan_byte_ranges(input_path, range_size)
+        workers = workers or os.cpu_count() or 1
+        
+        if workers <= 1 or len(ranges) <= 1:
+            yield from SnortLogParser.iter_alerts(input_path)
+            return
+        
+        reference = shared_decoder().reference
+        next_id = 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 同时在途的任务数有上限，避免结果堆积在内存里
+            in_flight = deque()
+            pending_ranges = iter(ranges)
             
-            if class_match:
-                result["classification"] = class_match.group(1)
+            def submit_next():
+                byte_range = next(pending_ranges, None)
+                if byte_range is not None:
+                    in_flight.append(executor.submit(_parse_byte_range, input_path, *byte_range, reference))
+                    _MMAP_BYTES_READ.inc(byte_range[1] - byte_range[0])
+                _IN_FLIGHT_DEPTH.set(len(in_flight))
             
-            if priority_match:
-                priority = int(priority_match.group(1))
-                # 优先级映射到严重程度
-                severity_map = {1: "CRITICAL", 2: "HIGH", 3: "MEDIUM", 4: "LOW"}
-                result["severity"] = severity_map.get(priority, "MEDIUM")
-        
-        # 解析网络流信息: timestamp src_ip:src_port -> dst_ip:dst_port
-        if len(lines) > 2:
-            flow_match = re.search(
-                r'(\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d+)\s+' +
-                r'(\d+\.\d+\.\d+\.\d+):(\d+)\s+->\s+' +
-                r'(\d+\.\d+\.\d+\.\d+):(\d+)',
-                lines[2]
-            )
+            for _ in range(workers * 2):
+                submit_next()
             
-            if flow_match:
-                # 转换时间格式
-                timestamp_str = flow_match.group(1)
-                current_year = datetime.now().year
-                try:
-                    dt = datetime.strptime(f"{current_year}-{timestamp_str}", "%Y-%m/%d-%H:%M:%S.%f")
-                    result["timestamp"] = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    result["timestamp"] = timestamp_str
+            while in_flight:
+                alerts = in_flight.popleft().result()
+                metrics.RECORDS_PARSED.inc(len(alerts))
+                submit_next()
                 
-                result["source_ip"] = flow_match.group(2)
-                result["source_port"] = int(flow_match.group(3))
-                result["destination_ip"] = flow_match.group(4)
-                result["destination_port"] = int(flow_match.group(5))
-        
-        # 解析协议（可能在第三或第四行）
-        for i in range(2, min(4, len(lines))):
-            protocol_match = re.search(r'^(TCP|UDP|ICMP|HTTP|HTTPS|FTP|SSH|DNS)', lines[i])
-            if protocol_match:
-                result["protocol"] = protocol_match.group(1)
-                break
-        
-        return result
+                for alert in alerts:
+                    alert["id"] = next_id
+                    next_id += 1
+                    yield alert
     
     @staticmethod
-    def parse_file(input_path, output_path):
-        """批量解析日志文件"""
+    def stream_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, on_alert=None, workers=1,
+                    output_format=None, event_filter=None, correlator=None):
+        """流式解析日志文件并增量写出JSON，返回成功解析的条数
+
+        内存占用与输入文件大小无关；on_alert 会对每条解析结果调用一次。
+        workers 大于 1（或为 None，表示CPU核数）时使用多进程并行解析。
+        output_format 为 "json"（紧凑JSON数组）或 "ndjson"，不指定时按输出文件扩展名判断；
+        结果先写临时文件，完成后原子替换输出文件。
+        correlator 为 correlation.CorrelationEngine 时，检测到的端口扫描/DDoS 合成告警随原告警一起输出；
+        event_filter 为 event_filter.EventFilter 时，重复告警先合并再输出（返回的是输出条数）。
+        """
         print(f" 开始解析文件: {input_path}")
         
         if not os.path.exists(input_path):
             print(f" 错误: 文件不存在 - {input_path}")
-            return []
+            return 0
+        
+        severity_count = {}
+        alert_type_count = {}
+        
+        def counted(alerts):
+            for i, log in enumerate(alerts, 1):
+                sev = log.get("severity", "UNKNOWN")
+                alert = log.get("alert_type", "UNKNOWN")
+                
+                severity_count[sev] = severity_count.get(sev, 0) + 1
+                alert_type_count[alert] = alert_type_count.get(alert, 0) + 1
+                
+                if on_alert is not None:
+                    on_alert(log)
+                
+                # 显示进度
+                if i % PROGRESS_INTERVAL == 0:
+                    print(f"  已解析 {i} 条...")
+                
+                yield log
         
         try:
-            with open(input_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            sink = open_sink(output_path, output_format)
+            if workers == 1:
+                alerts = SnortLogParser.iter_alerts(input_path, chunk_size)
+            else:
+                alerts = SnortLogParser.iter_alerts_parallel(input_path, workers)
+            if correlator is not None:
+                alerts = correlator.correlate(alerts)
+            if event_filter is not None:
+                alerts = event_filter.filter(alerts)
+            total = sink.write(counted(alerts))
         except Exception as e:
-            print(f" 读取文件失败: {e}")
-            return []
+            print(f" 解析或保存文件失败: {e}")
+            return sum(severity_count.values())
         
-        # 按空行分割日志条目
-        log_entries = [entry.strip() for entry in content.strip().split('\n\n') if entry.strip()]
-        parsed_logs = []
-        
-        print(f" 找到 {len(log_entries)} 条日志条目")
+        print(f" 成功解析 {total} 条日志")
+        print(f" 结果已保存到: {output_path}")
         
-        for i, entry in enumerate(log_entries):
-            parsed = SnortLogParser.parse_line(entry)
-            if parsed:
-                parsed["id"] = i + 1
-                parsed_logs.append(parsed)
+        # 显示统计信息
+        if total:
+            print("\n 统计信息:")
+            print("  严重程度分布:")
+            for sev, count in severity_count.items():
+                print(f"    {sev}: {count} 条")
             
-            # 显示进度
-            if (i + 1) % 10 == 0:
-                print(f"  已解析 {i + 1}/{len(log_entries)} 条...")
+            print("\n  攻击类型分布 (前5):")
+            sorted_alerts = sorted(alert_type_count.items(), key=lambda x: x[1], reverse=True)
+            for alert, count in sorted_alerts[:5]:
+                print(f"    {alert}: {count} 条")
         
-        print(f" 成功解析 {len(parsed_logs)} 条日志")
+        return total
+    
+    @staticmethod
+    def parse_file(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, output_format=None):
+        """批量解析日志文件，返回解析结果列表
+
+        基于 stream_file 实现；只需要写出文件时直接用 stream_file，
+        避免在内存中保留全部结果。
+        """
+        parsed_logs = []
+        SnortLogParser.stream_file(input_path, output_path, chunk_size,
+                                   on_alert=parsed_logs.append, workers=workers,
+                                   output_format=output_format)
+        return parsed_logs
+
+
+def iter_log_entries(f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """从文本文件对象分块读取，按空行切分并产出去除首尾空白的日志条目
+
+    跨越两个分块的条目会暂存到下一个空行出现为止。
+    """
+    pending = ''
+    
+    while True:
+        with metrics.stage("read"):
+            chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        _TEXT_BYTES_READ.inc(len(chunk))
         
-        # 保存结果
-        try:
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(parsed_logs, f, indent=2, ensure_ascii=False)
-            
-            print(f" 结果已保存到: {output_path}")
-            
-            # 显示统计信息
-            if parsed_logs:
-                severity_count = {}
-                alert_type_count = {}
-                
-                for log in parsed_logs:
-                    sev = log.get("severity", "UNKNOWN")
-                    alert = log.get("alert_type", "UNKNOWN")
-                    
-                    severity_count[sev] = severity_count.get(sev, 0) + 1
-                    alert_type_count[alert] = alert_type_count.get(alert, 0) + 1
-                
-                print("\n 统计信息:")
-                print("  严重程度分布:")
-                for sev, count in severity_count.items():
-                    print(f"    {sev}: {count} 条")
-                
-                print("\n  攻击类型分布 (前5):")
-                sorted_alerts = sorted(alert_type_count.items(), key=lambda x: x[1], reverse=True)
-                for alert, count in sorted_alerts[:5]:
-                    print(f"    {alert}: {count} 条")
-            
-        except Exception as e:
-            print(f" 保存文件失败: {e}")
+        # 只在新读入的部分查找空行（前一块末尾可能是半个 "\n\n"）
+        search_from = max(0, len(pending) - 1)
+        pending += chunk
+        cut = pending.rfind('\n\n', search_from)
+        if cut < 0:
+            continue
         
-        return parsed_logs
+        for entry in pending[:cut].split('\n\n'):
+            entry = entry.strip()
+            if entry:
+                yield entry
+        pending = pending[cut + 2:]
+    
+    for entry in pending.split('\n\n'):
+        entry = entry.strip()
+        if entry:
+            yield entry
+
+
+def find_last_record_end(buf, start=0):
+    """在字节串中查找最后一个空行分隔符，返回其后的位置；没有完整记录时返回 -1
+
+    LF 和 CRLF 两种换行的空行都能识别；start 之前的部分不再查找。
+    """
+    lf = buf.rfind(b'\n\n', start)
+    crlf = buf.rfind(b'\n\r\n', start)
+    if lf < 0 and crlf < 0:
+        return -1
+    return max(lf + 2, crlf + 3)
+
+
+def split_log_entries(text):
+    """把一段包含完整记录的文本按空行切分，返回去除首尾空白的非空条目"""
+    if '\r' in text:
+        # 与文本模式读取时的通用换行符处理保持一致
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return [entry.strip() for entry in text.split('\n\n') if entry.strip()]
+
+
+def find_next_record_start(buf, pos, end=None):
+    """在 buf（bytes 或 mmap）中从 pos 起查找下一个空行分隔符，返回其后的位置；找不到返回 -1"""
+    separator = RECORD_SEPARATOR_RE.search(buf, pos, len(buf) if end is None else end)
+    return separator.end() if separator else -1
+
+
+def plan_byte_ranges(input_path, range_size=DEFAULT_RANGE_SIZE):
+    """把文件切成若干 [start, end) 字节范围，每个范围的边界都对齐到记录分隔符"""
+    file_size = os.path.getsize(input_path)
+    ranges = []
+    start = 0
+    if file_size == 0:
+        return ranges
+    
+    with open(input_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        while start < file_size:
+            end = start + range_size
+            if end < file_size:
+                # 从 end 前两个字节开始找，避免分隔符正好跨在 end 上
+                end = find_next_record_start(mm, max(start, end - 2))
+            if end < 0 or end >= file_size:
+                end = file_size
+            ranges.append((start, end))
+            start = end
+    
+    return ranges
+
+
+def iter_mmap_alerts(mm, start, end, decoder):
+    """解析内存映射文件 mm[start:end] 中的记录，逐条产出解析结果（不编号）
+
+    标准格式条目直接在映射的字节上匹配，只解码实际输出的字段；
+    其余条目解码后交给文本解析路径，结果与 parse_line 完全一致。
+    """
+    if mm.find(b'\r', start, end) >= 0:
+        # 含CR的内容需要通用换行符处理，整体走文本路径
+        for entry in split_log_entries(mm[start:end].decode('utf-8')):
+            yield _parse_entry(entry, decoder)
+        return
+    
+    # 没有CR时分隔符只可能是 "\n\n"，直接用 find 查找
+    pos = start
+    while pos < end:
+        record_end = mm.find(b'\n\n', pos, end)
+        if record_end < 0:
+            record_end = next_pos = end
+        else:
+            next_pos = record_end + 2
+        
+        first = pos if mm[pos] == 0x5b else LEADING_SPACE_RE.match(mm, pos, record_end).end()
+        if first < record_end:
+            match = ALERT_BYTES_RE.match(mm, first, record_end)
+            if match is not None:
+                yield _alert_from_bytes(match, decoder)
+            else:
+                text = mm[first:record_end].decode('utf-8').strip()
+                if text:
+                    yield _parse_entry(text, decoder)
+        
+        pos = next_pos
+
+
+# 告警描述、分类等重复度很高的字段的解码缓存（同时让相同字符串共享一个对象）
+_TEXT_CACHE = {}
+_TEXT_CACHE_LIMIT = 65536
+
+
+def _decode_text(raw):
+    text = _TEXT_CACHE.get(raw)
+    if text is None:
+        if len(_TEXT_CACHE) >= _TEXT_CACHE_LIMIT:
+            _TEXT_CACHE.clear()
+        text = _TEXT_CACHE[raw] = raw.decode('utf-8')
+    return text
+
+
+def _alert_from_bytes(match, decoder):
+    """由字节快速路径的匹配结果构造解析结果，只解码实际输出的字段"""
+    (rule_id, description, classification, priority,
+     timestamp_str, src_ip, src_port, dst_ip, dst_port, protocol) = match.groups()
+    description = _decode_text(description)
+    
+    return {
+        "id": 0,
+        "timestamp": _convert_timestamp(timestamp_str.decode('ascii'), decoder),
+        "source_ip": src_ip.decode('ascii'),
+        "source_port": int(src_port),
+        "destination_ip": dst_ip.decode('ascii'),
+        "destination_port": int(dst_port),
+        "protocol": _decode_text(protocol) if protocol else "TCP",
+        "alert_type": description,
+        "classification": _decode_text(classification),
+        "severity": SEVERITY_MAP.get(int(priority), "MEDIUM"),
+        "rule_id": _decode_text(rule_id),
+        "raw_summary": description[:100]  # 截取前100字符
+    }
+
+
+def _parse_byte_range(input_path, start, end, reference):
+    """进程池任务：解析文件 [start, end) 字节范围内的全部记录（不编号）
+
+    reference 为主进程的年份推断参考时间，保证各进程推断出的年份一致。
+    """
+    decoder = SnortTimestampDecoder(reference)
+    with open(input_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return list(iter_mmap_alerts(mm, start, end, decoder))
+
 
 def main():
     """主函数 - 测试和演示"""
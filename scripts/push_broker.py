@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时告警推送
+功能：基于 asyncio 把新告警推送给大量订阅者（前端实时面板）：
+      告警按时间/条数窗口合并成批，每个过滤条件只序列化一次；
+      每个订阅者有独立的有界队列，慢客户端溢出时丢弃最旧的批次或合并成摘要，
+      不影响其他订阅者。附带一个最小的 SSE（text/event-stream）服务端，
+      可在后台线程运行，由日志跟踪线程用 publish_threadsafe 推送真实告警
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from alert_sinks import get_encoder
+
+# 严重程度从低到高
+SEVERITY_LEVELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+SEVERITY_RANK = {sev: rank for rank, sev in enumerate(SEVERITY_LEVELS)}
+
+DEFAULT_BATCH_INTERVAL = 0.2   # 秒
+DEFAULT_MAX_BATCH = 200
+DEFAULT_QUEUE_SIZE = 32        # 每个订阅者最多缓存的批次数
+
+DROP_OLDEST = "drop_oldest"
+SUMMARIZE = "summarize"
+
+_BATCH_DEPTH = metrics.QUEUE_DEPTH.labels(queue="push_batch")
+_SUBSCRIBER_DEPTH = metrics.QUEUE_DEPTH.labels(queue="push_subscriber_max")
+
+
+def to_realtime(alert):
+    """parse_line 格式的告警 -> 实时推送格式（与 generate_realtime_alert 的字段相同）"""
+    alert_type = alert.get("alert_type", "Unknown Alert")
+    return {
+        "id": alert.get("id"),
+        "timestamp": alert.get("timestamp"),
+        "source_ip": alert.get("source_ip"),
+        "alert_type": alert_type,
+        "severity": alert.get("severity"),
+        "destination_port": alert.get("destination_port"),
+        "message": f"检测到{alert_type}攻击",
+        "is_realtime": True
+    }
+
+
+class Subscriber:
+    """一个推送订阅者
+
+    min_severity: 只接收不低于该严重程度的告警（None 表示全部）
+    overflow: 队列满时的处理方式，DROP_OLDEST 丢弃最旧的批次，
+              SUMMARIZE 把被挤出的批次合并成一条摘要，在下一次读取时先发送
+    """
+
+    def __init__(self, broker, min_severity=None, queue_size=DEFAULT_QUEUE_SIZE, overflow=SUMMARIZE):
+        if min_severity is not None and min_severity not in SEVERITY_RANK:
+            raise ValueError(f"未知的严重程度: {min_severity}")
+        if overflow not in (DROP_OLDEST, SUMMARIZE):
+            raise ValueError(f"未知的溢出策略: {overflow}")
+
+        self.broker = broker
+        self.level = SEVERITY_RANK[min_severity] if min_severity else 0
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.frames = deque()    # (帧字节, 该批各严重程度的条数)
+        self.dropped = 0         # 被丢弃的告警条数
+        self._summary = None     # 尚未发送的溢出摘要 {严重程度: 条数}
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def put(self, frame, counts):
+        """由 broker 调用，不会阻塞"""
+        if len(self.frames) >= self.queue_size:
+            _, old_counts = self.frames.popleft()
+            self.dropped += sum(old_counts.values())
+            if self.overflow == SUMMARIZE:
+                if self._summary is None:
+                    self._summary = dict.fromkeys(SEVERITY_LEVELS, 0)
+                for sev, count in old_counts.items():
+                    self._summary[sev] = self._summary.get(sev, 0) + count
+        self.frames.append((frame, counts))
+        self._ready.set()
+
+    async def get(self):
+        """等待并返回下一帧（JSON字节）；订阅关闭后返回 None"""
+        while not self.frames and self._summary is None:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+
+        if self._summary is not None:
+            summary, self._summary = self._summary, None
+            return self.broker.encode({
+                "type": "summary",
+                "dropped": sum(summary.values()),
+                "by_severity": summary
+            })
+        return self.frames.popleft()[0]
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+        self.broker.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        frame = await self.get()
+        if frame is None:
+            raise StopAsyncIteration
+        return frame
+
+
+class PushBroker:
+    """实时告警推送中心
+
+    publish() 把告警放进当前批次；批次在 batch_interval 秒后或攒满 max_batch 条时发出。
+    发出时按订阅者的严重程度门槛分组，每组过滤、序列化一次，得到的同一份字节放进组内所有订阅者的队列。
+    所有方法都需在事件循环所在线程调用；其他线程用 publish_threadsafe。
+    """
+
+    def __init__(self, batch_interval=DEFAULT_BATCH_INTERVAL, max_batch=DEFAULT_MAX_BATCH,
+                 queue_size=DEFAULT_QUEUE_SIZE, encoder="auto"):
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.queue_size = queue_size
+        self.encode = get_encoder(encoder)
+        # 严重程度门槛 -> 订阅者集合
+        self.groups = {rank: set() for rank in range(len(SEVERITY_LEVELS))}
+        self._pending = []
+        self._timer = None
+        self._loop = None
+        self.batches_sent = 0
+
+    # ==================== 订阅 ====================
+
+    def subscribe(self, min_severity=None, overflow=SUMMARIZE, queue_size=None):
+        subscriber = Subscriber(self, min_severity, queue_size or self.queue_size, overflow)
+        self.groups[subscriber.level].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.groups[subscriber.level].discard(subscriber)
+
+    @property
+    def subscriber_count(self):
+        return sum(len(group) for group in self.groups.values())
+
+    # ==================== 发布 ====================
+
+    def publish(self, alert):
+        """发布一条 parse_line 格式的告警"""
+        self._pending.append(alert)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._loop = self._loop or asyncio.get_running_loop()
+            self._timer = self._loop.call_later(self.batch_interval, self.flush)
+
+    def publish_many(self, alerts):
+        for alert in alerts:
+            self.publish(alert)
+
+    def publish_threadsafe(self, loop, alerts):
+        """从其他线程（如日志跟踪线程）发布一批告警"""
+        loop.call_soon_threadsafe(self.publish_many, list(alerts))
+
+    def flush(self):
+        """立即发出当前批次"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        _BATCH_DEPTH.set(len(batch))
+
+        with metrics.stage("push"):
+            # 每条告警只转换一次；未知的严重程度按 LOW 处理
+            ranked = [(SEVERITY_RANK.get(alert.get("severity"), 0), to_realtime(alert)) for alert in batch]
+
+            sent_at = time.time()
+            for level, subscribers in self.groups.items():
+                if not subscribers:
+                    continue
+                alerts = [alert for rank, alert in ranked if rank >= level]
+                if not alerts:
+                    continue
+                counts = {}
+                for rank, _ in ranked:
+                    if rank >= level:
+                        counts[SEVERITY_LEVELS[rank]] = counts.get(SEVERITY_LEVELS[rank], 0) + 1
+                frame = self.encode({"type": "alerts", "sent_at": sent_at, "count": len(alerts), "alerts": alerts})
+                for subscriber in subscribers:
+                    subscriber.put(frame, counts)
+        self.batches_sent += 1
+
+        if metrics.enabled():
+            # 最慢订阅者的积压批次数，只在开启指标时遍历
+            _SUBSCRIBER_DEPTH.set(max((len(subscriber.frames) for subscribers in self.groups.values()
+                                       for subscriber in subscribers), default=0))
+
+    def close(self):
+        """发出剩余告警并关闭所有订阅"""
+        self.flush()
+        for subscribers in self.groups.values():
+            for subscriber in list(subscribers):
+                subscriber.close()
+
+
+# ==================== SSE 服务 ====================
+
+def format_sse(frame):
+    """把一帧 JSON 包装为 Server-Sent Events 消息"""
+    return b"data: " + frame + b"\n\n"
+
+
+async def handle_sse_client(broker, reader, writer):
+    """处理一个 GET /api/realtime?min_severity=HIGH 的 SSE 连接"""
+    subscriber = None
+    try:
+        request_line = await reader.readline()
+        while (await reader.readline()).strip():
+            pass   # 忽略请求头
+
+        parts = request_line.decode('latin-1').split()
+        url = urlsplit(parts[1]) if len(parts) >= 2 else None
+        if url is None or parts[0] != "GET" or url.path != "/api/realtime":
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        query = parse_qs(url.query)
+        try:
+            subscriber = broker.subscribe(min_severity=query.get("min_severity", [None])[0])
+        except ValueError:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        await writer.drain()
+        async for frame in subscriber:
+            writer.write(format_sse(frame))
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        if subscriber is not None:
+            subscriber.close()
+        writer.close()
+
+
+async def serve_sse(broker, host="127.0.0.1", port=5001):
+    """启动 SSE 服务，返回 asyncio.Server"""
+    return await asyncio.start_server(lambda r, w: handle_sse_client(broker, r, w), host, port)
+
+
+def start_sse_thread(broker, host="127.0.0.1", port=5001):
+    """在后台线程里运行事件循环和 SSE 服务，返回 (事件循环, asyncio.Server)
+
+    其他线程通过 broker.publish_threadsafe(loop, alerts) 推送告警；loop.stop() 后线程关闭事件循环退出。
+    """
+    loop = asyncio.new_event_loop()
+
+    def run():
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    threading.Thread(target=run, name="push-broker", daemon=True).start()
+    server = asyncio.run_coroutine_threadsafe(serve_sse(broker, host, port), loop).result()
+    return loop, server
+
+
+async def _demo():
+    """演示：每秒随机生成一批告警推送给订阅者"""
+    from api_data_generator import APIDataGenerator
+
+    broker = PushBroker()
+    server = await serve_sse(broker)
+    print(" SSE 服务已启动: http://127.0.0.1:5001/api/realtime?min_severity=HIGH")
+    async with server:
+        while True:
+            broker.publish_many(APIDataGenerator.generate_alerts_data(20))
+            await asyncio.sleep(1)
+
+
+def main():
+    """主函数 - 启动演示推送服务"""
+    try:
+        asyncio.run(_demo())
+    except KeyboardInterrupt:
+        print("\n 已停止")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snort告警回放工具
+功能：把攻击场景数据或已有的原始日志按控制的速率（恒定、线性爬升、按记录的到达间隔加速）
+      追加写入一个实时日志文件，按大小或时间轮转；每条告警带有写入时间戳，
+      跟踪端据此统计“写入 -> 解析”的延迟分布
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from itertools import cycle
+
+from follow_snort_logs import SnortLogFollower
+from generate_snort_logs import BACKGROUND_RULES, format_raw_alert
+from parse_snort_logs import SnortLogParser, split_log_entries
+
+DEFAULT_RATE = 100.0          # 条/秒
+DEFAULT_MAX_BATCH = 1000      # 一次 write 最多写入的条数
+DEFAULT_KEEP = 3              # 轮转后保留的旧文件数
+
+# 写入时间戳以 [Xref => replay <epoch秒>] 一行附在告警末尾，解析器会忽略这一行
+WRITE_TIME_RE = re.compile(rb'\[Xref => replay (\d+\.\d+)\]')
+
+# 攻击类型 -> (sid, 分类)，取自生成器的规则表
+_RULES = {rule[1]: (rule[0], rule[2]) for rule in BACKGROUND_RULES}
+_PRIORITIES = {"CRITICAL": 1, "HIGH": 2, "MEDIUM": 3, "LOW": 4}
+
+# 延迟直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ==================== 回放数据 ====================
+
+def _record_fields(alert, rng):
+    """场景数据或解析结果 -> format_raw_alert 的参数（不含时间戳）"""
+    alert_type = alert.get("alert_type", "Unknown Alert")
+    sid, classification = _RULES.get(alert_type, (1000000, "Unknown"))
+    rule_id = alert.get("rule_id", "")
+    if rule_id.count(":") == 2 and rule_id != "0:0:0":
+        sid = rule_id.split(":")[1]
+    return {
+        "sid": sid,
+        "message": alert_type,
+        "classification": alert.get("classification", classification),
+        "priority": _PRIORITIES.get(alert.get("severity"), 3),
+        "source_ip": alert.get("source_ip", "0.0.0.0"),
+        "source_port": alert.get("source_port") or rng.randint(1024, 65535),
+        "destination_ip": alert.get("destination_ip", "0.0.0.0"),
+        "destination_port": alert.get("destination_port", 0),
+        "protocol": alert.get("protocol", "TCP"),
+        "packet_id": rng.randint(1000, 9999),
+    }
+
+
+def load_records(paths, seed=0):
+    """读取回放数据，返回按原始时间排序的 [(原始时间epoch或None, 告警参数)]
+
+    paths 中可以是场景JSON文件、原始Snort日志（.log）或包含场景JSON文件的目录。
+    """
+    rng = random.Random(seed)
+    records = []
+    for path in paths:
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.json')]
+        else:
+            files = [path]
+
+        for file in files:
+            if file.endswith('.json'):
+                with open(file, 'r', encoding='utf-8') as f:
+                    alerts = json.load(f)
+            else:
+                with open(file, 'r', encoding='utf-8') as f:
+                    alerts = SnortLogParser.parse_many(split_log_entries(f.read()))
+            for alert in alerts:
+                records.append((_to_epoch(alert.get("timestamp")), _record_fields(alert, rng)))
+
+    # 没有时间的记录排在最后，同一时间保持原有顺序
+    records.sort(key=lambda record: (record[0] is None, record[0] or 0))
+    return records
+
+
+def _to_epoch(timestamp):
+    try:
+        return time.mktime(time.strptime(timestamp, "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ==================== 速率控制 ====================
+
+def constant_schedule(rate):
+    """恒定速率：第 i 条在 i / rate 秒时写入"""
+    i = 0
+    while True:
+        yield i / rate
+        i += 1
+
+
+def ramp_schedule(start_rate, end_rate, ramp_seconds):
+    """速率在 ramp_seconds 内从 start_rate 线性变到 end_rate，之后保持 end_rate
+
+    前 t 秒累计条数 N(t) = a*t + k*t^2/2（k 为速率斜率），第 i 条的时间是 N(t) = i 的解。
+    """
+    a = start_rate
+    k = (end_rate - start_rate) / ramp_seconds
+    ramp_count = (start_rate + end_rate) * ramp_seconds / 2
+    i = 0
+    while True:
+        if i < ramp_count:
+            if k == 0:
+                yield i / a
+            else:
+                yield (math.sqrt(max(0.0, a * a + 2 * k * i)) - a) / k
+        else:
+            yield ramp_seconds + (i - ramp_count) / end_rate
+        i += 1
+
+
+def recorded_schedule(epochs, speed=1.0):
+    """按记录的原始到达间隔回放，speed 倍速；记录用完后从头循环（周期为原始跨度加一个平均间隔）"""
+    if not epochs:
+        return
+    first = epochs[0]
+    span = epochs[-1] - first
+    period = span + (span / (len(epochs) - 1) if len(epochs) > 1 and span > 0 else 1.0)
+    loop = 0
+    while True:
+        for epoch in epochs:
+            yield (loop * period + epoch - first) / speed
+        loop += 1
+
+
+def build_schedule(records, mode="constant", rate=DEFAULT_RATE, end_rate=None, ramp_seconds=60.0, speed=1.0):
+    """按模式返回 (告警参数迭代器, 写入时间偏移迭代器)，两者一一对应"""
+    fields = [record[1] for record in records]
+    if mode == "constant":
+        return cycle(fields), constant_schedule(rate)
+    if mode == "ramp":
+        return cycle(fields), ramp_schedule(rate, rate if end_rate is None else end_rate, ramp_seconds)
+    if mode == "recorded":
+        timed = [record for record in records if record[0] is not None]
+        if not timed:
+            raise ValueError("回放数据中没有可用的时间戳")
+        return cycle(record[1] for record in timed), recorded_schedule([record[0] for record in timed], speed)
+    raise ValueError(f"未知的回放模式: {mode}")
+
+
+# ==================== 回放 ====================
+
+class SnortAlertReplayer:
+    """把告警按计划时间追加写入日志文件
+
+    - 到期的告警合并成一次 write（O_APPEND），每条都以空行结束，跟踪端不会读到半条记录
+    - 时间戳行和 [Xref => replay ...] 行都是实际写入时间
+    - rotate_bytes / rotate_seconds 触发轮转：path -> path.1 -> path.2 ...，只保留 keep 个旧文件
+    """
+
+    def __init__(self, path, records, schedule, rotate_bytes=None, rotate_seconds=None, keep=DEFAULT_KEEP,
+                 max_batch=DEFAULT_MAX_BATCH, clock=time.time, sleep=time.sleep):
+        self.path = path
+        self.records = records
+        self.schedule = schedule
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.keep = keep
+        self.max_batch = max_batch
+        self.clock = clock
+        self.sleep = sleep
+
+        self.written = 0
+        self.rotations = 0
+        self.max_lag = 0.0        # 实际写入时间落后计划的最大秒数
+        self._stopped = False
+        self._fd = None
+        self._size = 0
+        self._opened_at = None
+
+    def run(self, count=None, duration=None):
+        """回放直到写满 count 条、超过 duration 秒或调用 stop()，返回统计信息"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._open()
+
+        start = self.clock()
+        due = next(self.schedule, None)
+        try:
+            while not self._stopped and due is not None:
+                if count is not None and self.written >= count:
+                    break
+                if duration is not None and due >= duration:
+                    break
+
+                now = self.clock()
+                if start + due > now:
+                    self.sleep(min(start + due - now, 0.1))
+                    continue
+
+                self.max_lag = max(self.max_lag, now - start - due)
+                batch = []
+                while due is not None and start + due <= now and len(batch) < self.max_batch:
+                    if count is not None and self.written + len(batch) >= count:
+                        break
+                    if duration is not None and due >= duration:
+                        break
+                    batch.append(next(self.records))
+                    due = next(self.schedule, None)
+                self._write(batch)
+        finally:
+            self._close()
+
+        elapsed = self.clock() - start
+        return {
+            "written": self.written,
+            "rotations": self.rotations,
+            "elapsed": elapsed,
+            "rate": self.written / elapsed if elapsed > 0 else 0.0,
+            "max_lag": self.max_lag,
+        }
+
+    def stop(self):
+        self._stopped = True
+
+    def _write(self, batch):
+        now = self.clock()
+        if self._should_rotate(now):
+            self._rotate(now)
+
+        timestamp = time.strftime("%m/%d-%H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000000):06d}"
+        xref = f"replay {now:.6f}"
+        data = "".join(format_raw_alert(timestamp=timestamp, xref=xref, **fields) + "\n"
+                       for fields in batch).encode('utf-8')
+
+        view = memoryview(data)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        self._size += len(data)
+        self.written += len(batch)
+
+    def _should_rotate(self, now):
+        if self.rotate_bytes is not None and self._size >= self.rotate_bytes:
+            return True
+        return self.rotate_seconds is not None and now - self._opened_at >= self.rotate_seconds
+
+    def _rotate(self, now):
+        """像 logrotate 一样把当前文件改名后新建同名文件"""
+        self._close()
+        if self.keep > 0:
+            for i in range(self.keep - 1, 0, -1):
+                older = f"{self.path}.{i}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.unlink(self.path)
+        self.rotations += 1
+        self._open(now)
+
+    def _open(self, now=None):
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._opened_at = self.clock() if now is None else now
+
+    def _close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+# ==================== 延迟统计 ====================
+
+class LatencyHistogram:
+    """按固定桶统计延迟（秒）；分位数在桶内线性插值"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # 最后一个桶是 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        low, high = 0, len(self.buckets)
+        while low < high:
+            mid = (low + high) // 2
+            if value <= self.buckets[mid]:
+                high = mid
+            else:
+                low = mid + 1
+        self.counts[low] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, p):
+        """第 p 百分位（0~100），没有数据时返回 None"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - seen) / bucket_count
+                return min(max(value, self.min), self.max)
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+class LatencyFollower(SnortLogFollower):
+    """跟踪回放日志，解析每批记录时按 [Xref => replay ...] 记录“写入 -> 解析完成”的延迟"""
+
+    def __init__(self, path, histogram=None, clock=time.time, **kwargs):
+        super().__init__(path, **kwargs)
+        self.histogram = histogram or LatencyHistogram()
+        self.clock = clock
+
+    def _parse(self, data):
+        alerts = super()._parse(data)
+        now = self.clock()
+        for match in WRITE_TIME_RE.finditer(data):
+            self.histogram.record(now - float(match.group(1)))
+        return alerts
+
+
+def main(argv=None):
+    """主函数 - 回放攻击场景到实时日志文件，可同时统计跟踪延迟"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+
+    parser = argparse.ArgumentParser(description="Snort 告警回放工具")
+    parser.add_argument("--source", action="append", help="回放数据：场景JSON、原始日志或目录（可重复，默认 data/attack_scenarios）")
+    parser.add_argument("--output", default=os.path.join(data_dir, 'replay_alerts.log'), help="写入的日志文件")
+    parser.add_argument("--mode", choices=("constant", "ramp", "recorded"), default="constant")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="速率（条/秒）；ramp 模式下为起始速率")
+    parser.add_argument("--end-rate", type=float, help="ramp 模式的结束速率")
+    parser.add_argument("--ramp-seconds", type=float, default=60.0, help="ramp 模式的爬升时间")
+    parser.add_argument("--speed", type=float, default=1.0, help="recorded 模式的倍速")
+    parser.add_argument("--count", type=int, help="写入条数上限")
+    parser.add_argument("--duration", type=float, default=10.0, help="回放时长（秒）")
+    parser.add_argument("--rotate-bytes", type=int, help="文件超过该大小时轮转")
+    parser.add_argument("--rotate-seconds", type=float, help="每隔多少秒轮转一次")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP, help="保留的旧文件数")
+    parser.add_argument("--measure", action="store_true", help="同时跟踪日志并输出延迟分布")
+    args = parser.parse_args(argv)
+
+    records = load_records(args.source or [os.path.join(data_dir, 'attack_scenarios')])
+    if not records:
+        print(" 没有可回放的告警")
+        return
+    fields, schedule = build_schedule(records, args.mode, args.rate, args.end_rate, args.ramp_seconds, args.speed)
+    replayer = SnortAlertReplayer(args.output, fields, schedule, args.rotate_bytes, args.rotate_seconds, args.keep)
+
+    follower = None
+    if args.measure:
+        # 从文件当前末尾开始跟踪，已有内容不计入延迟
+        follower = LatencyFollower(args.output)
+        follower.seek_to_end()
+        thread = threading.Thread(target=lambda: [None for _ in follower.follow(idle_timeout=0.1)], daemon=True)
+        thread.start()
+
+    print(f" 回放 {len(records)} 条告警到 {args.output}（模式 {args.mode}）")
+    stats = replayer.run(count=args.count, duration=args.duration)
+    print(f" 已写入 {stats['written']} 条，{stats['rate']:.0f} 条/秒，轮转 {stats['rotations']} 次，"
+          f"最大落后 {stats['max_lag'] * 1000:.1f}ms")
+
+    if follower is not None:
+        time.sleep(0.5)
+        follower.stop()
+        thread.join()
+        follower.close()
+        latency = follower.histogram.to_dict()
+        print(f" 写入->解析延迟: {latency['count']} 条, "
+              + ", ".join(f"{name}={latency[name] * 1000:.2f}ms" for name in ("p50", "p90", "p99", "max")
+                          if latency[name] is not None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snort 规则元数据目录
+功能：加载 sid-msg.map、gen-msg.map、classification.config（以及本地的严重程度覆盖表），
+      以整数 (gid, sid) 为键保存规则的描述、分类、优先级和参考链接；
+      解析结果存为 pickle 缓存，源文件未变化时直接载入，变化后自动重新加载；
+      提供整批告警的富化（分类、参考链接、严重程度）
+
+严重程度覆盖表（severity.map）为本项目自定的格式，每行 "gid:sid 严重程度" 或 "sid 严重程度"
+（gid 默认为1），严重程度为 CRITICAL/HIGH/MEDIUM/LOW，# 开头为注释。
+"""
+
+import argparse
+import os
+import pickle
+import time
+from collections import namedtuple
+
+from alert_sinks import AtomicFile
+from parse_snort_logs import SEVERITY_MAP
+
+Rule = namedtuple('Rule', ['gid', 'sid', 'rev', 'msg', 'classification', 'priority', 'references'])
+Classification = namedtuple('Classification', ['id', 'name', 'description', 'priority'])
+
+# from_directory 查找的文件名
+SID_MSG_FILE = "sid-msg.map"
+GEN_MSG_FILE = "gen-msg.map"
+CLASSIFICATION_FILE = "classification.config"
+OVERRIDES_FILE = "severity.map"
+
+CACHE_VERSION = 1
+# refresh() 两次检查源文件的最短间隔（秒）
+RELOAD_CHECK_INTERVAL = 5.0
+# enrich 按 rule_id 字符串缓存查找结果的上限
+MEMO_LIMIT = 65536
+
+SEVERITIES = frozenset(SEVERITY_MAP.values())
+
+
+def _split_map_line(line):
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    return [field.strip() for field in line.split('||')]
+
+
+def parse_sid_msg(path):
+    """解析 sid-msg.map，返回 [Rule, ...]
+
+    支持 v1 格式 "sid || msg || 参考..."（gid 为1）和 Snort 2.9 的 v2 格式
+    "gid || sid || rev || 分类 || 优先级 || msg || 参考..."。
+    """
+    rules = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line_number, line in enumerate(f, 1):
+            fields = _split_map_line(line)
+            if fields is None:
+                continue
+            try:
+                if len(fields) >= 6 and fields[0].isdigit() and fields[1].isdigit() and fields[2].isdigit():
+                    classification = None if fields[3] in ("", "NOCLASS") else fields[3]
+                    priority = int(fields[4]) if fields[4].isdigit() and int(fields[4]) > 0 else None
+                    rules.append(Rule(int(fields[0]), int(fields[1]), int(fields[2]), fields[5],
+                                      classification, priority, tuple(fields[6:])))
+                else:
+                    rules.append(Rule(1, int(fields[0]), None, fields[1], None, None, tuple(fields[2:])))
+            except (ValueError, IndexError):
+                raise ValueError(f"{path} 第{line_number}行格式错误: {line.strip()[:80]!r}") from None
+    return rules
+
+
+def parse_gen_msg(path):
+    """解析 gen-msg.map（"gid || sid || msg"），返回 [Rule, ...]"""
+    rules = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line_number, line in enumerate(f, 1):
+            fields = _split_map_line(line)
+            if fields is None:
+                continue
+            try:
+                rules.append(Rule(int(fields[0]), int(fields[1]), None, fields[2], None, None, ()))
+            except (ValueError, IndexError):
+                raise ValueError(f"{path} 第{line_number}行格式错误: {line.strip()[:80]!r}") from None
+    return rules
+
+
+def parse_classification_config(path):
+    """解析 classification.config，返回 {分类ID: Classification}
+
+    分类ID即 unified2 事件中的 classification_id，按文件中出现的顺序从1编号。
+    """
+    classifications = {}
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line.startswith("config classification:"):
+                continue
+            fields = [field.strip() for field in line.split(':', 1)[1].split(',')]
+            if len(fields) != 3 or not fields[2].isdigit():
+                raise ValueError(f"{path} 第{line_number}行格式错误: {line[:80]!r}")
+            class_id = len(classifications) + 1
+            classifications[class_id] = Classification(class_id, fields[0], fields[1], int(fields[2]))
+    return classifications
+
+
+def parse_overrides(path):
+    """解析严重程度覆盖表，返回 {(gid, sid): 严重程度}"""
+    overrides = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                rule, severity = line.split()
+                parts = [int(part) for part in rule.split(':')]
+                key = (parts[0], parts[1]) if len(parts) >= 2 else (1, parts[0])
+            except ValueError:
+                raise ValueError(f"{path} 第{line_number}行格式错误: {line[:80]!r}") from None
+            severity = severity.upper()
+            if severity not in SEVERITIES:
+                raise ValueError(f"{path} 第{line_number}行严重程度无效: {severity}")
+            overrides[key] = severity
+    return overrides
+
+
+def _signature(paths):
+    """源文件的 (角色, 路径, mtime_ns, 大小)，用于判断缓存是否有效"""
+    signature = []
+    for role, path in sorted(paths.items()):
+        stat = os.stat(path)
+        signature.append((role, os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class RuleCatalog:
+    """规则元数据目录
+
+    - rules：{(gid, sid): Rule}
+    - classifications：{分类ID: Classification}
+    - overrides：{(gid, sid): 严重程度}，优先于规则和分类的优先级
+    - messages / classification_names：给 Unified2Reader 用的 {(gid, sid): 描述} 和 {分类ID: 分类描述}
+    """
+
+    def __init__(self, rules=None, classifications=None, overrides=None):
+        self.rules = rules or {}
+        self.classifications = classifications or {}
+        self.overrides = overrides or {}
+        self.paths = {}
+        self.signature = ()
+        self.cache_path = None
+        self.checked_at = time.monotonic()
+        self._build()
+
+    def _build(self):
+        self.messages = {key: rule.msg for key, rule in self.rules.items()}
+        self.classification_names = {class_id: item.description
+                                     for class_id, item in self.classifications.items()}
+        self._by_name = {item.name: item for item in self.classifications.values()}
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.rules)
+
+    # ==================== 加载 ====================
+
+    @classmethod
+    def from_files(cls, sid_msg=None, gen_msg=None, classification=None, overrides=None):
+        """直接解析源文件（不读写缓存）"""
+        paths = {role: path for role, path in (("sid_msg", sid_msg), ("gen_msg", gen_msg),
+                                               ("classification", classification),
+                                               ("overrides", overrides)) if path}
+        # 先取签名再解析：解析期间文件被修改时，下次 refresh 会再加载一次
+        signature = _signature(paths)
+        rules = {}
+        # gen-msg.map 先载入，sid-msg.map 中同一键的条目信息更全，覆盖它
+        for path, parse in ((gen_msg, parse_gen_msg), (sid_msg, parse_sid_msg)):
+            if path:
+                for rule in parse(path):
+                    rules[(rule.gid, rule.sid)] = rule
+        catalog = cls(rules,
+                      parse_classification_config(classification) if classification else None,
+                      parse_overrides(overrides) if overrides else None)
+        catalog.paths = paths
+        catalog.signature = signature
+        return catalog
+
+    @classmethod
+    def open(cls, sid_msg=None, gen_msg=None, classification=None, overrides=None, cache_path=None):
+        """加载源文件：缓存与全部源文件的修改时间、大小一致时直接载入缓存，否则解析并重写缓存
+
+        cache_path 默认为第一个源文件路径加 .pickle。
+        """
+        paths = {role: path for role, path in (("sid_msg", sid_msg), ("gen_msg", gen_msg),
+                                               ("classification", classification),
+                                               ("overrides", overrides)) if path}
+        if not paths:
+            raise ValueError("至少需要一个规则元数据文件")
+        cache_path = cache_path or next(iter(paths.values())) + '.pickle'
+        signature = _signature(paths)
+
+        try:
+            catalog = cls.load(cache_path)
+            if catalog.signature == signature:
+                catalog.paths = paths
+                catalog.cache_path = cache_path
+                return catalog
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+        catalog = cls.from_files(**paths)
+        catalog.cache_path = cache_path
+        try:
+            catalog.save(cache_path)
+        except OSError as e:
+            print(f" 无法写入规则目录缓存 {cache_path}: {e}")
+        return catalog
+
+    @classmethod
+    def from_directory(cls, directory, cache_path=None):
+        """从 Snort 配置目录加载（sid-msg.map、gen-msg.map、classification.config、severity.map，有哪个用哪个）"""
+        names = {"sid_msg": SID_MSG_FILE, "gen_msg": GEN_MSG_FILE,
+                 "classification": CLASSIFICATION_FILE, "overrides": OVERRIDES_FILE}
+        paths = {role: os.path.join(directory, name) for role, name in names.items()
+                 if os.path.exists(os.path.join(directory, name))}
+        if "sid_msg" not in paths and "gen_msg" not in paths:
+            raise FileNotFoundError(f"{directory} 中没有 {SID_MSG_FILE} 或 {GEN_MSG_FILE}")
+        return cls.open(cache_path=cache_path or os.path.join(directory, '.rule_catalog.pickle'), **paths)
+
+    def save(self, path):
+        # 按列保存：逐个反序列化命名元组很慢，列表载入后再一次性构造，载入时间减半
+        columns = tuple(zip(*self.rules.values())) or ((),) * len(Rule._fields)
+        classifications = [tuple(item) for item in self.classifications.values()]
+        state = (CACHE_VERSION, self.signature, columns, classifications, self.overrides)
+        with AtomicFile(path) as f:
+            f.write(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if not isinstance(state, tuple) or len(state) != 5 or state[0] != CACHE_VERSION:
+            raise ValueError(f"不是规则目录缓存文件: {path}")
+        _, signature, columns, classifications, overrides = state
+        try:
+            rules = dict(zip(zip(columns[0], columns[1]), map(Rule, *columns)))
+            classifications = {item[0]: Classification(*item) for item in classifications}
+        except (TypeError, KeyError, IndexError):
+            raise ValueError(f"规则目录缓存文件损坏: {path}") from None
+        catalog = cls(rules, classifications, overrides)
+        catalog.signature = signature
+        return catalog
+
+    def refresh(self, force=False):
+        """源文件有变化时重新加载（距上次检查不足 RELOAD_CHECK_INTERVAL 秒时跳过），重新加载返回 True"""
+        now = time.monotonic()
+        if not self.paths or (not force and now - self.checked_at < RELOAD_CHECK_INTERVAL):
+            return False
+        self.checked_at = now
+        try:
+            if _signature(self.paths) == self.signature:
+                return False
+        except OSError:
+            return False   # 文件正在被替换，下次再查
+
+        try:
+            if self.cache_path is None:
+                catalog = RuleCatalog.from_files(**self.paths)
+            else:
+                catalog = RuleCatalog.open(cache_path=self.cache_path, **self.paths)
+        except (OSError, ValueError) as e:
+            print(f" 重新加载规则目录失败，继续使用旧数据: {e}")
+            return False
+        self.rules = catalog.rules
+        self.classifications = catalog.classifications
+        self.overrides = catalog.overrides
+        self.signature = catalog.signature
+        self._build()
+        return True
+
+    # ==================== 查询 ====================
+
+    def get(self, gid, sid):
+        return self.rules.get((gid, sid))
+
+    def severity(self, gid, sid, priority=None):
+        """规则的严重程度：覆盖表 > 规则优先级 > 规则分类的优先级 > 传入的 priority；都没有时返回 None"""
+        key = (gid, sid)
+        severity = self.overrides.get(key)
+        if severity is not None:
+            return severity
+        rule = self.rules.get(key)
+        if rule is not None:
+            if rule.priority is None and rule.classification in self._by_name:
+                priority = self._by_name[rule.classification].priority
+            elif rule.priority is not None:
+                priority = rule.priority
+        return SEVERITY_MAP.get(priority) if priority is not None else None
+
+    def _updates_for(self, rule_id):
+        """rule_id 字符串 -> 需要写入告警的字段（规则不在目录中时为 None）"""
+        try:
+            parts = rule_id.split(':')
+            key = (int(parts[0]), int(parts[1]))
+        except (AttributeError, ValueError, IndexError):
+            return None
+        rule = self.rules.get(key)
+        if rule is None and key not in self.overrides:
+            return None
+
+        updates = {}
+        if rule is not None:
+            if rule.classification:
+                updates["category"] = rule.classification
+            if rule.references:
+                updates["references"] = rule.references   # 元组，存储时按值字典编码
+        severity = self.severity(*key)
+        if severity is not None:
+            updates["severity"] = severity
+        return updates or None
+
+    def enrich(self, alerts):
+        """给一批告警（字典）原地补上 category、references 并按目录修正 severity，返回告警列表
+
+        同一个 rule_id 只解析和查找一次。
+        """
+        alerts = list(alerts)
+        memo = self._memo
+        for alert in alerts:
+            rule_id = alert.get("rule_id")
+            try:
+                updates = memo[rule_id]
+            except KeyError:
+                if len(memo) >= MEMO_LIMIT:
+                    memo.clear()
+                updates = memo[rule_id] = self._updates_for(rule_id)
+            except TypeError:
+                continue
+            if updates is not None:
+                alert.update(updates)
+        return alerts
+
+
+def main(argv=None):
+    """命令行：预先生成缓存文件，或查询若干规则"""
+    parser = argparse.ArgumentParser(description="Snort 规则元数据目录")
+    parser.add_argument("directory", help="包含 sid-msg.map / gen-msg.map / classification.config 的目录")
+    parser.add_argument("rules", nargs="*", help="要查询的规则（gid:sid）")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    catalog = RuleCatalog.from_directory(args.directory)
+    print(f" 已加载 {len(catalog)} 条规则、{len(catalog.classifications)} 个分类，"
+          f"用时 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for text in args.rules:
+        gid, sid = (int(part) for part in text.split(':')[:2])
+        rule = catalog.get(gid, sid)
+        print(f"  {text}: {rule.msg if rule else '未知规则'} ({catalog.severity(gid, sid) or '-'})")
+
+
+if __name__ == "__main__":
+    main()
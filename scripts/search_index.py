@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警全文检索
+功能：写入时对 alert_type、raw_summary、classification、description、payload 分词，
+      维护 词 -> 行号数组 的倒排索引（行号递增，数组天然有序）；
+      支持多个词的 AND、OR、前缀（sql*）和短语（"union select"）查询，
+      有序行号数组之间用跳跃（galloping）求交集
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+
+SEARCH_FIELDS = ("alert_type", "raw_summary", "classification", "description", "payload")
+
+# 取值重复度高的字段按取值缓存分词结果（payload 几乎每条都不同，不缓存）
+CACHED_FIELDS = frozenset(("alert_type", "raw_summary", "classification", "description"))
+TOKEN_CACHE_LIMIT = 65536
+
+# 前缀查询用的有序词表：新词先放进待合并列表，超过词表的 1/VOCABULARY_MERGE_RATIO 时才并入
+VOCABULARY_MERGE_RATIO = 8
+VOCABULARY_MERGE_MIN = 1024
+
+# 较短数组的长度乘以它仍小于较长数组时用跳跃查找求交集，否则转成集合求交集
+GALLOP_RATIO = 32
+
+_TOKEN_RE = re.compile(r'\w+')
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text):
+    """文本 -> 小写的词列表（连续的字母、数字、下划线为一个词，其余字符为分隔）"""
+    if isinstance(text, bytes):
+        text = text.decode('latin-1')
+    elif not isinstance(text, str):
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _Term:
+    """查询中的一项：一个词、一个前缀或一个短语"""
+
+    __slots__ = ("tokens", "prefix")
+
+    def __init__(self, tokens, prefix):
+        self.tokens = tokens
+        self.prefix = prefix    # 最后一个词是否按前缀匹配
+
+    def phrase(self):
+        return ' '.join(self.tokens)
+
+
+def parse_query(text):
+    """解析查询字符串，返回 OR 连接的子句列表，每个子句是 AND 连接的 _Term 列表
+
+    - 空格分隔的各项同时满足（AND），大写的 OR 分隔的子句满足其一；AND 优先于 OR
+    - 以 * 结尾的项为前缀匹配；引号内为短语，词须相邻且按顺序出现
+    - 一项中含有分隔符时（如 CVE-2019-0001、10.0.0.1）按短语处理
+    """
+    clauses = [[]]
+    for quoted, word in _QUERY_RE.findall(text or ""):
+        if word == "OR":
+            clauses.append([])
+            continue
+        if word == "AND":
+            continue
+        raw = quoted or word
+        prefix = word.endswith('*')
+        tokens = tokenize(raw.rstrip('*') if prefix else raw)
+        if tokens:
+            clauses[-1].append(_Term(tokens, prefix))
+    clauses = [clause for clause in clauses if clause]
+    if not clauses:
+        raise ValueError(f"搜索条件中没有可检索的词: {text!r}")
+    return clauses
+
+
+def intersect(first, second):
+    """两个有序行号数组的交集
+
+    长度相差悬殊时对短数组的每个值在长数组里跳跃查找（从上次的位置起按 1、2、4… 的步长前进，
+    再在最后一步内二分），复杂度 O(m log(n/m))；长度相近时用集合求交集。
+    """
+    if len(first) > len(second):
+        first, second = second, first
+    if not first:
+        return array('I')
+    if len(first) * GALLOP_RATIO >= len(second):
+        return array('I', sorted(set(first).intersection(second)))
+
+    result = array('I')
+    size = len(second)
+    position = 0
+    for value in first:
+        step = 1
+        while position + step < size and second[position + step] < value:
+            step <<= 1
+        position = bisect_left(second, value, position, min(position + step + 1, size))
+        if position == size:
+            break
+        if second[position] == value:
+            result.append(value)
+            position += 1
+    return result
+
+
+def union(arrays):
+    """多个有序行号数组的并集"""
+    arrays = [rows for rows in arrays if rows]
+    if not arrays:
+        return array('I')
+    if len(arrays) == 1:
+        return arrays[0]
+    return array('I', sorted(set().union(*arrays)))
+
+
+class SearchIndex:
+    """告警文本字段上的倒排索引
+
+    add(row, alert) 在写入时调用，行号须递增；search(query) 返回匹配行号的有序数组。
+    短语和含分隔符的项先按各词求交集，再读取候选行的原文确认词相邻。
+    """
+
+    def __init__(self, batch, fields=SEARCH_FIELDS):
+        self.batch = batch
+        self.fields = fields
+        self.postings = {}
+        self._vocabulary = []     # 排序后的词表
+        self._new_tokens = []     # 尚未并入词表的新词，前缀查询时排序
+        self._token_cache = {}
+
+    def __len__(self):
+        return len(self.postings)
+
+    def add(self, row, alert):
+        tokens = set()
+        cache = self._token_cache
+        for field in self.fields:
+            value = alert.get(field)
+            if value is None:
+                continue
+            if field in CACHED_FIELDS:
+                try:
+                    cached = cache.get(value)
+                except TypeError:
+                    continue
+                if cached is None:
+                    if len(cache) >= TOKEN_CACHE_LIMIT:
+                        cache.clear()
+                    cached = cache[value] = frozenset(tokenize(value))
+                tokens.update(cached)
+            else:
+                tokens.update(tokenize(value))
+
+        postings = self.postings
+        for token in tokens:
+            rows = postings.get(token)
+            if rows is None:
+                rows = postings[token] = array('I')
+                self._new_tokens.append(token)
+            rows.append(row)
+
+    # ==================== 查询 ====================
+
+    def search(self, query):
+        """返回匹配查询字符串的行号（有序数组；可能就是索引内部的数组，调用方不要修改）"""
+        clauses = parse_query(query) if isinstance(query, str) else query
+        return union(self._match_clause(clause) for clause in clauses)
+
+    def _match_clause(self, clause):
+        # 先求各项词的交集（短的先算），最后逐个确认短语
+        lists = []
+        phrases = []
+        for term in clause:
+            for position, token in enumerate(term.tokens):
+                if term.prefix and position == len(term.tokens) - 1:
+                    lists.append(self._prefix_rows(token))
+                else:
+                    lists.append(self.postings.get(token, array('I')))
+            if len(term.tokens) > 1:
+                phrases.append(term)
+
+        lists.sort(key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not rows:
+                break
+            rows = intersect(rows, other)
+
+        if phrases and rows:
+            rows = array('I', (row for row in rows if self._contains_phrases(row, phrases)))
+        return rows
+
+    def _prefix_rows(self, prefix):
+        new_tokens = self._new_tokens
+        if len(new_tokens) > max(VOCABULARY_MERGE_MIN, len(self._vocabulary) // VOCABULARY_MERGE_RATIO):
+            # 两个有序段拼起来排序，timsort 直接归并
+            new_tokens.sort()
+            self._vocabulary = sorted(self._vocabulary + new_tokens)
+            new_tokens.clear()
+        else:
+            # 上次排过的部分已有序，只有之后追加的新词需要排
+            new_tokens.sort()
+
+        tokens = []
+        for vocabulary in (self._vocabulary, new_tokens):
+            lo = bisect_left(vocabulary, prefix)
+            hi = bisect_right(vocabulary, prefix + '\U0010ffff', lo)
+            tokens += vocabulary[lo:hi]
+        return union(self.postings[token] for token in tokens)
+
+    def _contains_phrases(self, row, phrases):
+        columns = self.batch.columns
+        texts = [' ' + ' '.join(tokenize(columns[field].get(row))) + ' '
+                 for field in self.fields if field in columns]
+        for term in phrases:
+            needle = ' ' + term.phrase() + ('' if term.prefix else ' ')
+            if not any(needle in text for text in texts):
+                return False
+        return True
+
+    def checker(self, rows):
+        """返回 行号 -> 是否在 rows（search 的结果）中 的判断函数"""
+        size = len(rows)
+
+        def check(row):
+            position = bisect_left(rows, row)
+            return position < size and rows[position] == row
+
+        return check
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snort 时间戳解码
+功能：把 Snort 告警中不带年份的 MM/DD-HH:MM:SS.ffffff 转成 "YYYY-MM-DD HH:MM:SS" 和整数秒，
+      按固定偏移切片取字段，同一秒内的时间戳只换算一次；
+      年份按参考时间推断（取不晚于参考时间的最近一年），跨年和闰日都能正确归属
+"""
+
+import calendar
+import re
+import time
+
+# 时间戳中允许晚于参考时间的量（传感器时钟偏差、时区差），超过就归到前一年
+FUTURE_SLACK = 86400
+
+# 推断年份时最多往前找的年数（2月29日最多相隔8年才出现一次，如2096 -> 2104）
+MAX_YEARS_BACK = 8
+
+# 按秒缓存的条目数上限，超过时整体清空
+MEMO_LIMIT = 65536
+
+# 参考时间的有效期（秒）：长时间运行的进程定期更新参考时间
+REFERENCE_TTL = 3600
+
+# 秒后面的小数部分：与 strptime 的 %f 一致，1~6位ASCII数字
+_FRACTION_RE = re.compile(r'\.[0-9]{1,6}')
+
+
+def local_reference(now=None):
+    """把当前（或给定的）时间换成本地墙上时间的"整数秒"（与 timestamp_to_epoch 一样按UTC换算）"""
+    return calendar.timegm(time.localtime(time.time() if now is None else now))
+
+
+class SnortTimestampDecoder:
+    """带年份推断和按秒缓存的 Snort 时间戳解码器
+
+    reference 为参考时间（本地墙上时间的整数秒，见 local_reference），默认取当前时间。
+    """
+
+    def __init__(self, reference=None):
+        self.reference = local_reference() if reference is None else int(reference)
+        self.reference_year = time.gmtime(self.reference).tm_year
+        self._memo = {}
+
+    def decode(self, stamp):
+        """返回 ("YYYY-MM-DD HH:MM:SS", 整数秒)；格式或日期不合法时返回 None"""
+        entry = self._memo.get(stamp[:14]) or self._decode_second(stamp[:14])
+        if entry is None or _FRACTION_RE.fullmatch(stamp, 14) is None:
+            return None
+        return entry
+
+    def convert(self, stamp):
+        """只返回显示用字符串；不合法时返回 None（解析器逐条调用，不经过 decode）"""
+        entry = self._memo.get(stamp[:14]) or self._decode_second(stamp[:14])
+        if entry is None or _FRACTION_RE.fullmatch(stamp, 14) is None:
+            return None
+        return entry[0]
+
+    def _decode_second(self, prefix):
+        # MM/DD-HH:MM:SS 的分隔符在固定位置，其余都必须是ASCII数字
+        if (len(prefix) != 14 or prefix[2] != '/' or prefix[5] != '-'
+                or prefix[8] != ':' or prefix[11] != ':'):
+            return None
+        digits = prefix[0:2] + prefix[3:5] + prefix[6:8] + prefix[9:11] + prefix[12:14]
+        if not (digits.isascii() and digits.isdigit()):
+            return None
+
+        month, day = int(digits[0:2]), int(digits[2:4])
+        hour, minute, second = int(digits[4:6]), int(digits[6:8]), int(digits[8:10])
+        if not (1 <= month <= 12 and 1 <= day <= 31 and hour < 24 and minute < 60 and second < 60):
+            return None
+
+        year, epoch = self._infer_year(month, day, hour, minute, second)
+        if year is None:
+            return None
+
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+        entry = self._memo[prefix] = (
+            f"{year:04d}-{prefix[0:2]}-{prefix[3:5]} {prefix[6:14]}", epoch)
+        return entry
+
+    def _infer_year(self, month, day, hour, minute, second):
+        """取日期合法、且不晚于 参考时间 + FUTURE_SLACK 的最近一年"""
+        latest = self.reference + FUTURE_SLACK
+        for year in range(self.reference_year + 1, self.reference_year - MAX_YEARS_BACK - 1, -1):
+            if day > calendar.monthrange(year, month)[1]:
+                continue
+            epoch = calendar.timegm((year, month, day, hour, minute, second))
+            if epoch <= latest:
+                return year, epoch
+        return None, None
+
+
+_shared = None
+_shared_expires = 0.0
+
+
+def shared_decoder():
+    """进程内共享的解码器；参考时间每 REFERENCE_TTL 秒更新一次（同时清空缓存）"""
+    global _shared, _shared_expires
+    now = time.time()
+    if _shared is None or now >= _shared_expires:
+        _shared = SnortTimestampDecoder(local_reference(now))
+        _shared_expires = now + REFERENCE_TTL
+    return _shared
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 告警持久化
+功能：把 parse_line 格式的告警批量写入 SQLite（WAL 模式），
+      提供与 AlertStore 相同的过滤、分页查询接口，不必每次重新加载JSON文件
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import metrics
+from alert_model import ALERT_FIELDS
+from alert_store import DEFAULT_LIMIT, MAX_LIMIT, INDEXED_FIELDS
+from parse_snort_logs import SnortLogParser
+
+DEFAULT_BATCH_SIZE = 20000
+
+# 告警表的列：parse_line 的12个字段（id 存为 alert_id），标准字段以外的键以JSON存在 extra 列
+COLUMNS = ("alert_id",) + ALERT_FIELDS[1:] + ("extra",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    alert_id INTEGER,
+    timestamp TEXT,
+    source_ip TEXT,
+    source_port INTEGER,
+    destination_ip TEXT,
+    destination_port INTEGER,
+    protocol TEXT,
+    alert_type TEXT,
+    classification TEXT,
+    severity TEXT,
+    rule_id TEXT,
+    raw_summary TEXT,
+    extra TEXT
+);
+"""
+
+# 查询索引（索引名 -> 列）
+INDEXES = {
+    "idx_alerts_timestamp": "timestamp",
+    "idx_alerts_severity_timestamp": "severity, timestamp",
+    "idx_alerts_source_ip_timestamp": "source_ip, timestamp",
+}
+
+INSERT_SQL = f"INSERT INTO alerts ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+SELECT_COLUMNS = "rowid, " + ", ".join(COLUMNS)
+
+_STANDARD_KEYS = frozenset(ALERT_FIELDS)
+
+
+# extra 列中记录缺失的标准字段（区分"没有该字段"和值为 None）
+MISSING_KEY = "__missing__"
+
+
+def _to_row(alert):
+    """告警字典 -> 插入参数元组"""
+    extra = None
+    if alert.keys() != _STANDARD_KEYS:
+        extra = {key: value for key, value in alert.items() if key not in _STANDARD_KEYS}
+        missing = [field for field in ALERT_FIELDS if field not in alert]
+        if missing:
+            extra[MISSING_KEY] = missing
+        extra = json.dumps(extra, ensure_ascii=False) if extra else None
+    get = alert.get
+    return (get("id"), get("timestamp"), get("source_ip"), get("source_port"),
+            get("destination_ip"), get("destination_port"), get("protocol"),
+            get("alert_type"), get("classification"), get("severity"),
+            get("rule_id"), get("raw_summary"), extra)
+
+
+def _from_row(row):
+    """查询结果行（首列为 rowid）-> 告警字典（键按 parse_line 的字段顺序）"""
+    alert = {"id": row[1]}
+    for field, value in zip(ALERT_FIELDS[1:], row[2:-1]):
+        alert[field] = value
+    if row[-1] is not None:
+        extra = json.loads(row[-1])
+        for field in extra.pop(MISSING_KEY, ()):
+            del alert[field]
+        alert.update(extra)
+    return alert
+
+
+class AlertRepository:
+    """SQLite 告警库
+
+    写入先进入内存缓冲，攒够 batch_size 条后在一个事务里 executemany 写入；
+    查询前会自动写出缓冲区。
+    """
+
+    def __init__(self, path=":memory:", batch_size=DEFAULT_BATCH_SIZE):
+        if path != ":memory:":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.batch_size = batch_size
+        # 事务由本类显式控制
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-65536")   # 64MB，重建索引时排序更快
+        self.conn.executescript(SCHEMA)
+        self._create_indexes()
+        self._pending = []
+
+    # ==================== 写入 ====================
+
+    def add(self, alert):
+        """写入一条告警（可直接作为 stream_file 的 on_alert 回调）"""
+        self._pending.append(_to_row(alert))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, alerts):
+        """批量写入告警，返回写入条数"""
+        count = 0
+        for alert in alerts:
+            self._pending.append(_to_row(alert))
+            count += 1
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        self.flush()
+        return count
+
+    def flush(self):
+        """把缓冲区中的告警在一个事务内写入数据库"""
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        with metrics.stage("db_write"), self._transaction():
+            self.conn.executemany(INSERT_SQL, rows)
+
+    def ingest_file(self, input_path, workers=1, bulk=None):
+        """流式解析 Snort 日志文件并直接写入数据库，返回写入条数
+
+        bulk=True 时在导入期间去掉查询索引，导入完成后一次性重建（见 bulk_load）；
+        默认（None）只在表为空时这样做，向已有数据追加时逐行维护索引，
+        不为一次小导入重建全部索引，查询也不会在导入期间失去索引。
+        """
+        if bulk is None:
+            self.flush()
+            bulk = self.conn.execute("SELECT 1 FROM alerts LIMIT 1").fetchone() is None
+        if workers == 1:
+            alerts = SnortLogParser.iter_alerts(input_path)
+        else:
+            alerts = SnortLogParser.iter_alerts_parallel(input_path, workers)
+        if not bulk:
+            return self.add_many(alerts)
+        with self.bulk_load():
+            return self.add_many(alerts)
+
+    @contextmanager
+    def bulk_load(self):
+        """大批量导入：期间删除查询索引，结束时重建
+
+        逐行维护三个索引会让写入慢一半以上，导入后排序建索引的总开销更小；
+        适合首次导入或导入量与已有数据量相当的情况。
+        """
+        self.flush()
+        for name in INDEXES:
+            self.conn.execute(f"DROP INDEX IF EXISTS {name}")
+        try:
+            yield self
+        finally:
+            self.flush()
+            self._create_indexes()
+
+    def _create_indexes(self):
+        for name, columns in INDEXES.items():
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON alerts ({columns})")
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    # ==================== 查询 ====================
+
+    def __len__(self):
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def query(self, page=1, limit=DEFAULT_LIMIT, cursor=None, start_time=None, end_time=None, **filters):
+        """按条件查询告警，参数和返回结构与 AlertStore.query 相同，结果按时间从新到旧"""
+        self.flush()
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        page = max(1, int(page))
+
+        conditions = []
+        params = []
+        for field, value in filters.items():
+            if field not in INDEXED_FIELDS:
+                raise ValueError(f"不支持按 {field} 过滤")
+            conditions.append(f"{field} = ?")
+            params.append(value)
+        if start_time:
+            conditions.append("timestamp >= ?")
+            params.append(_to_timestamp(start_time, "start_time"))
+        if end_time:
+            conditions.append("timestamp <= ?")
+            params.append(_to_timestamp(end_time, "end_time"))
+
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        total = self.conn.execute(f"SELECT COUNT(*) FROM alerts{where}", params).fetchone()[0]
+
+        if cursor is not None:
+            timestamp, rowid = _decode_cursor(cursor)
+            keyset = "(timestamp < ? OR (timestamp = ? AND rowid < ?))"
+            where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+            params += [timestamp, timestamp, rowid]
+            offset = 0
+        else:
+            offset = (page - 1) * limit
+
+        rows = self.conn.execute(
+            f"SELECT {SELECT_COLUMNS} FROM alerts{where} "
+            f"ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?",
+            params + [limit + 1, offset]).fetchall()
+
+        # 多取一行判断后面是否还有数据，最后一页正好满页时不返回游标
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1][2]}|{rows[-1][0]}"
+
+        return {
+            "alerts": [_from_row(row) for row in rows],
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": math.ceil(total / limit),
+                "next_cursor": next_cursor
+            }
+        }
+
+    # ==================== 生命周期 ====================
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Transaction:
+    """显式事务：正常结束时提交，出错时回滚"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN")
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _to_timestamp(value, name):
+    """查询时间参数统一为 "YYYY-MM-DD HH:MM:SS" 字符串（与存储的格式一致，可直接比较）"""
+    if isinstance(value, int):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(value))
+    if not isinstance(value, str) or len(value) != 19:
+        raise ValueError(f"{name} 格式应为 YYYY-MM-DD HH:MM:SS: {value!r}")
+    return value
+
+
+def _decode_cursor(cursor):
+    try:
+        timestamp, rowid = cursor.rsplit('|', 1)
+        return timestamp, int(rowid)
+    except (AttributeError, ValueError):
+        raise ValueError(f"无效的游标: {cursor!r}") from None
+
+
+def main():
+    """主函数 - 把原始日志解析入库并演示查询"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(os.path.dirname(script_dir), 'data')
+    input_file = os.path.join(data_dir, 'raw_snort_alerts.log')
+    db_file = os.path.join(data_dir, 'alerts.db')
+
+    if not os.path.exists(input_file):
+        print(f" 输入文件不存在: {input_file}")
+        return
+
+    with AlertRepository(db_file) as repo:
+        start = time.perf_counter()
+        count = repo.ingest_file(input_file)
+        elapsed = time.perf_counter() - start
+        print(f" 已写入 {count} 条告警到 {db_file}（{elapsed:.2f} 秒）")
+
+        result = repo.query(limit=5, severity="CRITICAL")
+        print(f" CRITICAL 告警共 {result['pagination']['total']} 条，最新5条:")
+        for alert in result["alerts"]:
+            print(f"   {alert['timestamp']} {alert['source_ip']} {alert['alert_type']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+告警统计聚合器
+功能：逐条（或批量）消费告警，增量维护 /api/stats 所需的统计数据，
+      查询时不需要重新扫描历史告警
+"""
+
+import calendar
+from array import array
+from datetime import datetime
+
+from alert_model import epoch_to_timestamp, timestamp_to_epoch
+from heavy_hitters import GroupedSpaceSaving, SpaceSaving
+
+SEVERITIES = ("CRITICAL", "HIGH", "MEDIUM", "LOW")
+
+# recent_activity 的时间窗口（秒）
+WINDOWS = (("last_hour", 3600), ("last_6h", 6 * 3600), ("last_24h", 24 * 3600))
+
+
+def local_epoch_now():
+    """当前本地时间对应的整数秒，与 timestamp_to_epoch 的换算方式一致"""
+    return calendar.timegm(datetime.now().timetuple())
+
+
+class StatsAggregator:
+    """增量统计聚合器
+
+    - total_alerts、严重程度分布、攻击类型分布：每条告警 O(1) 更新
+    - top_source_ips：Space-Saving 计数器，内存固定为 heavy_hitter_capacity 个条目，
+      计数误差不超过 总数 / heavy_hitter_capacity；另按严重程度、目的端口分组统计
+    - recent_activity：按 bucket_seconds 分桶的环形缓冲区覆盖最近24小时，
+      每个窗口维护一个滑动计数，时间前进时只减去移出窗口的桶
+    - geoip 为 geoip.CountryResolver 时，top_source_ips 的每一项带上 country
+    """
+
+    def __init__(self, bucket_seconds=60, clock=local_epoch_now, top_ip_count=3,
+                 heavy_hitter_capacity=1000, geoip=None):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.top_ip_count = top_ip_count
+        self.geoip = geoip
+        self.started_at = clock()
+
+        self.total_alerts = 0
+        self.severity_distribution = {sev: 0 for sev in SEVERITIES}
+        self.attack_type_distribution = {}
+        self.source_ips = SpaceSaving(heavy_hitter_capacity)
+        self.source_ips_by_severity = GroupedSpaceSaving(heavy_hitter_capacity)
+        self.source_ips_by_port = GroupedSpaceSaving(heavy_hitter_capacity)
+
+        # 环形缓冲区：槽位 = 桶号 % 桶数；_bucket_ids 记录槽位当前属于哪个桶
+        self._bucket_count = WINDOWS[-1][1] // bucket_seconds
+        self._counts = array('q', bytes(8 * self._bucket_count))
+        self._bucket_ids = array('q', [-1]) * self._bucket_count
+        self._window_buckets = [seconds // bucket_seconds for _, seconds in WINDOWS]
+        self._window_totals = [0] * len(WINDOWS)
+        self._current = None   # 当前（最新）桶号
+
+    # ==================== 写入 ====================
+
+    def add(self, alert):
+        """消费一条 parse_line 格式的告警"""
+        self.total_alerts += 1
+
+        severity = alert.get("severity", "UNKNOWN")
+        self.severity_distribution[severity] = self.severity_distribution.get(severity, 0) + 1
+
+        alert_type = alert.get("alert_type", "UNKNOWN")
+        self.attack_type_distribution[alert_type] = self.attack_type_distribution.get(alert_type, 0) + 1
+
+        source_ip = alert.get("source_ip")
+        if source_ip is not None:
+            self.source_ips.add(source_ip)
+            self.source_ips_by_severity.add(severity, source_ip)
+            port = alert.get("destination_port")
+            if port is not None:
+                self.source_ips_by_port.add(port, source_ip)
+
+        epoch = timestamp_to_epoch(alert.get("timestamp"))
+        if epoch is not None:
+            self._add_to_bucket(epoch // self.bucket_seconds)
+
+    def add_many(self, alerts):
+        for alert in alerts:
+            self.add(alert)
+
+    def _add_to_bucket(self, bucket, count=1):
+        if self._current is None or bucket > self._current:
+            self._advance(bucket)
+
+        age = self._current - bucket
+        if age >= self._bucket_count:
+            return   # 超过24小时的告警不计入时间窗口
+
+        slot = bucket % self._bucket_count
+        if self._bucket_ids[slot] != bucket:
+            # 槽位还留着24小时以前的旧桶（早已移出所有窗口），直接复用
+            self._bucket_ids[slot] = bucket
+            self._counts[slot] = 0
+        self._counts[slot] += count
+        for i, size in enumerate(self._window_buckets):
+            if age < size:
+                self._window_totals[i] += count
+
+    def _advance(self, bucket):
+        """把当前桶推进到 bucket，减去移出各窗口的桶，并清空被复用的槽位"""
+        if self._current is None or bucket - self._current >= self._bucket_count:
+            for slot in range(self._bucket_count):
+                self._counts[slot] = 0
+                self._bucket_ids[slot] = -1
+            self._window_totals = [0] * len(WINDOWS)
+            self._current = bucket
+            self._bucket_ids[bucket % self._bucket_count] = bucket
+            return
+
+        counts = self._counts
+        bucket_ids = self._bucket_ids
+        for i, size in enumerate(self._window_buckets):
+            # 移出窗口 i 的桶：(旧当前 - size, 新当前 - size]
+            for leaving in range(self._current - size + 1, bucket - size + 1):
+                slot = leaving % self._bucket_count
+                if bucket_ids[slot] == leaving:
+                    self._window_totals[i] -= counts[slot]
+
+        for entering in range(self._current + 1, bucket + 1):
+            slot = entering % self._bucket_count
+            counts[slot] = 0
+            bucket_ids[slot] = entering
+
+        self._current = bucket
+
+    # ==================== 查询 ====================
+
+    def recent_activity(self, now=None):
+        """最近1/6/24小时的告警数"""
+        now = self.clock() if now is None else now
+        bucket = now // self.bucket_seconds
+        if self._current is not None and bucket > self._current:
+            self._advance(bucket)
+        return {name: total for (name, _), total in zip(WINDOWS, self._window_totals)}
+
+    def top_source_ips(self, k=None):
+        """告警最多的源IP；threat_level 为该IP出现过的最高严重程度，country 为归属国家（配置了 geoip 时）"""
+        k = self.top_ip_count if k is None else k
+        top = []
+        for ip, count, _ in self.source_ips.top(k):
+            threat_level = next((sev for sev in SEVERITIES
+                                 if (sev, ip) in self.source_ips_by_severity.summary), "UNKNOWN")
+            entry = {"ip": ip, "count": count}
+            if self.geoip is not None:
+                entry["country"] = self.geoip.country(ip)
+            entry["threat_level"] = threat_level
+            top.append(entry)
+        return top
+
+    def top_source_ips_by_severity(self, severity, k=None):
+        """某个严重程度下告警最多的源IP"""
+        k = self.top_ip_count if k is None else k
+        return [{"ip": ip, "count": count}
+                for ip, count, _ in self.source_ips_by_severity.top(severity, k)]
+
+    def top_source_ips_by_port(self, port, k=None):
+        """攻击某个目的端口最多的源IP"""
+        k = self.top_ip_count if k is None else k
+        return [{"ip": ip, "count": count}
+                for ip, count, _ in self.source_ips_by_port.top(port, k)]
+
+    def merge(self, other):
+        """合并另一个聚合器（如其他进程/分片）的计数和重点IP统计，原地更新并返回 self
+
+        两者的时间窗口按各自的桶号对齐累加。
+        """
+        self.total_alerts += other.total_alerts
+        for sev, count in other.severity_distribution.items():
+            self.severity_distribution[sev] = self.severity_distribution.get(sev, 0) + count
+        for alert_type, count in other.attack_type_distribution.items():
+            self.attack_type_distribution[alert_type] = self.attack_type_distribution.get(alert_type, 0) + count
+
+        self.source_ips.merge(other.source_ips)
+        self.source_ips_by_severity.merge(other.source_ips_by_severity)
+        self.source_ips_by_port.merge(other.source_ips_by_port)
+
+        if other._current is not None:
+            for slot in range(other._bucket_count):
+                bucket = other._bucket_ids[slot]
+                count = other._counts[slot]
+                if bucket >= 0 and count and other._current - bucket < other._bucket_count:
+                    self._add_to_bucket(bucket, count)
+        return self
+
+    def snapshot(self, now=None):
+        """生成与 GET /api/stats 相同结构的统计数据"""
+        now = self.clock() if now is None else now
+        recent = self.recent_activity(now)
+
+        return {
+            "total_alerts": self.total_alerts,
+            "last_24h_alerts": recent["last_24h"],
+            "severity_distribution": dict(self.severity_distribution),
+            "attack_type_distribution": dict(self.attack_type_distribution),
+            "top_source_ips": self.top_source_ips(),
+            "recent_activity": recent,
+            "system_status": {
+                "ids_status": "active",
+                "last_updated": epoch_to_timestamp(now),
+                "uptime_days": max(0, now - self.started_at) // 86400
+            }
+        }
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snort unified2 二进制日志读取器
+功能：解码 unified2 格式的事件和数据包记录，输出与 parse_line 相同结构的告警；
+      支持按顺序读取 spool 目录下的 snort.u2.* 文件，并提供测试用的文件写入器
+"""
+
+import mmap
+import os
+import re
+import socket
+import struct
+import time
+from collections import namedtuple
+
+from parse_snort_logs import SEVERITY_MAP
+
+# ==================== 记录格式 ====================
+# 每条记录: 4字节类型 + 4字节长度（网络字节序），后跟记录体
+RECORD_HEADER = struct.Struct('>II')
+
+UNIFIED2_PACKET = 2
+UNIFIED2_IDS_EVENT = 7
+UNIFIED2_IDS_EVENT_IPV6 = 72
+UNIFIED2_IDS_EVENT_V2 = 104
+UNIFIED2_IDS_EVENT_IPV6_V2 = 105
+UNIFIED2_EXTRA_DATA = 110
+
+# 事件记录体：9个u32 + 源/目的IP + 端口(ICMP为type/code) + 协议等4个u8，v2 额外带 MPLS/VLAN
+EVENT_STRUCTS = {
+    UNIFIED2_IDS_EVENT: struct.Struct('>9I4s4sHHBBBB'),
+    UNIFIED2_IDS_EVENT_IPV6: struct.Struct('>9I16s16sHHBBBB'),
+    UNIFIED2_IDS_EVENT_V2: struct.Struct('>9I4s4sHHBBBBIHH'),
+    UNIFIED2_IDS_EVENT_IPV6_V2: struct.Struct('>9I16s16sHHBBBBIHH'),
+}
+PACKET_HEADER = struct.Struct('>7I')
+
+Unified2Event = namedtuple('Unified2Event', [
+    'sensor_id', 'event_id', 'event_second', 'event_microsecond',
+    'signature_id', 'generator_id', 'signature_revision', 'classification_id', 'priority_id',
+    'ip_source', 'ip_destination', 'sport_itype', 'dport_icode',
+    'protocol', 'impact_flag', 'impact', 'blocked', 'mpls_label', 'vlan_id',
+])
+
+Unified2Packet = namedtuple('Unified2Packet', [
+    'sensor_id', 'event_id', 'event_second', 'packet_second', 'packet_microsecond',
+    'linktype', 'packet_length', 'packet_data',
+])
+
+# IP协议号 -> parse_line 使用的协议名
+PROTOCOL_NAMES = {1: "ICMP", 6: "TCP", 17: "UDP", 58: "ICMP"}
+
+SPOOL_FILE_RE = re.compile(r'^(?P<prefix>.+)\.(?P<stamp>\d+)$')
+
+
+def _format_ip(raw):
+    if len(raw) == 4:
+        return socket.inet_ntoa(raw)
+    return socket.inet_ntop(socket.AF_INET6, raw)
+
+
+class Unified2Reader:
+    """unified2 文件读取器
+
+    sid_msg: {(gid, sid): 告警描述}，classifications: {分类ID: 分类名称}，
+    用于补全二进制记录里没有的文字信息（可由 sid-msg.map / classification.config 得到）。
+    也可以直接传入 catalog（rule_catalog.RuleCatalog）：描述、分类取自目录，
+    严重程度覆盖表优先于事件中的优先级；每读一个文件前检查一次目录的源文件是否有变化。
+    """
+
+    def __init__(self, sid_msg=None, classifications=None, catalog=None):
+        self.sid_msg = sid_msg or {}
+        self.classifications = classifications or {}
+        self.severity_overrides = {}
+        self.catalog = catalog
+        if catalog is not None:
+            self._use_catalog()
+        self._last_second = None
+        self._last_timestamp = ""
+
+    def _use_catalog(self):
+        self.sid_msg = self.catalog.messages
+        self.classifications = self.catalog.classification_names
+        self.severity_overrides = self.catalog.overrides
+
+    def iter_records(self, path):
+        """逐条产出文件中的事件和数据包记录；末尾不完整的记录（文件仍在写入）会被忽略"""
+        if os.path.getsize(path) == 0:
+            return
+
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from self._iter_buffer(mm)
+
+    def _iter_buffer(self, buf, events_only=False):
+        """解析缓冲区中的记录；events_only=True 时只产出事件字段元组（不构造命名元组）"""
+        pos = 0
+        size = len(buf)
+        header_size = RECORD_HEADER.size
+        unpack_header = RECORD_HEADER.unpack_from
+
+        while pos + header_size <= size:
+            record_type, length = unpack_header(buf, pos)
+            body = pos + header_size
+            pos = body + length
+            if pos > size:
+                break
+
+            event_struct = EVENT_STRUCTS.get(record_type)
+            if event_struct is not None:
+                if length < event_struct.size:
+                    continue
+                fields = event_struct.unpack_from(buf, body)
+                if len(fields) == 17:
+                    fields += (0, 0)
+                else:
+                    fields = fields[:19]
+                yield fields if events_only else Unified2Event._make(fields)
+
+            elif record_type == UNIFIED2_PACKET and not events_only:
+                if length < PACKET_HEADER.size:
+                    continue
+                header = PACKET_HEADER.unpack_from(buf, body)
+                data_start = body + PACKET_HEADER.size
+                yield Unified2Packet(*header, buf[data_start:data_start + header[6]])
+
+            # 其他类型（如 extra data）跳过
+
+    def event_to_alert(self, event):
+        """把事件记录（Unified2Event 或同顺序的字段元组）转换为 parse_line 格式的告警字典
+
+        id 由调用方编号。
+        """
+        (_, _, event_second, _, signature_id, generator_id, signature_revision,
+         classification_id, priority_id, ip_source, ip_destination,
+         sport_itype, dport_icode, protocol) = event[:14]
+        alert_type = self.sid_msg.get((generator_id, signature_id), "Unknown Alert")
+        severity = self.severity_overrides.get((generator_id, signature_id)) or SEVERITY_MAP.get(priority_id, "MEDIUM")
+
+        # 同一秒内的事件共用格式化结果
+        if event_second != self._last_second:
+            self._last_second = event_second
+            self._last_timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event_second))
+
+        return {
+            "id": 0,
+            "timestamp": self._last_timestamp,
+            "source_ip": _format_ip(ip_source),
+            "source_port": sport_itype,
+            "destination_ip": _format_ip(ip_destination),
+            "destination_port": dport_icode,
+            "protocol": PROTOCOL_NAMES.get(protocol, "TCP"),
+            "alert_type": alert_type,
+            "classification": self.classifications.get(classification_id, "Unknown"),
+            "severity": severity,
+            "rule_id": f"{generator_id}:{signature_id}:{signature_revision}",
+            "raw_summary": alert_type[:100]
+        }
+
+    def iter_alerts(self, path, start_id=1):
+        """逐条产出文件中事件对应的告警字典"""
+        if os.path.getsize(path) == 0:
+            return
+
+        if self.catalog is not None and self.catalog.refresh():
+            self._use_catalog()
+
+        next_id = start_id
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for fields in self._iter_buffer(mm, events_only=True):
+                alert = self.event_to_alert(fields)
+                alert["id"] = next_id
+                next_id += 1
+                yield alert
+
+    def iter_spool(self, directory, prefix='snort.u2'):
+        """按时间戳后缀顺序读取 spool 目录下的全部 unified2 文件，连续编号产出告警"""
+        next_id = 1
+        for path in list_spool_files(directory, prefix):
+            for alert in self.iter_alerts(path, next_id):
+                next_id = alert["id"] + 1
+                yield alert
+
+
+def list_spool_files(directory, prefix='snort.u2'):
+    """列出 spool 目录下的 <prefix>.<时间戳> 文件，按时间戳排序"""
+    files = []
+    for name in os.listdir(directory):
+        match = SPOOL_FILE_RE.match(name)
+        if match and match.group('prefix') == prefix:
+            files.append((int(match.group('stamp')), os.path.join(directory, name)))
+    return [path for _, path in sorted(files)]
+
+
+class Unified2Writer:
+    """unified2 文件写入器，用于生成测试和基准数据"""
+
+    def __init__(self, path):
+        self.f = open(path, 'wb')
+
+    def write_event(self, event_id, event_second, signature_id, source_ip, destination_ip,
+                    source_port=0, destination_port=0, protocol=6, generator_id=1,
+                    signature_revision=1, classification_id=0, priority_id=3,
+                    sensor_id=0, event_microsecond=0, v2=False):
+        """写入一条事件记录；IP 为字符串，IPv6 地址自动使用 IPv6 事件类型"""
+        ipv6 = ':' in source_ip or ':' in destination_ip
+        family = socket.AF_INET6 if ipv6 else socket.AF_INET
+        if ipv6:
+            record_type = UNIFIED2_IDS_EVENT_IPV6_V2 if v2 else UNIFIED2_IDS_EVENT_IPV6
+        else:
+            record_type = UNIFIED2_IDS_EVENT_V2 if v2 else UNIFIED2_IDS_EVENT
+
+        fields = [sensor_id, event_id, event_second, event_microsecond, signature_id,
+                  generator_id, signature_revision, classification_id, priority_id,
+                  _pack_ip(family, source_ip), _pack_ip(family, destination_ip),
+                  source_port, destination_port, protocol, 0, 0, 0]
+        if v2:
+            fields += [0, 0, 0]
+        self._write_record(record_type, EVENT_STRUCTS[record_type].pack(*fields))
+
+    def write_packet(self, event_id, event_second, packet_data, sensor_id=0, linktype=1):
+        """写入一条数据包记录"""
+        header = PACKET_HEADER.pack(sensor_id, event_id, event_second, event_second, 0,
+                                    linktype, len(packet_data))
+        self._write_record(UNIFIED2_PACKET, header + packet_data)
+
+    def _write_record(self, record_type, body):
+        self.f.write(RECORD_HEADER.pack(record_type, len(body)))
+        self.f.write(body)
+
+    def close(self):
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _pack_ip(family, ip):
+    if family == socket.AF_INET6 and ':' not in ip:
+        ip = '::ffff:' + ip
+    return socket.inet_pton(family, ip)
+
+
+def main():
+    """主函数 - 读取 spool 目录中的 unified2 文件并打印统计"""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    spool_dir = os.path.join(os.path.dirname(script_dir), 'data', 'unified2')
+
+    if not os.path.isdir(spool_dir):
+        print(f" spool 目录不存在: {spool_dir}")
+        return
+
+    count = 0
+    severity_count = {}
+    for alert in Unified2Reader().iter_spool(spool_dir):
+        count += 1
+        severity_count[alert["severity"]] = severity_count.get(alert["severity"], 0) + 1
+
+    print(f" 共读取 {count} 条告警")
+    for sev, n in severity_count.items():
+        print(f"    {sev}: {n} 条")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试告警数据模型"""
+
+import sys
+import os
+import json
+import random
+import tracemalloc
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import Alert, AlertBatch
+from api_data_generator import APIDataGenerator
+from parse_snort_logs import SnortLogParser
+
+
+def generate_parsed_alerts(count, seed=1):
+    """生成固定种子的原始日志并解析，得到 parse_line 格式的告警"""
+    rng = random.Random(seed)
+    classifications = ["Web Application Attack", "Attempted Information Leak", "Misc activity"]
+    entries = []
+
+    for i in range(count):
+        entries.append(f'''[**] [1:{1000000 + i % 300}:1] Attack Type {i % 40} [**]
+[Classification: {rng.choice(classifications)}] [Priority: {rng.randint(1, 4)}]
+02/{rng.randint(1, 28):02d}-{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.123456 10.{rng.randint(0, 255)}.{rng.randint(1, 255)}.{rng.randint(1, 255)}:{rng.randint(1024, 65535)} -> 192.168.1.{rng.randint(1, 20)}:{rng.choice([80, 443, 22])}
+{rng.choice(["TCP", "UDP", "ICMP"])} TTL:64''')
+
+    alerts = SnortLogParser.parse_many(entries)
+    for i, alert in enumerate(alerts):
+        alert["id"] = i + 1
+    return alerts
+
+
+class TestAlertModel(unittest.TestCase):
+    """告警数据模型测试类"""
+
+    def test_batch_roundtrip(self):
+        """测试列式容器与字典格式无损互转"""
+        alerts = generate_parsed_alerts(500)
+        batch = AlertBatch.from_dicts(alerts)
+
+        self.assertEqual(len(batch), 500)
+        self.assertEqual(list(batch.iter_dicts()), alerts)
+        self.assertEqual(batch.get_dict(-1), alerts[-1])
+        self.assertEqual(batch[10].to_dict(), alerts[10])
+        print(" 列式容器往返测试通过")
+
+    def test_irregular_values_roundtrip(self):
+        """测试非标准值、缺失字段和额外字段也能无损保存"""
+        alerts = APIDataGenerator.generate_alerts_data(20)
+        alerts[1]["timestamp"] = "02/30-12:00:00.000000"   # parse_line 的原始时间回退
+        alerts[2]["source_ip"] = "::1"
+        alerts[3]["source_port"] = 99999
+        alerts[4]["payload"] = "SELECT * FROM users WHERE 1=1"
+        alerts[5]["tags"] = ["sqli", "web"]
+        alerts[6]["flag"] = True
+        alerts[7]["flag"] = 1
+        del alerts[8]["severity"]
+        alerts[9]["timestamp"] = "0999-01-01 00:00:00"     # 1000年以前的年份需补零
+        alerts[10]["timestamp"] = "0001-01-01 00:00:00"
+
+        batch = AlertBatch.from_dicts(alerts)
+        restored = list(batch.iter_dicts())
+
+        self.assertEqual(restored, alerts)
+        self.assertIs(restored[6]["flag"], True)
+        self.assertNotIn("payload", restored[0])
+        self.assertEqual(json.dumps(restored), json.dumps(alerts))
+        print(" 非标准值往返测试通过")
+
+    def test_slotted_alert(self):
+        """测试 Alert 记录类型"""
+        data = generate_parsed_alerts(1)[0]
+        alert = Alert.from_dict(data)
+
+        self.assertFalse(hasattr(alert, '__dict__'))
+        self.assertEqual(alert.to_dict(), data)
+        self.assertEqual(Alert(**data).to_dict(), data)
+        print(" Alert 记录类型测试通过")
+
+    def test_memory_reduction(self):
+        """测试列式容器比字典列表至少节省5倍内存"""
+        text = json.dumps(generate_parsed_alerts(10000))
+
+        tracemalloc.start()
+        alerts = json.loads(text)
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        batch = AlertBatch.from_dicts(alerts)
+        batch_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        ratio = dict_bytes / batch_bytes
+        self.assertGreaterEqual(ratio, 5)
+        print(f" 内存测试通过: 字典 {dict_bytes / 1e6:.1f}MB, 列式 {batch_bytes / 1e6:.1f}MB, 节省 {ratio:.1f}x")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试告警输出"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import alert_sinks
+from alert_sinks import JsonArraySink, NdjsonSink, open_sink, write_json_document
+from api_data_generator import APIDataGenerator
+
+
+class TestAlertSinks(unittest.TestCase):
+    """告警输出测试类"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.records = APIDataGenerator.generate_alerts_data(50)
+        self.records[0]["alert_type"] = "SQL注入 \"quoted\"\n\u2028"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def read(self, name):
+        with open(self.path(name), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_json_array_formats(self):
+        """测试紧凑格式和缩进格式的输出内容"""
+        for encoder in ("json", "orjson") if alert_sinks.orjson else ("json",):
+            count = JsonArraySink(self.path('compact.json'), encoder=encoder, flush_bytes=100).write(iter(self.records))
+            self.assertEqual(count, 50)
+            self.assertEqual(json.loads(self.read('compact.json')), self.records)
+
+        self.assertEqual(self.read('compact.json'),
+                         json.dumps(self.records, ensure_ascii=False, separators=(',', ':')))
+
+        JsonArraySink(self.path('pretty.json'), indent=2).write(self.records)
+        self.assertEqual(self.read('pretty.json'), json.dumps(self.records, indent=2, ensure_ascii=False))
+
+        JsonArraySink(self.path('empty.json')).write([])
+        self.assertEqual(self.read('empty.json'), '[]')
+        print(" JSON数组输出测试通过")
+
+    def test_ndjson_append(self):
+        """测试NDJSON追加写入"""
+        sink = open_sink(self.path('out/alerts.ndjson'), append=True)
+        self.assertIsInstance(sink, NdjsonSink)
+        sink.write(self.records[:20])
+        sink.write(iter(self.records[20:]))
+
+        # 只能按 \n 分行：JSON 不转义 \u2028，str.splitlines 会把它当成换行
+        lines = self.read('out/alerts.ndjson').split('\n')
+        self.assertEqual(lines.pop(), '')
+        self.assertEqual([json.loads(line) for line in lines], self.records)
+        print(" NDJSON追加测试通过")
+
+    def test_atomic_replace(self):
+        """测试写出失败时原文件保持不变且不留临时文件"""
+        write_json_document({"status": "old"}, self.path('alerts.json'))
+
+        def failing():
+            yield self.records[0]
+            raise RuntimeError("解析中断")
+
+        with self.assertRaises(RuntimeError):
+            JsonArraySink(self.path('alerts.json'), flush_bytes=1).write(failing())
+
+        self.assertEqual(json.loads(self.read('alerts.json')), {"status": "old"})
+        self.assertEqual(os.listdir(self.tmp_dir.name), ['alerts.json'])
+
+        # 替换后的文件权限与普通 open() 创建的相同（套用 umask）
+        if os.name == 'posix':
+            old_umask = os.umask(0o027)
+            try:
+                write_json_document({"status": "new"}, self.path('alerts.json'))
+            finally:
+                os.umask(old_umask)
+            self.assertEqual(os.stat(self.path('alerts.json')).st_mode & 0o777, 0o640)
+        print(" 原子替换测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试告警存储与查询"""
+
+import sys
+import os
+import ipaddress
+import random
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import alert_store
+from alert_model import epoch_to_timestamp, timestamp_to_epoch
+from alert_store import AlertStore
+
+BASE = 1770201000
+
+
+def random_alerts(count, seed=1):
+    """大致按时间顺序、夹带乱序和无法解析时间戳的告警"""
+    rng = random.Random(seed)
+    alerts = []
+    for i in range(count):
+        epoch = BASE + i * 10 + rng.randint(-300, 30)
+        alerts.append({
+            "id": i + 1,
+            "timestamp": epoch_to_timestamp(epoch) if rng.random() > 0.02 else "02/30-12:00:00.000000",
+            "source_ip": f"10.0.0.{rng.randint(1, 30)}",
+            "destination_port": rng.choice([22, 80, 443]),
+            "alert_type": rng.choice(["DDoS", "XSS", "Port Scan"]),
+            "severity": rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW"]),
+        })
+    return alerts
+
+
+class TestAlertStore(unittest.TestCase):
+    """告警存储测试类"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.alerts = random_alerts(3000)
+        cls.store = AlertStore()
+        cls.store.extend(cls.alerts)
+
+    def expected(self, start=None, end=None, **filters):
+        """暴力实现：全量过滤后按 (时间, 写入顺序) 从新到旧排序"""
+        rows = []
+        for row, alert in enumerate(self.alerts):
+            epoch = timestamp_to_epoch(alert["timestamp"]) or 0
+            if start is not None and epoch < start or end is not None and epoch > end:
+                continue
+            if all(alert[field] == value for field, value in filters.items()):
+                rows.append((epoch, row))
+        return [self.alerts[row] for _, row in sorted(rows, reverse=True)]
+
+    def test_filters_and_pages(self):
+        """测试各种过滤条件组合下的分页结果和总数"""
+        rng = random.Random(2)
+        for _ in range(200):
+            filters = {}
+            if rng.random() < 0.5:
+                filters["severity"] = rng.choice(["CRITICAL", "LOW"])
+            if rng.random() < 0.5:
+                filters["alert_type"] = rng.choice(["DDoS", "XSS"])
+            if rng.random() < 0.3:
+                filters["source_ip"] = f"10.0.0.{rng.randint(1, 31)}"
+            if rng.random() < 0.3:
+                filters["destination_port"] = rng.choice([22, 443])
+            start = BASE + rng.randint(0, 30000) if rng.random() < 0.5 else None
+            end = BASE + rng.randint(0, 30000) if rng.random() < 0.3 else None
+            page, limit = rng.randint(1, 4), rng.choice([1, 7, 20])
+
+            expected = self.expected(start, end, **filters)
+            result = self.store.query(page=page, limit=limit, start_time=start, end_time=end, **filters)
+
+            self.assertEqual(result["alerts"], expected[(page - 1) * limit:page * limit], filters)
+            self.assertEqual(result["pagination"]["total"], len(expected))
+            self.assertEqual(result["pagination"]["pages"], -(-len(expected) // limit))
+        print(" 过滤分页测试通过")
+
+    def test_cursor_pagination(self):
+        """测试游标翻页能不重不漏地遍历结果"""
+        expected = self.expected(severity="HIGH", start=BASE + 5000)
+        start_time = epoch_to_timestamp(BASE + 5000)
+
+        seen, cursor = [], None
+        while True:
+            result = self.store.query(limit=50, cursor=cursor, severity="HIGH", start_time=start_time)
+            seen.extend(result["alerts"])
+            cursor = result["pagination"]["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, expected)
+
+        # 逐行检查的条件排除了剩下的全部行时不返回游标
+        store = AlertStore()
+        store.extend({"id": i + 1, "timestamp": epoch_to_timestamp(BASE + i),
+                      "source_ip": "10.0.0.1" if i >= 5 else "192.168.0.1"} for i in range(10))
+        result = store.query(limit=5, source_subnet="10.0.0.0/8")
+        self.assertEqual(len(result["alerts"]), 5)
+        self.assertEqual(result["pagination"]["total"], 5)
+        self.assertIsNone(result["pagination"]["next_cursor"])
+        print(" 游标翻页测试通过")
+
+    def test_subnet_filters(self):
+        """测试子网过滤（索引驱动和逐行检查两种计划）"""
+        rng = random.Random(5)
+        alerts = []
+        for i in range(3000):
+            alert = {
+                "id": i + 1,
+                "timestamp": epoch_to_timestamp(BASE + i * 10),
+                "source_ip": rng.choice([f"10.{rng.randint(0, 3)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                                         f"172.16.{rng.randint(0, 31)}.{rng.randint(1, 254)}",
+                                         f"203.0.113.{rng.randint(1, 254)}", "2001:db8::1", "unknown"]),
+                "destination_ip": f"192.168.{rng.randint(0, 3)}.{rng.randint(1, 254)}",
+                "severity": rng.choice(["CRITICAL", "LOW"]),
+            }
+            if rng.random() < 0.05:
+                del alert["destination_ip"]
+            alerts.append(alert)
+        store = AlertStore()
+        store.extend(alerts)
+
+        def inside(ip, cidrs):
+            try:
+                address = ipaddress.ip_address(ip)
+            except ValueError:
+                return False
+            return any(address in ipaddress.ip_network(cidr) for cidr in cidrs.split(','))
+
+        cases = [
+            {"source_subnet": "10.0.0.0/8", "destination_subnet": "192.168.1.0/24"},
+            {"source_subnet": "203.0.113.7/32"},
+            {"source_subnet": "10.1.2.0/24,10.2.0.0/16", "severity": "LOW"},
+            {"source_subnet": "2001:db8::/32"},
+            {"subnet": "192.168.3.0/24"},
+            {"subnet": "172.16.0.0/12,192.168.0.0/23"},
+            {"exclude_subnet": "10.0.0.0/8,192.168.0.0/24"},
+            {"destination_subnet": "192.168.2.128/25", "exclude_subnet": "172.16.0.0/12"},
+        ]
+        for filters in cases:
+            expected = []
+            for alert in reversed(alerts):
+                src, dst = alert["source_ip"], alert.get("destination_ip", "")
+                if ("source_subnet" in filters and not inside(src, filters["source_subnet"])
+                        or "destination_subnet" in filters and not inside(dst, filters["destination_subnet"])
+                        or "subnet" in filters and not (inside(src, filters["subnet"]) or inside(dst, filters["subnet"]))
+                        or "exclude_subnet" in filters and (inside(src, filters["exclude_subnet"])
+                                                            or inside(dst, filters["exclude_subnet"]))
+                        or "severity" in filters and alert["severity"] != filters["severity"]):
+                    continue
+                expected.append(alert)
+
+            result = store.query(limit=30, page=2, **filters)
+            self.assertEqual(result["pagination"]["total"], len(expected), filters)
+            self.assertEqual(result["alerts"], expected[30:60], filters)
+
+        with self.assertRaises(ValueError):
+            store.query(subnet="10.0.0.0/33")
+        with self.assertRaises(ValueError):
+            store.query(subnet=" , ")
+        print(" 子网过滤测试通过")
+
+    def test_full_text_search(self):
+        """测试全文检索与时间、严重程度条件组合（索引驱动和逐行检查两种计划）"""
+        rng = random.Random(6)
+        words = ["union", "select", "script", "jndi", "ldap", "passwd", "admin", "login"]
+        alerts = []
+        for i in range(3000):
+            alert = {
+                "id": i + 1,
+                "timestamp": epoch_to_timestamp(BASE + i * 10 + rng.randint(-100, 0)),
+                "alert_type": rng.choice(["SQL Injection Attempt", "XSS Attack", "Port Scan", "Brute Force"]),
+                "severity": rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW"]),
+            }
+            if rng.random() < 0.3:
+                alert["payload"] = " ".join(rng.choice(words) for _ in range(4))
+            alerts.append(alert)
+        store = AlertStore()
+        store.extend(alerts)
+
+        def matches(alert, clauses):
+            text = f"{alert['alert_type']}\n{alert.get('payload', '')}".lower()
+            return any(all(term in text for term in clause) for clause in clauses)
+
+        start, end = BASE + 5000, BASE + 20000
+        cases = [
+            ("sql", [["sql"]], {}),
+            ("union jndi", [["union", "jndi"]], {"severity": "LOW"}),
+            ('"union select"', [["union select"]], {"start_time": start, "end_time": end}),
+            ("xss OR passwd", [["xss"], ["passwd"]], {"severity": "HIGH", "start_time": start}),
+            ("adm* scan", [["adm", "scan"]], {}),
+        ]
+        for query, clauses, filters in cases:
+            expected = []
+            for row, alert in enumerate(alerts):
+                epoch = timestamp_to_epoch(alert["timestamp"])
+                if ("start_time" in filters and epoch < filters["start_time"]
+                        or "end_time" in filters and epoch > filters["end_time"]
+                        or "severity" in filters and alert["severity"] != filters["severity"]
+                        or not matches(alert, clauses)):
+                    continue
+                expected.append((epoch, row))
+            expected = [alerts[row] for _, row in sorted(expected, reverse=True)]
+
+            result = store.query(q=query, limit=20, page=2, **filters)
+            self.assertEqual(result["pagination"]["total"], len(expected), query)
+            self.assertEqual(result["alerts"], expected[20:40], query)
+
+        self.assertEqual(store.query(q="nothing")["pagination"]["total"], 0)
+        with self.assertRaises(ValueError):
+            store.query(q="***")
+        print(" 全文检索测试通过")
+
+    def test_count_cache_bounded(self):
+        """测试总数缓存有上限，没有新写入时也不会随查询条件无限增长"""
+        totals = [self.store.query(severity="HIGH", alert_type="XSS", start_time=BASE + offset)["pagination"]["total"]
+                  for offset in range(alert_store.COUNT_CACHE_SIZE * 2)]
+        self.assertEqual(len(self.store._count_cache), alert_store.COUNT_CACHE_SIZE)
+        # 被挤出缓存的条件重新计数，结果不变
+        self.assertEqual(self.store.query(severity="HIGH", alert_type="XSS", start_time=BASE)["pagination"]["total"],
+                         totals[0])
+        self.assertEqual(totals[0], len(self.expected(start=BASE, severity="HIGH", alert_type="XSS")))
+        print(" 总数缓存上限测试通过")
+
+    def test_invalid_parameters(self):
+        """测试非法参数和无匹配值"""
+        self.assertEqual(self.store.query(source_ip="1.2.3.4")["pagination"]["total"], 0)
+        with self.assertRaises(ValueError):
+            self.store.query(start_time="yesterday")
+        with self.assertRaises(ValueError):
+            self.store.query(protocol="TCP")
+        with self.assertRaises(ValueError):
+            self.store.query(cursor="abc")
+        print(" 非法参数测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
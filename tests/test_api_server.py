@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试后端 API 服务"""
+
+import sys
+import os
+import json
+import random
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+from alert_model import epoch_to_timestamp
+from server import AlertService, create_app
+
+BASE = 1770201000
+
+
+def make_alerts(start, count, seed):
+    rng = random.Random(seed)
+    return [{
+        "id": start + i,
+        "timestamp": epoch_to_timestamp(BASE + (start + i) * 30),
+        "source_ip": f"10.0.0.{rng.randint(1, 20)}",
+        "source_port": rng.randint(1024, 65535),
+        "destination_ip": "192.168.1.1",
+        "destination_port": rng.choice([22, 80, 443]),
+        "protocol": "TCP",
+        "alert_type": rng.choice(["DDoS", "XSS", "Port Scan"]),
+        "classification": "Misc activity",
+        "severity": rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW"]),
+        "rule_id": "1:1000001:1",
+        "raw_summary": "test",
+    } for i in range(count)]
+
+
+class TestApiServer(unittest.TestCase):
+    """API服务测试类"""
+
+    def setUp(self):
+        self.service = AlertService()
+        self.service.add_alerts(make_alerts(1, 300, seed=1))
+        self.app = create_app(self.service, cache_size=8)
+        self.client = self.app.test_client()
+
+    def test_alerts_endpoint(self):
+        """测试过滤分页查询和参数校验"""
+        response = self.client.get("/api/alerts?severity=HIGH&destination_port=443&limit=5&page=2")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["status"], "success")
+        expected = self.service.store.query(severity="HIGH", destination_port=443, limit=5, page=2)
+        self.assertEqual(body["data"], expected)
+
+        response = self.client.get("/api/alerts?limit=abc")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["status"], "error")
+        self.assertEqual(self.client.get("/api/alerts?start_time=yesterday").status_code, 400)
+
+        response = self.client.get("/api/alerts?source_subnet=10.0.0.0/29&destination_subnet=192.168.1.0/24")
+        expected = self.service.store.query(source_subnet="10.0.0.0/29", destination_subnet="192.168.1.0/24")
+        self.assertEqual(response.get_json()["data"], expected)
+        self.assertGreater(expected["pagination"]["total"], 0)
+        self.assertEqual(self.client.get("/api/alerts?subnet=10.0.0.0/99").status_code, 400)
+
+        response = self.client.get("/api/alerts?q=xss%20OR%20ddos&severity=HIGH")
+        expected = self.service.store.query(q="xss OR ddos", severity="HIGH")
+        self.assertEqual(response.get_json()["data"], expected)
+        self.assertGreater(expected["pagination"]["total"], 0)
+        self.assertEqual(self.client.get("/api/alerts?q=%2A%2A").status_code, 400)
+
+        stats = self.client.get("/api/stats").get_json()["data"]
+        self.assertEqual(stats["total_alerts"], 300)
+        self.assertEqual(sum(stats["severity_distribution"].values()), 300)
+        print(" 接口查询测试通过")
+
+    def test_conditional_get(self):
+        """测试 ETag / Last-Modified 条件请求"""
+        first = self.client.get("/api/alerts?limit=10")
+        etag = first.headers["ETag"]
+        self.assertIn("Last-Modified", first.headers)
+
+        self.assertEqual(self.client.get("/api/alerts?limit=10", headers={"If-None-Match": etag}).status_code, 304)
+        self.assertEqual(self.client.get("/api/alerts?limit=10",
+                                         headers={"If-Modified-Since": first.headers["Last-Modified"]}).status_code, 304)
+        # 参数顺序、显式写出默认值不影响缓存键和 ETag
+        self.assertEqual(self.client.get("/api/alerts?page=1&limit=10",
+                                         headers={"If-None-Match": etag}).status_code, 304)
+        # 不同查询的 ETag 不同
+        self.assertNotEqual(self.client.get("/api/alerts?limit=11").headers["ETag"], etag)
+
+        self.service.add_alerts(make_alerts(301, 1, seed=2))
+        second = self.client.get("/api/alerts?limit=10", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers["ETag"], etag)
+        self.assertEqual(second.get_json()["data"]["alerts"][0]["id"], 301)
+        print(" 条件请求测试通过")
+
+    def test_renumber_followed_alerts(self):
+        """测试跟踪到的告警从已有的最大 id 往后编号"""
+        self.assertEqual(self.service.last_id, 300)
+        followed = make_alerts(1, 3, seed=3)
+        followed[1]["id"] = 0   # 关联告警的 id 固定为0
+        self.service.add_alerts(followed, renumber=True)
+        self.assertEqual([alert["id"] for alert in followed], [301, 302, 303])
+
+        ids = [alert["id"] for alert in self.service.query_alerts(limit=1000)["alerts"]]
+        self.assertEqual(len(ids), len(set(ids)))
+        print(" 跟踪告警重新编号测试通过")
+
+    def test_polling_load(self):
+        """模拟前端轮询：缓存命中、写入后失效，响应始终与实时查询一致"""
+        rng = random.Random(3)
+        queries = ["/api/alerts", "/api/alerts?severity=CRITICAL", "/api/alerts?alert_type=XSS&limit=50",
+                   "/api/alerts?source_ip=10.0.0.7", "/api/stats"]
+        etags = {}
+        next_id = 301
+        not_modified = 0
+
+        for step in range(600):
+            if step % 100 == 99:
+                self.service.add_alerts(make_alerts(next_id, 20, seed=step))
+                next_id += 20
+
+            url = rng.choice(queries)
+            headers = {"If-None-Match": etags[url]} if url in etags and rng.random() < 0.7 else {}
+            response = self.client.get(url, headers=headers)
+
+            if response.status_code == 304:
+                not_modified += 1
+                continue
+            self.assertEqual(response.status_code, 200)
+            etags[url] = response.headers["ETag"]
+            if url.startswith("/api/alerts"):
+                args = dict(arg.split("=") for arg in url.partition("?")[2].split("&") if arg)
+                self.assertEqual(json.loads(response.data)["data"], self.service.store.query(**args))
+
+        cache = self.app.config["RESPONSE_CACHE"]
+        self.assertGreater(not_modified, 200)
+        self.assertGreater(cache.hits, 0)
+        self.assertLessEqual(len(cache.entries), 8)
+        print(f" 轮询测试通过: 304 {not_modified} 次, 缓存命中 {cache.hits} 次")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试解析器基准测试工具"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from benchmark_parser import BENCHMARKS, compare, main, parse_size, run_benchmarks, size_label
+
+
+class TestBenchmarkParser(unittest.TestCase):
+    """基准测试工具测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sizes(self):
+        """测试规模参数"""
+        self.assertEqual(parse_size("10k"), 10000)
+        self.assertEqual(parse_size("1M"), 1000000)
+        self.assertEqual(parse_size("2500"), 2500)
+        self.assertEqual(size_label(10000000), "10m")
+        self.assertEqual(size_label(2500), "2500")
+        with self.assertRaises(ValueError):
+            parse_size("lots")
+        print(" 规模参数测试通过")
+
+    def test_run_benchmarks(self):
+        """测试各项基准测试的结果字段"""
+        report = run_benchmarks(["2k"], corpus_dir=self.tmp.name, isolate=False)
+        self.assertEqual(set(report["results"]), {f"{name}/2k" for name in BENCHMARKS})
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, "corpus-2k-42.log")))
+
+        for key, result in report["results"].items():
+            self.assertEqual(result["records"], 2000, key)
+            self.assertGreater(result["records_per_sec"], 0)
+            self.assertGreater(result["mb_per_sec"], 0)
+            self.assertGreater(result["peak_rss_mb"], 0)
+        self.assertLessEqual(report["results"]["parse_line/2k"]["p50_us"],
+                             report["results"]["parse_line/2k"]["p99_us"])
+        self.assertIsNone(report["results"]["stream_file/2k"]["p99_us"])
+        print(" 基准测试结果测试通过")
+
+    def test_compare_with_baseline(self):
+        """测试与基线比较：超过阈值才算回退"""
+        baseline = {"results": {"parse_line/10k": {"records_per_sec": 1000, "p99_us": 50, "peak_rss_mb": 40},
+                                "stats/10k": {"records_per_sec": 1000, "p99_us": 10, "peak_rss_mb": 40}}}
+        current = {"results": {"parse_line/10k": {"records_per_sec": 850, "p99_us": 52, "peak_rss_mb": 40},
+                               "stats/10k": {"records_per_sec": 1200, "p99_us": None, "peak_rss_mb": 45},
+                               "serialize/10k": {"records_per_sec": 1, "p99_us": 1, "peak_rss_mb": 1}}}
+        regressions = compare(current, baseline, threshold=0.1)
+        self.assertEqual([(r["benchmark"], r["metric"]) for r in regressions],
+                         [("parse_line/10k", "records_per_sec"), ("stats/10k", "peak_rss_mb")])
+        self.assertEqual(compare(current, baseline, threshold=0.2), [])
+        print(" 基线比较测试通过")
+
+    def test_cli_isolated(self):
+        """测试命令行：子进程隔离运行、写出结果、对比基线的返回码"""
+        output = os.path.join(self.tmp.name, "result.json")
+        baseline = os.path.join(self.tmp.name, "baseline.json")
+        args = ["--sizes", "1k", "--benchmarks", "parse_line", "--corpus-dir", self.tmp.name, "--output", output]
+        self.assertEqual(main(args + ["--save-baseline", baseline]), 0)
+        with open(output, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertTrue(report["meta"]["isolated"])
+        self.assertEqual(report["results"]["parse_line/1k"]["records"], 1000)
+
+        # 把基线吞吐量改成10倍，当前结果必然回退
+        report["results"]["parse_line/1k"]["records_per_sec"] *= 10
+        with open(baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f)
+        self.assertEqual(main(args + ["--baseline", baseline]), 1)
+        print(" 命令行测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试端口扫描 / DDoS 关联检测"""
+
+import sys
+import os
+import random
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import epoch_to_timestamp, timestamp_to_epoch
+from correlation import (DDOS_RULE_ID, SCAN_RULE_ID, SPARSE_LIMIT, CorrelationEngine, HyperLogLog,
+                         SlidingDistinctCounter)
+
+BASE = timestamp_to_epoch("2025-02-04 01:30:00")
+
+
+def make_alert(offset, source_ip="192.168.1.100", destination_ip="10.0.0.5", port=80):
+    return {
+        "timestamp": epoch_to_timestamp(BASE + offset),
+        "source_ip": source_ip,
+        "destination_ip": destination_ip,
+        "destination_port": port,
+        "protocol": "TCP",
+        "rule_id": "1:1000001:1",
+    }
+
+
+class TestCorrelation(unittest.TestCase):
+    """关联检测测试类"""
+
+    def test_hyperloglog(self):
+        """测试基数估计误差和合并"""
+        for count in [10, 100, 1000, 20000]:
+            counter = HyperLogLog()
+            for value in range(count):
+                counter.add(value)
+            self.assertLess(abs(counter.estimate() / count - 1), 0.3, count)
+
+        left, right = HyperLogLog(), HyperLogLog()
+        for value in range(3000):
+            (left if value % 2 else right).add(f"10.0.{value >> 8}.{value & 255}")
+            left.add(f"10.0.{value >> 8}.{value & 255}" if value < 500 else "same")
+        self.assertLess(abs(len(left.merge(right)) / 3000 - 1), 0.3)
+        with self.assertRaises(ValueError):
+            left.merge(HyperLogLog(precision=8))
+        print(" HyperLogLog测试通过")
+
+    def test_sliding_counter(self):
+        """测试精确模式、转为寄存器后的估计和窗口滑动"""
+        counter = SlidingDistinctCounter(window=60)
+        for port in range(SPARSE_LIMIT):
+            self.assertEqual(counter.add(port, BASE + port), port + 1)
+        self.assertEqual(counter.add(0, BASE + 20), SPARSE_LIMIT)
+        # 旧值过期后仍然是精确计数
+        self.assertEqual(counter.add(100, BASE + 70), 7)
+        self.assertIsNone(counter.panes)
+
+        rng = random.Random(5)
+        for second in range(70, 400):
+            for _ in range(10):
+                estimate = counter.add(rng.randint(0, 10 ** 9), BASE + second)
+        self.assertIsNotNone(counter.panes)
+        # 覆盖60~75秒，每秒10个不同值
+        self.assertTrue(600 * 0.75 < estimate < 750 * 1.25, estimate)
+
+        # 长时间空闲后只剩新值；早于窗口的乱序值被忽略
+        self.assertLess(counter.add("late", BASE + 1000), 5)
+        self.assertLess(counter.add("old", BASE + 500), 5)
+        print(" 滑动窗口计数测试通过")
+
+    def test_port_scan(self):
+        """测试端口扫描检测、静默期和正常流量不误报"""
+        engine = CorrelationEngine(window=60, scan_threshold=20, ddos_threshold=None)
+        meta = []
+        for second in range(30):
+            meta += engine.process(make_alert(second, source_ip="172.16.0.9", port=1000 + second))
+            meta += engine.process(make_alert(second, source_ip="192.168.1.20", port=rng_port(second)))
+        self.assertEqual(len(meta), 1)
+        self.assertEqual(meta[0]["rule_id"], SCAN_RULE_ID)
+        self.assertEqual(meta[0]["source_ip"], "172.16.0.9")
+        self.assertEqual(meta[0]["timestamp"], epoch_to_timestamp(BASE + 19))
+        self.assertGreaterEqual(meta[0]["distinct_ports"], 20)
+
+        # 静默期过后仍在扫描则再报一次；合成告警不参与统计
+        meta = [output for second in range(30, 100)
+                for output in engine.process(make_alert(second, source_ip="172.16.0.9", port=second * 7))]
+        self.assertEqual([alert["timestamp"] for alert in meta], [epoch_to_timestamp(BASE + 79)])
+        self.assertEqual(engine.process(meta[0]), [])
+        self.assertEqual(engine.process(dict(make_alert(0), timestamp="N/A")), [])
+        print(" 端口扫描检测测试通过")
+
+    def test_ddos_bounded_memory(self):
+        """测试伪造源IP的 DDoS：能检测到，跟踪的键数和内存有上限"""
+        engine = CorrelationEngine(window=60, scan_threshold=20, ddos_threshold=500, max_keys=1000)
+        rng = random.Random(6)
+        alerts = [make_alert(index // 200, source_ip=f"{rng.randint(1, 223)}.{rng.randint(0, 255)}."
+                                                     f"{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+                  for index in range(20000)]
+        output = list(engine.correlate(alerts))
+        meta = [alert for alert in output if alert["rule_id"] == DDOS_RULE_ID]
+        self.assertEqual(len(output), len(alerts) + len(meta))
+        # 100秒的洪泛：第一次在约500个源时报出，60秒后再报一次
+        self.assertEqual(len(meta), 2)
+        self.assertEqual(meta[0]["destination_ip"], "10.0.0.5")
+        self.assertLess(timestamp_to_epoch(meta[0]["timestamp"]) - BASE, 5)
+        self.assertFalse(any(alert["rule_id"] == SCAN_RULE_ID for alert in output))
+
+        self.assertLessEqual(len(engine.detectors["scan"].trackers), 1000)
+        self.assertGreater(engine.detectors["scan"].evicted, 0)
+        self.assertEqual(engine.tracked_keys(), 1001)
+        self.assertLess(engine.memory_usage(), 100000)
+        print(" DDoS检测和内存上限测试通过")
+
+
+def rng_port(second):
+    # 正常客户端只访问少数几个端口
+    return [80, 443, 8080][second % 3]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,9 +8,20 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 
 import unittest
 import json
+import tempfile
+from collections import Counter
+
+import generate_snort_logs
+from generate_snort_logs import SnortLogGenerator
+from parse_snort_logs import SnortLogParser
 
 class TestDataGenerator(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # 导入模块不再生成文件，先生成示例数据集
+        generate_snort_logs.main([])
+
     def test_generator_import(self):
         """测试能否导入生成器"""
         try:
@@ -87,6 +98,40 @@ class TestDataGenerator(unittest.TestCase):
         
         print(f" 统计数据完整: 总记录数={total}, 严重程度分布={severity}")
 
+    def test_load_generator(self):
+        """测试压力测试日志生成：条数精确、可解析、按时间排序、同种子输出相同"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'load.log')
+            records, size = SnortLogGenerator(30000, seed=7, duration=3600).write(path)
+            self.assertEqual(records, 30000)
+            self.assertEqual(size, os.path.getsize(path))
+
+            alerts = list(SnortLogParser.iter_alerts(path))
+            self.assertEqual(len(alerts), 30000)
+            self.assertNotIn('Unknown Alert', {alert['alert_type'] for alert in alerts})
+            timestamps = [alert['timestamp'] for alert in alerts]
+            self.assertEqual(timestamps, sorted(timestamps))
+            self.assertEqual(timestamps[0][5:16], '02-04 00:00')
+
+            # 攻击源IP集中在少数IP上，且有端口扫描突发事件
+            top_ip, top_count = Counter(alert['source_ip'] for alert in alerts).most_common(1)[0]
+            self.assertGreater(top_count, 30000 * 0.05)
+            scan_ports = Counter(alert['destination_port'] for alert in alerts if alert['alert_type'] == 'Port Scan')
+            self.assertGreater(len(scan_ports), 8)
+            source_ports = [alert['source_port'] for alert in alerts]
+            self.assertGreaterEqual(min(source_ports), 32768)
+            self.assertLessEqual(max(source_ports), 65535)
+
+            with open(path, 'rb') as f:
+                first = f.read()
+            SnortLogGenerator(30000, seed=7, duration=3600).write(path, workers=2)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), first)
+            SnortLogGenerator(30000, seed=8, duration=3600).write(path)
+            with open(path, 'rb') as f:
+                self.assertNotEqual(f.read(), first)
+        print(f" 压力测试日志生成正确: {records} 条, {size} 字节")
+
 
 if __name__ == '__main__':
     print("=" * 50)
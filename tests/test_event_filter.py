@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试告警事件过滤"""
+
+import sys
+import os
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import epoch_to_timestamp, timestamp_to_epoch
+from event_filter import EventFilter
+
+BASE = timestamp_to_epoch("2025-02-04 01:30:00")
+
+
+def make_alert(offset, source_ip="192.168.1.100", port=80, rule_id="1:1000001:1"):
+    return {
+        "timestamp": epoch_to_timestamp(BASE + offset),
+        "rule_id": rule_id,
+        "alert_type": "DDoS",
+        "source_ip": source_ip,
+        "destination_ip": "10.0.0.5",
+        "destination_port": port,
+    }
+
+
+class TestEventFilter(unittest.TestCase):
+    """事件过滤测试类"""
+
+    def test_flood_collapse(self):
+        """测试洪泛告警合并为一条，不同键互不影响"""
+        alerts = [make_alert(offset * 2) for offset in range(20)]
+        alerts.insert(5, make_alert(9, port=443))
+        event_filter = EventFilter(seconds=10, limit=0)
+        output = list(event_filter.filter(alerts))
+
+        self.assertEqual(len(output), 2)
+        flood = next(alert for alert in output if alert["destination_port"] == 80)
+        self.assertEqual(flood["count"], 20)
+        self.assertEqual(flood["first_seen"], epoch_to_timestamp(BASE))
+        self.assertEqual(flood["last_seen"], epoch_to_timestamp(BASE + 38))
+        self.assertEqual(flood["timestamp"], alerts[0]["timestamp"])
+        self.assertEqual(next(alert for alert in output if alert["destination_port"] == 443)["count"], 1)
+        self.assertEqual(event_filter.suppressed, 19)
+        self.assertEqual(event_filter.groups, {})
+
+        # 默认 limit=1：每个键的第一条立即放行，只有重复的告警合并
+        event_filter = EventFilter(seconds=10)
+        self.assertEqual(event_filter.process(alerts[0]), [alerts[0]])
+        self.assertEqual(event_filter.process(alerts[5]), [alerts[5]])
+        self.assertEqual(event_filter.process(alerts[1]), [])
+        self.assertEqual([alert["count"] for alert in event_filter.flush()], [1])
+        print(" 洪泛合并测试通过")
+
+    def test_window_expiry(self):
+        """测试间隔超过窗口时分组，以及 max_span 上限"""
+        event_filter = EventFilter(seconds=10, limit=0)
+        output = []
+        for offset in [0, 5, 14, 30]:
+            output += event_filter.process(make_alert(offset))
+        # 14秒后10秒内没有新告警，第一组在 30 秒到达时输出
+        self.assertEqual([alert["count"] for alert in output], [3])
+        self.assertEqual(output[0]["last_seen"], epoch_to_timestamp(BASE + 14))
+        self.assertEqual([alert["count"] for alert in event_filter.flush()], [1])
+
+        # 持续洪泛按 max_span 切分
+        event_filter = EventFilter(seconds=10, max_span=30, limit=0)
+        output = list(event_filter.filter(make_alert(offset) for offset in range(100)))
+        self.assertEqual([alert["count"] for alert in output], [30, 30, 30, 10])
+        self.assertEqual(output[1]["first_seen"], epoch_to_timestamp(BASE + 30))
+        print(" 窗口到期测试通过")
+
+    def test_limit_and_out_of_order(self):
+        """测试 limit 放行、乱序告警和无法解析的时间戳"""
+        event_filter = EventFilter(seconds=10, limit=2)
+        self.assertEqual(len(event_filter.process(make_alert(0))), 1)
+        self.assertEqual(len(event_filter.process(make_alert(1))), 1)
+        self.assertEqual(event_filter.process(make_alert(3)), [])
+        # 晚到的旧告警并入当前组，first_seen 取最早时间
+        self.assertEqual(event_filter.process(make_alert(-2)), [])
+        broken = dict(make_alert(0), timestamp="N/A")
+        self.assertEqual(event_filter.process(broken), [broken])
+
+        output = event_filter.advance(BASE + 13)
+        self.assertEqual(len(output), 1)
+        self.assertEqual(output[0]["count"], 2)
+        self.assertEqual(output[0]["first_seen"], epoch_to_timestamp(BASE - 2))
+        self.assertEqual(output[0]["last_seen"], epoch_to_timestamp(BASE + 3))
+        self.assertEqual(event_filter.advance(BASE + 5), [])
+
+        # 已经过期的旧告警在下一秒输出
+        self.assertEqual(event_filter.process(make_alert(-20)), [make_alert(-20)])
+        self.assertEqual(event_filter.process(make_alert(-19)), [make_alert(-19)])
+        self.assertEqual(event_filter.process(make_alert(-18)), [])
+        self.assertEqual([alert["count"] for alert in event_filter.advance(BASE + 14)], [1])
+        print(" limit和乱序测试通过")
+
+    def test_max_groups_and_time_jump(self):
+        """测试组数上限和跨越整个时间轮的时间跳跃"""
+        event_filter = EventFilter(seconds=60, max_groups=3, limit=0)
+        output = []
+        for index in range(5):
+            output += event_filter.process(make_alert(index, source_ip=f"10.0.0.{index}"))
+        self.assertEqual([alert["source_ip"] for alert in output], ["10.0.0.0", "10.0.0.1"])
+        self.assertEqual(len(event_filter.groups), 3)
+
+        output = event_filter.process(make_alert(100000, source_ip="10.0.0.9"))
+        self.assertEqual(sorted(alert["source_ip"] for alert in output), ["10.0.0.2", "10.0.0.3", "10.0.0.4"])
+        self.assertEqual(list(event_filter.groups), [("1:1000001:1", "10.0.0.9", 80)])
+        self.assertEqual(len(event_filter.advance(BASE + 100060)), 1)
+        self.assertEqual(sum(len(slot) for slot in event_filter.slots), 0)
+
+        with self.assertRaises(ValueError):
+            EventFilter(seconds=0)
+        print(" 组数上限和时间跳跃测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试Snort日志实时跟踪器"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from follow_snort_logs import SnortLogFollower
+
+
+def make_alert(i, port=80):
+    return f'''[**] [1:{1000000 + i}:1] TEST ALERT {i} [**]
+[Classification: Test Classification] [Priority: 2]
+02/04-10:30:25.123456 10.0.0.{i % 255}:5555 -> 192.168.1.100:{port}
+TCP TTL:64 TOS:0x0 ID:1234 IpLen:20 DgmLen:150
+
+'''
+
+
+class TestSnortLogFollower(unittest.TestCase):
+    """日志跟踪器测试类"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp_dir.name, 'raw_snort_alerts.log')
+        self.checkpoint = os.path.join(self.tmp_dir.name, 'checkpoint.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def append(self, text):
+        with open(self.log_file, 'a', encoding='utf-8') as f:
+            f.write(text)
+
+    def test_partial_record_held(self):
+        """测试半条记录等到空行结束符才解析"""
+        follower = SnortLogFollower(self.log_file, use_inotify=False)
+        self.assertEqual(follower.read_available(), [])
+
+        alert = make_alert(1)
+        self.append(alert[:60])
+        self.assertEqual(follower.read_available(), [])
+
+        self.append(alert[60:-1])
+        self.assertEqual(follower.read_available(), [])
+
+        self.append(alert[-1:] + make_alert(2))
+        alerts = follower.read_available()
+        self.assertEqual([a['alert_type'] for a in alerts], ['TEST ALERT 1', 'TEST ALERT 2'])
+        self.assertEqual([a['id'] for a in alerts], [1, 2])
+        follower.close()
+        print(" 半条记录暂存测试通过")
+
+    def test_rotation_and_truncation(self):
+        """测试日志轮转和截断"""
+        follower = SnortLogFollower(self.log_file, use_inotify=False)
+        self.append(make_alert(1) + make_alert(2).rstrip('\n'))
+        self.assertEqual(len(follower.read_available()), 1)
+
+        # 轮转：旧文件末尾的半条记录也要读出来
+        os.rename(self.log_file, self.log_file + '.1')
+        self.append(make_alert(3))
+        alerts = follower.read_available()
+        self.assertEqual([a['alert_type'] for a in alerts], ['TEST ALERT 2', 'TEST ALERT 3'])
+
+        # 截断（copytruncate 方式）：之后从头重新读
+        open(self.log_file, 'w').close()
+        self.assertEqual(follower.read_available(), [])
+        self.append(make_alert(4))
+        alerts = follower.read_available()
+        self.assertEqual([a['alert_type'] for a in alerts], ['TEST ALERT 4'])
+        self.assertEqual(alerts[0]['id'], 4)
+        follower.close()
+        print(" 轮转与截断测试通过")
+
+    def test_checkpoint_resume(self):
+        """测试重启后从检查点继续，不重复解析"""
+        self.append(make_alert(1) + make_alert(2))
+        follower = SnortLogFollower(self.log_file, self.checkpoint, use_inotify=False)
+        self.assertEqual(len(follower.read_available()), 2)
+        follower.close()
+
+        self.append(make_alert(3))
+        follower = SnortLogFollower(self.log_file, self.checkpoint, use_inotify=False)
+        alerts = follower.read_available()
+        self.assertEqual([a['alert_type'] for a in alerts], ['TEST ALERT 3'])
+        self.assertEqual(alerts[0]['id'], 3)
+        follower.close()
+        print(" 检查点恢复测试通过")
+
+    def test_follow_wakes_on_write(self):
+        """测试 follow 在写入后及时产出告警"""
+        self.append('')
+        follower = SnortLogFollower(self.log_file)
+        received = []
+
+        def consume():
+            for alert in follower.follow(idle_timeout=0.05):
+                received.append(time.monotonic())
+                follower.stop()
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        time.sleep(0.1)
+
+        written_at = time.monotonic()
+        self.append(make_alert(1))
+        consumer.join(timeout=5)
+        follower.close()
+
+        self.assertEqual(len(received), 1)
+        self.assertLess(received[0] - written_at, 0.5)
+        print(f" 实时跟踪测试通过 (延迟 {(received[0] - written_at) * 1000:.1f}ms)")
+
+    def test_follow_batches_idle(self):
+        """测试 follow_batches 按批产出，空闲时产出空批次"""
+        self.append(make_alert(1) + make_alert(2))
+        follower = SnortLogFollower(self.log_file, use_inotify=False)
+        batches = follower.follow_batches(idle_timeout=0.05)
+
+        self.assertEqual(len(next(batches)), 2)
+        self.assertEqual(next(batches), [])
+        self.append(make_alert(3))
+        self.assertEqual([alert['alert_type'] for alert in next(batches)], ['TEST ALERT 3'])
+        follower.stop()
+        self.assertEqual(list(batches), [])
+        follower.close()
+        print(" 按批跟踪测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试离线 IP 归属国家查询"""
+
+import sys
+import os
+import random
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import int_to_ipv4
+from geoip import UNKNOWN_COUNTRY, CountryResolver, GeoIpDatabase
+from stats_aggregator import StatsAggregator
+
+SAMPLE_CSV = """start_ip,end_ip,country_code,country_name
+1.0.0.0,1.0.0.255,AU,Australia
+# 注释行
+"16777472","16778239","CN","China"
+45.33.0.0,45.33.127.255,us,United States
+2001:db8::,2001:db8:ffff:ffff:ffff:ffff:ffff:ffff,DE,Germany
+"""
+
+
+class TestGeoIp(unittest.TestCase):
+    """GeoIP 查询测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, "ranges.csv")
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_CSV)
+            f.write("5.8.0.0/19,RU\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_lookup(self):
+        """测试各种格式的IP段和边界"""
+        database = GeoIpDatabase.from_csv(self.csv_path)
+        self.assertEqual(len(database), 5)
+        for ip, expected in [("1.0.0.0", "AU"), ("1.0.0.255", "AU"), ("1.0.1.0", "CN"), ("1.0.3.255", "CN"),
+                             ("1.0.4.0", None), ("0.255.255.255", None), ("45.33.64.1", "US"),
+                             ("5.8.31.255", "RU"), ("5.8.32.0", None), ("2001:db8::1", "DE"),
+                             ("2001:db9::", None), ("10.0.0.1", None), ("bad", None), (None, None)]:
+            self.assertEqual(database.lookup(ip), expected, ip)
+
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write("8.8.8.8,not-an-ip,US\n")
+        with self.assertRaises(ValueError):
+            GeoIpDatabase.from_csv(self.csv_path)
+        print(" 查询测试通过")
+
+    def test_overlap_and_random(self):
+        """测试重叠段的处理，并与暴力查找对比"""
+        rng = random.Random(9)
+        ranges = []
+        for _ in range(500):
+            start = rng.randint(0, 2 ** 32 - 1000)
+            ranges.append((4, start, start + rng.randint(0, 999), rng.choice(["CN", "US", "RU", "BR"])))
+        database = GeoIpDatabase.from_rows(ranges)
+
+        ranges.sort()
+        for _ in range(3000):
+            value = rng.randint(0, 2 ** 32 - 1)
+            if rng.random() < 0.7:
+                _, start, end, _ = rng.choice(ranges)
+                value = rng.randint(start, end)
+            # 重叠时以起始地址较小的段为准
+            expected = next((country for _, start, end, country in ranges if start <= value <= end), None)
+            self.assertEqual(database.lookup(int_to_ipv4(value)), expected, value)
+        print(" 重叠段测试通过")
+
+    def test_binary_cache(self):
+        """测试二进制缓存的生成、复用和失效"""
+        cache_path = self.csv_path + ".bin"
+        database = GeoIpDatabase.open(self.csv_path)
+        self.assertTrue(os.path.exists(cache_path))
+
+        cached, _, _ = GeoIpDatabase.load(cache_path)
+        self.assertEqual(cached.countries, database.countries)
+        self.assertEqual(cached.v4, database.v4)
+        self.assertEqual(cached.v6, database.v6)
+
+        # 缓存有效时不再解析 CSV
+        original = GeoIpDatabase.from_csv
+        GeoIpDatabase.from_csv = classmethod(lambda cls, path: self.fail("不应重新解析CSV"))
+        try:
+            self.assertEqual(GeoIpDatabase.open(self.csv_path).lookup("5.8.0.1"), "RU")
+        finally:
+            GeoIpDatabase.from_csv = original
+
+        # CSV 修改后重新解析；缓存损坏时同样重新生成
+        with open(self.csv_path, 'a', encoding='utf-8') as f:
+            f.write("9.9.9.0/24,CH\n")
+        self.assertEqual(GeoIpDatabase.open(self.csv_path).lookup("9.9.9.9"), "CH")
+        with open(cache_path, 'r+b') as f:
+            f.truncate(40)
+        self.assertEqual(GeoIpDatabase.open(self.csv_path).lookup("9.9.9.9"), "CH")
+        self.assertEqual(GeoIpDatabase.load(cache_path)[0].lookup("9.9.9.9"), "CH")
+        print(" 二进制缓存测试通过")
+
+    def test_resolver_and_stats(self):
+        """测试LRU缓存、批量富化和 top_source_ips 的 country"""
+        resolver = CountryResolver(GeoIpDatabase.from_csv(self.csv_path), cache_size=2)
+        alerts = [{"source_ip": ip} for ip in ["1.0.0.1", "1.0.0.1", "45.33.0.9", "10.0.0.1", "1.0.0.1"]]
+        alerts.append({})
+        resolver.enrich(alerts)
+        self.assertEqual([alert["source_country"] for alert in alerts],
+                         ["AU", "AU", "US", UNKNOWN_COUNTRY, "AU", UNKNOWN_COUNTRY])
+        # 同一批中重复的IP只查一次；缓存容量为2，最早的 1.0.0.1 已被淘汰
+        self.assertEqual(resolver.misses, 3)
+        self.assertEqual(list(resolver.cache), ["45.33.0.9", "10.0.0.1"])
+        self.assertEqual(resolver.country("45.33.0.9"), "US")
+        self.assertEqual(resolver.hits, 1)
+
+        stats = StatsAggregator(clock=lambda: 0, geoip=resolver)
+        stats.add_many([{"source_ip": "1.0.0.7", "severity": "HIGH", "timestamp": ""}] * 2 +
+                       [{"source_ip": "10.1.1.1", "severity": "LOW", "timestamp": ""}])
+        self.assertEqual(stats.top_source_ips(), [
+            {"ip": "1.0.0.7", "count": 2, "country": "AU", "threat_level": "HIGH"},
+            {"ip": "10.1.1.1", "count": 1, "country": UNKNOWN_COUNTRY, "threat_level": "LOW"},
+        ])
+        print(" LRU缓存和统计测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试重点对象统计"""
+
+import sys
+import os
+import random
+import unittest
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from heavy_hitters import GroupedSpaceSaving, SpaceSaving
+
+
+def ddos_stream(count, seed=1):
+    """少量攻击源占大部分流量，其余为大量只出现一两次的随机源IP"""
+    rng = random.Random(seed)
+    attackers = [f"10.0.0.{i}" for i in range(1, 11)]
+    stream = []
+    for _ in range(count):
+        if rng.random() < 0.4:
+            stream.append(rng.choice(attackers[:3]) if rng.random() < 0.6 else rng.choice(attackers))
+        else:
+            stream.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+    return stream
+
+
+class TestHeavyHitters(unittest.TestCase):
+    """重点对象统计测试类"""
+
+    def test_error_bound(self):
+        """测试内存固定且估计值满足误差上界"""
+        stream = ddos_stream(50000)
+        exact = Counter(stream)
+        summary = SpaceSaving(epsilon=0.002)
+
+        for ip in stream:
+            summary.add(ip)
+
+        self.assertEqual(summary.capacity, 500)
+        self.assertLessEqual(len(summary), 500)
+        bound = summary.total / summary.capacity
+        for ip, count, error in summary.top(len(summary)):
+            self.assertLessEqual(exact[ip], count)
+            self.assertLessEqual(count - error, exact[ip])
+            self.assertLessEqual(error, bound)
+
+        expected = [ip for ip, _ in exact.most_common(3)]
+        self.assertEqual([ip for ip, _, _ in summary.top(3)], expected)
+        print(" 误差上界测试通过")
+
+    def test_weighted_and_min_tracking(self):
+        """测试带权重的计数和最小桶维护与暴力实现一致"""
+        rng = random.Random(2)
+        summary = SpaceSaving(capacity=8)
+        counts, errors = {}, {}
+
+        for _ in range(3000):
+            item, weight = rng.randint(1, 30), rng.choice([1, 1, 1, 2, 5])
+            if len(counts) == 8:
+                floor = min(counts.values())
+                self.assertEqual(summary.estimate(-1), (floor, floor))
+            summary.add(item, weight)
+            # 暴力实现：替换任意一个计数最小的对象（具体替换哪个以被测实现为准）
+            if item in counts:
+                counts[item] += weight
+            elif len(counts) < 8:
+                counts[item], errors[item] = weight, 0
+            else:
+                victim = next(key for key in counts if key not in summary.counts)
+                self.assertEqual(counts[victim], floor)
+                del counts[victim], errors[victim]
+                counts[item], errors[item] = floor + weight, floor
+
+        self.assertEqual(summary.counts, counts)
+        self.assertEqual(summary.errors, errors)
+        print(" 最小桶维护测试通过")
+
+    def test_merge(self):
+        """测试分片合并后仍满足误差上界"""
+        stream = ddos_stream(30000, seed=3)
+        exact = Counter(stream)
+        shards = [SpaceSaving(capacity=200) for _ in range(4)]
+        for i, ip in enumerate(stream):
+            shards[i % 4].add(ip)
+
+        merged = SpaceSaving.from_dict(shards[0].to_dict())
+        for shard in shards[1:]:
+            merged.merge(shard)
+
+        self.assertEqual(merged.total, len(stream))
+        self.assertLessEqual(len(merged), 200)
+        for ip, count, error in merged.top(50):
+            self.assertLessEqual(exact[ip], count)
+            self.assertLessEqual(count - error, exact[ip])
+        self.assertEqual([ip for ip, _, _ in merged.top(3)], [ip for ip, _ in exact.most_common(3)])
+        print(" 合并测试通过")
+
+    def test_grouped(self):
+        """测试按严重程度/端口分组查询"""
+        grouped = GroupedSpaceSaving(capacity=100)
+        for port, ip, count in ((80, "10.0.0.1", 5), (80, "10.0.0.2", 9), (22, "10.0.0.1", 3)):
+            grouped.add(port, ip, count)
+
+        self.assertEqual(grouped.top(80, 1), [("10.0.0.2", 9, 0)])
+        self.assertEqual(grouped.top(22), [("10.0.0.1", 3, 0)])
+        self.assertEqual(sorted(grouped.groups_of("10.0.0.1")), [22, 80])
+        self.assertEqual(grouped.top(443), [])
+        print(" 分组查询测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
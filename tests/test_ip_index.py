@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试 IP 地址索引"""
+
+import sys
+import os
+import ipaddress
+import random
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import ip_index
+from alert_model import AlertBatch
+from ip_index import CidrSet, IpRangeIndex, parse_ip
+
+
+class TestIpIndex(unittest.TestCase):
+    """IP 地址索引测试类"""
+
+    def test_parse_ip(self):
+        """测试地址转整数"""
+        self.assertEqual(parse_ip("10.0.0.1"), (4, 0x0A000001))
+        self.assertEqual(parse_ip("2001:db8::1"), (6, 0x20010DB8000000000000000000000001))
+        for invalid in ["10.0.0.256", "010.0.0.1", "host", "", None, 42]:
+            self.assertIsNone(parse_ip(invalid), invalid)
+        print(" 地址转换测试通过")
+
+    def test_cidr_set(self):
+        """测试 CIDR 集合的合并和成员判断"""
+        cidrs = CidrSet.parse("10.0.0.0/25, 10.0.0.128/25,10.0.1.7,192.168.0.0/16,10.0.0.5/8,2001:db8::/32")
+        # 10.0.0.0/8 吞并了前三项
+        self.assertEqual(cidrs.networks(), ["10.0.0.0/8", "192.168.0.0/16", "2001:db8::/32"])
+        self.assertEqual(cidrs, CidrSet(["192.168.0.0/16", "2001:db8::/32", "10.0.0.0/8"]))
+        self.assertEqual(hash(cidrs), hash(CidrSet(["192.168.0.0/16", "2001:db8::/32", "10.0.0.0/8"])))
+
+        for ip, expected in [("10.255.255.255", True), ("11.0.0.0", False), ("9.255.255.255", False),
+                             ("192.168.40.1", True), ("192.169.0.0", False), ("2001:db8:ffff::1", True),
+                             ("2001:db9::", False), ("bad", False), (None, False)]:
+            self.assertEqual(ip in cidrs, expected, ip)
+
+        rng = random.Random(3)
+        networks = [ipaddress.ip_network((rng.randint(0, 2 ** 32 - 1), rng.randint(8, 32)), strict=False)
+                    for _ in range(200)]
+        random_set = CidrSet(networks)
+        for _ in range(5000):
+            address = ipaddress.IPv4Address(rng.randint(0, 2 ** 32 - 1))
+            if rng.random() < 0.5:
+                network = rng.choice(networks)
+                address = network[rng.randrange(network.num_addresses)]
+            self.assertEqual(random_set.contains_int(int(address)),
+                             any(address in network for network in networks), address)
+
+        with self.assertRaises(ValueError):
+            CidrSet.parse("10.0.0.0/8,not-a-network")
+        with self.assertRaises(ValueError):
+            CidrSet.parse("")
+        print(" CIDR集合测试通过")
+
+    def test_range_index(self):
+        """测试排序索引（含暂存行、合并和溢出表）"""
+        old_threshold = ip_index.MERGE_THRESHOLD
+        ip_index.MERGE_THRESHOLD = 100
+        try:
+            rng = random.Random(4)
+            batch = AlertBatch()
+            index = IpRangeIndex(batch.source_ips)
+            values = []
+            queries = [CidrSet.parse(text) for text in
+                       ["10.0.0.0/8", "10.1.0.0/16,10.3.3.0/24", "10.2.3.4/32", "0.0.0.0/0", "2001:db8::/32",
+                        "192.168.0.0/16"]]
+            for step in range(12):
+                for _ in range(rng.randint(1, 150)):
+                    value = rng.choice([f"10.{rng.randint(0, 3)}.{rng.randint(0, 3)}.{rng.randint(0, 7)}",
+                                        "2001:db8::5", "garbage"])
+                    values.append(value)
+                    batch.append({"source_ip": value})
+                for cidrs in queries:
+                    expected = [row for row, value in enumerate(values) if value in cidrs]
+                    self.assertEqual(sorted(index.rows(cidrs)), expected, (step, cidrs))
+                    self.assertGreaterEqual(index.count(cidrs), sum(1 for row in expected
+                                                                    if row not in batch.source_ips.overflow))
+                    check = index.checker(cidrs)
+                    self.assertEqual([row for row in range(len(values)) if check(row)], expected)
+            self.assertGreater(index.indexed, 0)
+            self.assertGreater(len(index.runs), 1)
+            for shorter, longer in zip(index.runs[1:], index.runs):
+                self.assertGreaterEqual(len(longer), len(shorter) * ip_index.RUN_RATIO)
+            for keys in index.runs:
+                self.assertEqual(list(keys), sorted(keys))
+        finally:
+            ip_index.MERGE_THRESHOLD = old_threshold
+        print(" 排序索引测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main()
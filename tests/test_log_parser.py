@@ -96,6 +96,126 @@ TCP'''
         
         print(" 严重程度映射测试通过")
 
+    def test_parse_many_matches_parse_line(self):
+        """测试批量解析与逐条解析结果一致"""
+        entries = [
+            '''[**] [1:1000001:1] SQL Injection Attempt [**]
+[Classification: Web Application Attack] [Priority: 1]
+02/04-10:30:25.123456 192.168.1.100:54321 -> 10.0.0.1:80
+TCP TTL:64 TOS:0x0 ID:12345 IpLen:20 DgmLen:150''',
+            # 非标准格式，走逐行解析
+            '''[**] [1:2000001:1] Port Scan Detected [**]
+[Priority: 2] [Classification: Attempted Information Leak]
+junk 02/04-11:45:30.654321 10.0.1.50:55555 -> 192.168.1.1:443
+UDP''',
+            # 非法日期保留原始时间字符串
+            '''[**] [1:3000001:1] Bad Date [**]
+[Classification: Test] [Priority: 4]
+02/30-12:00:00.000000 10.0.0.1:1111 -> 192.168.1.1:80''',
+            "This is not a valid Snort log format",
+            "   "
+        ]
+        
+        results = SnortLogParser.parse_many(entries)
+        
+        self.assertEqual(results, [SnortLogParser.parse_line(e) for e in entries])
+        self.assertIsNone(results[-1])
+        self.assertEqual(results[1]['protocol'], 'UDP')
+        self.assertEqual(results[1]['severity'], 'HIGH')
+        self.assertEqual(results[2]['timestamp'], '02/30-12:00:00.000000')
+        print(" 批量解析一致性测试通过")
+
+    def test_iter_alerts_across_chunks(self):
+        """测试流式解析在条目跨分块时结果不变"""
+        import tempfile
+        
+        entry = '''[**] [1:1000001:1] SQL Injection Attempt [**]
+[Classification: Web Application Attack] [Priority: 1]
+02/04-10:30:25.123456 192.168.1.100:54321 -> 10.0.0.1:80
+TCP TTL:64 TOS:0x0 ID:12345 IpLen:20 DgmLen:150'''
+        content = "\n\n".join([entry] * 5) + "\n\n\n" + entry + "\n"
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_file = os.path.join(tmp_dir, 'alerts.log')
+            output_file = os.path.join(tmp_dir, 'out', 'alerts.json')
+            with open(input_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+            
+            expected = SnortLogParser.parse_many([entry] * 6)
+            for i, alert in enumerate(expected):
+                alert["id"] = i + 1
+            
+            # 分块大小小于一条日志，保证条目和空行都会跨块
+            for chunk_size in (1, 7, 64, 4096):
+                alerts = list(SnortLogParser.iter_alerts(input_file, chunk_size))
+                self.assertEqual(alerts, expected)
+            
+            logs = SnortLogParser.parse_file(input_file, output_file, chunk_size=13)
+            self.assertEqual(logs, expected)
+            with open(output_file, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), expected)
+            
+            ndjson_file = os.path.join(tmp_dir, 'out', 'alerts.ndjson')
+            SnortLogParser.stream_file(input_file, ndjson_file)
+            with open(ndjson_file, 'r', encoding='utf-8') as f:
+                self.assertEqual([json.loads(line) for line in f], expected)
+        
+        print(" 流式分块解析测试通过")
+
+    def test_parallel_matches_sequential(self):
+        """测试多进程并行解析与顺序解析结果一致（含id编号）"""
+        import tempfile
+        
+        entries = []
+        for i in range(40):
+            entries.append(f'''[**] [1:{1000000 + i}:1] TEST ALERT {i} [**]
+[Classification: Test Classification] [Priority: {i % 4 + 1}]
+02/04-10:30:{i % 60:02d}.123456 10.0.0.{i}:5555 -> 192.168.1.100:80
+TCP TTL:64 TOS:0x0 ID:1234 IpLen:20 DgmLen:150''')
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_file = os.path.join(tmp_dir, 'alerts.log')
+            with open(input_file, 'w', encoding='utf-8', newline='') as f:
+                # 混合 LF / CRLF 分隔和多余空行
+                for i, entry in enumerate(entries):
+                    f.write(entry + ("\r\n\r\n" if i % 3 == 0 else "\n\n\n"))
+            
+            sequential = list(SnortLogParser.iter_alerts(input_file))
+            parallel = list(SnortLogParser.iter_alerts_parallel(input_file, workers=2, range_size=500))
+        
+        self.assertEqual(len(sequential), 40)
+        self.assertEqual(parallel, sequential)
+        print(" 并行解析一致性测试通过")
+
+    def test_mmap_matches_stream(self):
+        """测试内存映射解析与流式解析结果一致"""
+        import tempfile
+        
+        entries = [
+            '''[**] [1:1000001:1] SQL注入尝试 [**]
+[Classification: Web应用攻击] [Priority: 1]
+02/04-10:30:25.123456 192.168.1.100:54321 -> 10.0.0.1:80
+UDP TTL:64 TOS:0x0 ID:12345 IpLen:20 DgmLen:150''',
+            # 目的端口后紧跟非ASCII字符，需要回退到文本路径
+            '''[**] [1:1000002:1] Odd Port [**]
+[Classification: Test] [Priority: 2]
+02/04-10:30:25.123456 192.168.1.100:54321 -> 10.0.0.1:80é''',
+            "This is not a valid Snort log format",
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for separator in ("\n\n", "\n \n\n", "\r\n\r\n"):
+                input_file = os.path.join(tmp_dir, 'alerts.log')
+                with open(input_file, 'w', encoding='utf-8', newline='') as f:
+                    f.write("\n" + separator.join(entries * 3) + separator)
+                
+                expected = list(SnortLogParser.iter_alerts(input_file))
+                self.assertEqual(len(expected), 9)
+                self.assertEqual(list(SnortLogParser.iter_alerts_mmap(input_file)), expected)
+        
+        self.assertEqual(expected[1]['destination_port'], 80)
+        print(" 内存映射解析一致性测试通过")
+
 def run_tests():
     """运行所有测试"""
     print("=" * 50)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试运行指标和 /metrics 接口"""
+
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
+
+import metrics
+import parse_snort_logs
+from parse_snort_logs import SnortLogParser
+from server import create_app
+
+RAW_ALERT = """[**] [1:1000001:1] SQL Injection Attempt [**]
+[Classification: Web Application Attack] [Priority: 1]
+{timestamp} 192.168.1.100:54321 -> 10.0.0.1:80
+TCP TTL:64 TOS:0x0 ID:12345 IpLen:20 DgmLen:150"""
+
+
+def sample_value(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetrics(unittest.TestCase):
+    """运行指标测试类"""
+
+    def setUp(self):
+        self.was_enabled = metrics.enabled()
+
+    def tearDown(self):
+        if self.was_enabled:
+            metrics.enable()
+        else:
+            metrics.disable()
+
+    def test_text_format(self):
+        """测试 Prometheus 文本格式"""
+        metrics.enable()
+        registry = metrics.Registry()
+        requests = registry.counter("demo_requests_total", "请求数", ["path"])
+        latency = registry.histogram("demo_seconds", "耗时", buckets=(0.1, 1.0))
+        requests.labels(path='/a"b').inc()
+        requests.labels(path='/a"b').inc(2)
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+
+        text = registry.render(extra=[("demo_size", "gauge", "大小", 7)])
+        self.assertIn("# TYPE demo_requests_total counter\n", text)
+        self.assertIn('demo_requests_total{path="/a\\"b"} 3\n', text)
+        self.assertIn('demo_seconds_bucket{le="0.1"} 1\n', text)
+        self.assertIn('demo_seconds_bucket{le="1.0"} 2\n', text)
+        self.assertIn('demo_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn("demo_seconds_count 3\n", text)
+        self.assertEqual(sample_value(text, "demo_seconds_sum"), 5.55)
+        self.assertIn("# TYPE demo_size gauge\ndemo_size 7\n", text)
+        registry.gauge("demo_size", "大小")
+        with self.assertRaises(ValueError):
+            registry.gauge("demo_size", "大小")
+
+        print(" 文本格式测试通过")
+
+    def test_disabled_is_noop(self):
+        """测试关闭时不采集、插桩函数恢复原样"""
+        metrics.disable()
+        registry = metrics.Registry()
+        counter = registry.counter("noop_total", "计数")
+        histogram = registry.histogram("noop_seconds", "耗时")
+        counter.inc()
+        histogram.observe(1.0)
+        self.assertEqual(counter.labels().value, 0)
+        self.assertEqual(histogram.labels().count, 0)
+        self.assertIs(metrics.stage("parse"), metrics.stage("write"))
+
+        original = parse_snort_logs._convert_timestamp
+        self.assertFalse(hasattr(original, "__wrapped__"))
+        metrics.enable()
+        self.assertIs(parse_snort_logs._convert_timestamp.__wrapped__, original)
+        encode = metrics.timed(len, "serialize")
+        self.assertIsNot(encode, len)
+        metrics.disable()
+        self.assertIs(parse_snort_logs._convert_timestamp, original)
+        self.assertIs(metrics.timed(len, "serialize"), len)
+
+        print(" 关闭时空操作测试通过")
+
+    def test_parser_instrumentation(self):
+        """测试解析各阶段的计时和计数"""
+        metrics.enable()
+        entries = [RAW_ALERT.format(timestamp="02/04-10:30:15.123456") for _ in range(5)]
+        entries.append(RAW_ALERT.format(timestamp="13/45-25:99:99.000000"))
+        text = "\n\n".join(entries) + "\n\n"
+
+        before = metrics.REGISTRY.render()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "alerts.log")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            alerts = list(SnortLogParser.iter_alerts(path, chunk_size=64))
+            mmap_alerts = list(SnortLogParser.iter_alerts_mmap(path))
+        after = metrics.REGISTRY.render()
+
+        def delta(name):
+            return sample_value(after, name) - (sample_value(before, name) or 0)
+
+        self.assertEqual(alerts, mmap_alerts)
+        self.assertEqual(alerts[-1]["timestamp"], "13/45-25:99:99.000000")
+        self.assertEqual(delta("ids_records_parsed_total"), 12)
+        self.assertEqual(delta("ids_timestamp_fallbacks_total"), 2)
+        self.assertEqual(delta('ids_bytes_read_total{source="text"}'), len(text))
+        self.assertEqual(delta('ids_bytes_read_total{source="mmap"}'), len(text.encode('utf-8')))
+        self.assertEqual(delta('ids_stage_duration_seconds_count{stage="timestamp"}'), 12)
+        self.assertGreaterEqual(delta('ids_stage_duration_seconds_count{stage="read"}'), len(text) // 64)
+        self.assertEqual(delta('ids_stage_duration_seconds_count{stage="parse"}'), 1)
+
+        print(" 解析插桩测试通过")
+
+    def test_metrics_endpoint(self):
+        """测试 /metrics 和 /debug/stacks 接口"""
+        client = create_app(enable_metrics=True).test_client()
+        client.get("/api/alerts?limit=5")
+        client.get("/api/alerts?limit=5")
+        client.get("/api/alerts?page=x")
+
+        response = client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        text = response.get_data(as_text=True)
+        self.assertGreaterEqual(sample_value(text, 'ids_http_requests_total{endpoint="/api/alerts",status="200"}'), 2)
+        self.assertGreaterEqual(sample_value(text, 'ids_http_requests_total{endpoint="/api/alerts",status="400"}'), 1)
+        self.assertEqual(sample_value(text, "ids_response_cache_hits_total"), 1)
+        self.assertEqual(sample_value(text, "ids_alerts_stored"), 0)
+
+        response = client.get("/debug/stacks?seconds=0.05")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(client.get("/debug/stacks?seconds=x").status_code, 400)
+        metrics.disable()
+        self.assertEqual(client.get("/debug/stacks").status_code, 404)
+
+        print(" 指标接口测试通过")
+
+    def test_stack_sampler(self):
+        """测试调用栈采样"""
+        stop = threading.Event()
+
+        def busy_worker_loop():
+            while not stop.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy_worker_loop)
+        worker.start()
+        try:
+            sampler = metrics.StackSampler(interval=0.001).start()
+            time.sleep(0.1)
+            sampler.stop()
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertGreater(sampler.samples, 0)
+        folded = sampler.folded()
+        self.assertIn("busy_worker_loop", folded)
+        for line in folded.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertNotIn("stack-sampler", stack)
+
+        print(" 调用栈采样测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main()
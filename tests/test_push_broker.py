@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试实时告警推送"""
+
+import sys
+import os
+import asyncio
+import json
+import socket
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from push_broker import DROP_OLDEST, SUMMARIZE, PushBroker, serve_sse, start_sse_thread
+
+SEVERITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+
+def make_alerts(start, count):
+    return [{"id": start + i, "timestamp": "2026-02-04 10:30:25", "source_ip": "10.0.0.1",
+             "destination_port": 80, "alert_type": "DDoS", "severity": SEVERITIES[(start + i) % 4]}
+            for i in range(count)]
+
+
+class TestPushBroker(unittest.TestCase):
+    """实时推送测试类"""
+
+    def test_batching_and_filters(self):
+        """测试按条数/时间合并批次，以及严重程度过滤"""
+        async def scenario():
+            broker = PushBroker(batch_interval=0.05, max_batch=200)
+            everyone = broker.subscribe()
+            also_everyone = broker.subscribe()
+            high = broker.subscribe(min_severity="HIGH")
+
+            broker.publish_many(make_alerts(0, 450))
+            self.assertEqual(broker.batches_sent, 2)     # 攒满200条立即发出
+            await asyncio.sleep(0.1)                     # 剩余50条按时间窗口发出
+            self.assertEqual(broker.batches_sent, 3)
+
+            # 同一过滤条件的订阅者共享同一份序列化结果
+            self.assertIs(everyone.frames[0][0], also_everyone.frames[0][0])
+            frames = [json.loads(await everyone.get()) for _ in range(3)]
+            self.assertEqual([f["count"] for f in frames], [200, 200, 50])
+            self.assertEqual([a["id"] for f in frames for a in f["alerts"]], list(range(450)))
+            self.assertTrue(all(a["is_realtime"] for a in frames[0]["alerts"]))
+
+            high_frames = [json.loads(await high.get()) for _ in range(3)]
+            ids = [a["id"] for f in high_frames for a in f["alerts"]]
+            self.assertEqual(ids, [i for i in range(450) if i % 4 >= 2])
+            self.assertEqual(len(also_everyone.frames), 3)
+            broker.close()
+            self.assertIsNone(await everyone.get())
+
+        asyncio.run(scenario())
+        print(" 批次合并和过滤测试通过")
+
+    def test_slow_subscriber_backpressure(self):
+        """测试慢订阅者溢出时丢弃或合并成摘要，不影响其他订阅者"""
+        async def scenario():
+            broker = PushBroker(max_batch=10, queue_size=3)
+            fast = broker.subscribe()
+            summarized = broker.subscribe(overflow=SUMMARIZE)
+            dropping = broker.subscribe(overflow=DROP_OLDEST)
+
+            received = []
+            for batch in range(8):
+                broker.publish_many(make_alerts(batch * 10, 10))
+                received.append(json.loads(await fast.get()))
+            self.assertEqual(sum(f["count"] for f in received), 80)
+
+            summary = json.loads(await summarized.get())
+            self.assertEqual(summary["type"], "summary")
+            self.assertEqual(summary["dropped"], 50)
+            self.assertEqual(sum(summary["by_severity"].values()), 50)
+            rest = [json.loads(await summarized.get()) for _ in range(3)]
+            self.assertEqual(rest[0]["alerts"][0]["id"], 50)
+
+            self.assertEqual(dropping.dropped, 50)
+            self.assertEqual(json.loads(await dropping.get())["alerts"][0]["id"], 50)
+
+        asyncio.run(scenario())
+        print(" 慢订阅者背压测试通过")
+
+    def test_many_subscribers(self):
+        """测试数千个订阅者同时接收"""
+        async def consume(subscriber, totals):
+            async for frame in subscriber:
+                totals.append(json.loads(frame)["count"])
+
+        async def scenario():
+            broker = PushBroker(batch_interval=0.01, max_batch=100)
+            results = []
+            tasks = []
+            for i in range(2000):
+                totals = []
+                results.append((i % 4, totals))
+                subscriber = broker.subscribe(min_severity=SEVERITIES[i % 4])
+                tasks.append(asyncio.create_task(consume(subscriber, totals)))
+
+            start = time.perf_counter()
+            for batch in range(20):
+                broker.publish_many(make_alerts(batch * 100, 100))
+                await asyncio.sleep(0)
+            broker.close()
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+
+            for level, totals in results:
+                self.assertEqual(sum(totals), 2000 * (4 - level) // 4)
+            return elapsed
+
+        elapsed = asyncio.run(scenario())
+        print(f" 多订阅者测试通过: 2000个订阅者, 2000条告警, 耗时 {elapsed:.2f} 秒")
+
+    def test_sse_endpoint(self):
+        """测试SSE服务端"""
+        async def scenario():
+            broker = PushBroker(batch_interval=0.01)
+            server = await serve_sse(broker, port=0)
+            port = server.sockets[0].getsockname()[1]
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /api/realtime?min_severity=CRITICAL HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            headers = await reader.readuntil(b"\r\n\r\n")
+            self.assertIn(b"text/event-stream", headers)
+
+            while broker.subscriber_count == 0:
+                await asyncio.sleep(0.01)
+            broker.publish_many(make_alerts(0, 8))
+            event = await asyncio.wait_for(reader.readuntil(b"\n\n"), 2)
+            self.assertTrue(event.startswith(b"data: "))
+            self.assertEqual([a["id"] for a in json.loads(event[6:])["alerts"]], [3, 7])
+
+            writer.close()
+            broker.close()
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run(scenario())
+        print(" SSE服务测试通过")
+
+    def test_publish_from_thread(self):
+        """测试后台线程中的SSE服务接收其他线程推送的告警"""
+        broker = PushBroker(batch_interval=0.01)
+        loop, server = start_sse_thread(broker, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=2) as client:
+                client.sendall(b"GET /api/realtime HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                stream = client.makefile('rb')
+                while stream.readline().strip():
+                    pass
+                while broker.subscriber_count == 0:
+                    time.sleep(0.01)
+
+                broker.publish_threadsafe(loop, make_alerts(0, 3))
+                event = stream.readline()
+                self.assertTrue(event.startswith(b"data: "))
+                self.assertEqual([a["id"] for a in json.loads(event[6:])["alerts"]], [0, 1, 2])
+        finally:
+            async def shutdown():
+                broker.close()
+                server.close()
+                await server.wait_closed()
+
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=5)
+            loop.call_soon_threadsafe(loop.stop)
+        print(" 跨线程推送测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试Snort告警回放工具"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+import unittest
+from itertools import islice
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from parse_snort_logs import SnortLogParser
+from replay_snort_alerts import (LatencyFollower, LatencyHistogram, SnortAlertReplayer, WRITE_TIME_RE,
+                                 build_schedule, constant_schedule, load_records, ramp_schedule,
+                                 recorded_schedule)
+
+
+class FakeClock:
+    """可控时钟：sleep 直接推进时间"""
+
+    def __init__(self, now=1770000000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestReplaySnortAlerts(unittest.TestCase):
+    """回放工具测试类"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.scenario = os.path.join(self.tmp.name, 'scan.json')
+        with open(self.scenario, 'w', encoding='utf-8') as f:
+            json.dump([{"timestamp": f"2026-02-04 10:00:{second:02d}", "source_ip": "10.0.99.99",
+                        "destination_ip": "192.168.1.100", "destination_port": port,
+                        "alert_type": "Port Scan", "severity": "MEDIUM"}
+                       for second, port in ((4, 80), (0, 22), (8, 443))], f)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_schedules(self):
+        """测试恒定、爬升和按记录间隔的写入计划"""
+        self.assertEqual(list(islice(constant_schedule(4), 3)), [0, 0.25, 0.5])
+
+        # 0 -> 100 条/秒，10秒内共 500 条，之后每条 0.01 秒
+        ramp = list(islice(ramp_schedule(0, 100, 10), 502))
+        self.assertEqual(ramp[0], 0)
+        self.assertAlmostEqual(ramp[125], 5.0)
+        self.assertAlmostEqual(ramp[500], 10.0)
+        self.assertAlmostEqual(ramp[501], 10.01)
+        self.assertEqual(ramp, sorted(ramp))
+
+        # 两倍速，循环周期为跨度加平均间隔
+        self.assertEqual(list(islice(recorded_schedule([100, 104, 108], speed=2), 5)), [0, 2, 4, 6, 8])
+
+        records = load_records([self.tmp.name])
+        self.assertEqual([fields["destination_port"] for _, fields in records], [22, 80, 443])
+        fields, schedule = build_schedule(records, "recorded", speed=4)
+        self.assertEqual(list(islice(schedule, 3)), [0, 1, 2])
+        with self.assertRaises(ValueError):
+            build_schedule(records, "burst")
+        print(" 写入计划测试通过")
+
+    def test_replay_and_rotation(self):
+        """测试按计划写入、轮转和写入时间戳"""
+        clock = FakeClock()
+        path = os.path.join(self.tmp.name, 'live.log')
+        fields, schedule = build_schedule(load_records([self.scenario]), rate=50)
+        replayer = SnortAlertReplayer(path, fields, schedule, rotate_bytes=4000, keep=2,
+                                      clock=clock, sleep=clock.sleep)
+        stats = replayer.run(duration=2)
+
+        self.assertEqual(stats["written"], 100)
+        self.assertAlmostEqual(stats["elapsed"], 1.98)
+        self.assertGreater(stats["rotations"], 2)
+        self.assertTrue(os.path.exists(path + '.2'))
+        self.assertFalse(os.path.exists(path + '.3'))
+
+        alerts = []
+        for name in (path + '.2', path + '.1', path):
+            with open(name, 'rb') as f:
+                data = f.read()
+            self.assertTrue(data.endswith(b'\n\n'))
+            stamps = [float(m.group(1)) for m in WRITE_TIME_RE.finditer(data)]
+            self.assertEqual(stamps, sorted(stamps))
+            alerts.extend(SnortLogParser.parse_many(data.decode('utf-8').split('\n\n')[:-1]))
+        self.assertEqual({alert["alert_type"] for alert in alerts}, {"Port Scan"})
+        self.assertEqual(alerts[-1]["destination_port"], [22, 80, 443][(stats["written"] - 1) % 3])
+        print(f" 回放与轮转测试通过: 轮转 {stats['rotations']} 次")
+
+    def test_latency_measurement(self):
+        """测试跟踪端的写入->解析延迟统计"""
+        path = os.path.join(self.tmp.name, 'live.log')
+        fields, schedule = build_schedule(load_records([self.scenario]), rate=5000)
+        SnortAlertReplayer(path, fields, schedule).run(count=50)
+        existing = os.path.getsize(path)
+
+        # 已有内容保留，但只统计之后写入的记录
+        follower = LatencyFollower(path, use_inotify=False)
+        follower.seek_to_end()
+        fields, schedule = build_schedule(load_records([self.scenario]), rate=5000)
+        SnortAlertReplayer(path, fields, schedule).run(count=200)
+        time.sleep(0.01)
+        alerts = follower.read_available()
+        follower.close()
+
+        self.assertGreater(os.path.getsize(path), existing)
+        self.assertEqual(len(alerts), 200)
+        latency = follower.histogram.to_dict()
+        self.assertEqual(latency["count"], 200)
+        self.assertGreaterEqual(latency["min"], 0.01)
+        self.assertLessEqual(latency["p50"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+
+        histogram = LatencyHistogram(buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3, 10):
+            histogram.record(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertEqual(histogram.percentile(100), 10)
+        self.assertAlmostEqual(histogram.percentile(40), 1.5)
+        print(f" 延迟统计测试通过: p50={latency['p50'] * 1000:.1f}ms")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
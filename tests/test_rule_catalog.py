@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试 Snort 规则元数据目录"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import rule_catalog
+from rule_catalog import RuleCatalog
+from unified2_reader import Unified2Reader, Unified2Writer
+
+SID_MSG = """# sid-msg.map (v1)
+1000001 || SQL Injection Attempt || url,owasp.org/www-community/attacks/SQL_Injection || cve,2019-0001
+1000002 || XSS Attack
+"""
+
+SID_MSG_V2 = """#v2
+1 || 1000003 || 2 || attempted-recon || 0 || Port Scan || url,example.com/scan
+1 || 1000004 || 1 || attempted-dos || 1 || DDoS Attack
+"""
+
+GEN_MSG = """116 || 1 || (snort_decoder) WARNING: Not IPV4 datagram
+1 || 1 || snort general alert
+"""
+
+CLASSIFICATION = """# classification.config
+config classification: not-suspicious,Not Suspicious Traffic,3
+config classification: attempted-recon,Attempted Information Leak,2
+config classification: attempted-dos,Attempted Denial of Service,2
+"""
+
+OVERRIDES = """# 本地覆盖
+1:1000002 critical
+1000004 LOW   # 测试环境里的压测流量
+"""
+
+
+class TestRuleCatalog(unittest.TestCase):
+    """规则目录测试类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+        self.write("sid-msg.map", SID_MSG + SID_MSG_V2)
+        self.write("gen-msg.map", GEN_MSG)
+        self.write("classification.config", CLASSIFICATION)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_parse(self):
+        """测试各文件的解析和严重程度的优先顺序"""
+        self.write("severity.map", OVERRIDES)
+        catalog = RuleCatalog.from_directory(self.directory)
+        self.assertEqual(len(catalog), 6)
+
+        rule = catalog.get(1, 1000001)
+        self.assertEqual(rule.msg, "SQL Injection Attempt")
+        self.assertEqual(rule.references, ("url,owasp.org/www-community/attacks/SQL_Injection", "cve,2019-0001"))
+        self.assertEqual(catalog.get(1, 1000003).classification, "attempted-recon")
+        self.assertEqual(catalog.messages[(116, 1)], "(snort_decoder) WARNING: Not IPV4 datagram")
+        self.assertEqual(catalog.classification_names, {1: "Not Suspicious Traffic", 2: "Attempted Information Leak",
+                                                        3: "Attempted Denial of Service"})
+
+        # 覆盖表 > 规则优先级 > 分类优先级 > 传入的优先级
+        self.assertEqual(catalog.severity(1, 1000002), "CRITICAL")
+        self.assertEqual(catalog.severity(1, 1000004), "LOW")
+        self.assertEqual(catalog.severity(1, 1000003), "HIGH")
+        self.assertEqual(catalog.severity(1, 1000001, priority=3), "MEDIUM")
+        self.assertIsNone(catalog.severity(1, 1000001))
+
+        self.write("severity.map", "1:1000002 URGENT\n")
+        with self.assertRaises(ValueError):
+            RuleCatalog.from_directory(self.directory)
+        self.write("gen-msg.map", "116 || not-a-sid || message\n")
+        with self.assertRaises(ValueError):
+            RuleCatalog.from_files(gen_msg=os.path.join(self.directory, "gen-msg.map"))
+        print(" 规则文件解析测试通过")
+
+    def test_cache_and_reload(self):
+        """测试 pickle 缓存的复用和源文件变化后的重新加载"""
+        catalog = RuleCatalog.from_directory(self.directory)
+        cache_path = os.path.join(self.directory, ".rule_catalog.pickle")
+        self.assertTrue(os.path.exists(cache_path))
+
+        original = RuleCatalog.from_files
+        RuleCatalog.from_files = classmethod(lambda cls, **paths: self.fail("不应重新解析规则文件"))
+        try:
+            cached = RuleCatalog.from_directory(self.directory)
+        finally:
+            RuleCatalog.from_files = original
+        self.assertEqual(cached.rules, catalog.rules)
+        self.assertEqual(cached.classifications, catalog.classifications)
+
+        # 检查间隔内不看文件；源文件变化后重新加载
+        self.write("sid-msg.map", SID_MSG + "1000005 || New Rule\n")
+        self.assertFalse(catalog.refresh())
+        self.assertTrue(catalog.refresh(force=True))
+        self.assertEqual(catalog.get(1, 1000005).msg, "New Rule")
+        self.assertIsNone(catalog.get(1, 1000003))
+        self.assertFalse(catalog.refresh(force=True))
+
+        # 文件写了一半时保留旧数据
+        self.write("sid-msg.map", SID_MSG + "broken line\n")
+        self.assertFalse(catalog.refresh(force=True))
+        self.assertEqual(catalog.get(1, 1000005).msg, "New Rule")
+
+        with open(cache_path, 'wb') as f:
+            f.write(b'not a pickle')
+        self.write("sid-msg.map", SID_MSG)
+        self.assertEqual(len(RuleCatalog.from_directory(self.directory)), 4)
+        print(" 缓存和重新加载测试通过")
+
+    def test_enrich(self):
+        """测试整批富化和 rule_id 缓存"""
+        self.write("severity.map", OVERRIDES)
+        catalog = RuleCatalog.from_directory(self.directory)
+        alerts = [
+            {"rule_id": "1:1000001:1", "severity": "HIGH"},
+            {"rule_id": "1:1000003:2", "severity": "MEDIUM"},
+            {"rule_id": "1:1000002:1", "severity": "HIGH"},
+            {"rule_id": "1:9999999:1", "severity": "LOW"},
+            {"rule_id": "garbage", "severity": "LOW"},
+            {"severity": "LOW"},
+            {"rule_id": "1:1000003:2", "severity": "MEDIUM"},
+        ]
+        enriched = catalog.enrich(iter(alerts))
+        self.assertEqual(enriched, alerts)
+        self.assertEqual(alerts[0], {"rule_id": "1:1000001:1", "severity": "HIGH",
+                                     "references": ("url,owasp.org/www-community/attacks/SQL_Injection",
+                                                    "cve,2019-0001")})
+        self.assertEqual(alerts[1], {"rule_id": "1:1000003:2", "severity": "HIGH", "category": "attempted-recon",
+                                     "references": ("url,example.com/scan",)})
+        self.assertEqual(alerts[2]["severity"], "CRITICAL")
+        self.assertEqual(alerts[3:6], [{"rule_id": "1:9999999:1", "severity": "LOW"},
+                                       {"rule_id": "garbage", "severity": "LOW"}, {"severity": "LOW"}])
+        self.assertEqual(alerts[6], alerts[1])
+        self.assertEqual(len(catalog._memo), 6)
+
+        old_limit = rule_catalog.MEMO_LIMIT
+        rule_catalog.MEMO_LIMIT = 2
+        try:
+            catalog.enrich([{"rule_id": f"1:{sid}:1"} for sid in range(10)])
+            self.assertLessEqual(len(catalog._memo), 2)
+        finally:
+            rule_catalog.MEMO_LIMIT = old_limit
+        print(" 告警富化测试通过")
+
+    def test_unified2_reader(self):
+        """测试 Unified2Reader 使用规则目录"""
+        self.write("severity.map", OVERRIDES)
+        catalog = RuleCatalog.from_directory(self.directory)
+        path = os.path.join(self.directory, "snort.u2.1")
+        with Unified2Writer(path) as writer:
+            writer.write_event(1, 1770201025, 1000002, '192.168.1.100', '10.0.0.1',
+                               classification_id=2, priority_id=3)
+            writer.write_event(2, 1770201025, 1, '192.168.1.100', '10.0.0.1', generator_id=116,
+                               classification_id=9, priority_id=3)
+
+        alerts = list(Unified2Reader(catalog=catalog).iter_alerts(path))
+        self.assertEqual([alert["alert_type"] for alert in alerts],
+                         ["XSS Attack", "(snort_decoder) WARNING: Not IPV4 datagram"])
+        self.assertEqual([alert["classification"] for alert in alerts], ["Attempted Information Leak", "Unknown"])
+        self.assertEqual([alert["severity"] for alert in alerts], ["CRITICAL", "MEDIUM"])
+        print(" unified2读取器集成测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试告警全文检索"""
+
+import sys
+import os
+import random
+import unittest
+from array import array
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import search_index
+from alert_model import AlertBatch
+from search_index import SearchIndex, intersect, parse_query, tokenize
+
+DOCUMENTS = [
+    {"alert_type": "SQL Injection Attempt", "payload": "id=1 UNION SELECT password FROM users"},
+    {"alert_type": "SQL Injection Attempt", "payload": "select 1 union select 2 union all select 3"},
+    {"alert_type": "XSS Attack", "description": "reflected <script> in q param"},
+    {"alert_type": "Port Scan", "classification": "Attempted Information Leak"},
+    {"alert_type": "ET EXPLOIT Apache Struts RCE", "raw_summary": "CVE-2017-5638 exploitation attempt"},
+    {"alert_type": "ET EXPLOIT Log4j", "raw_summary": "CVE-2021-44228 jndi lookup", "payload": b"${jndi:ldap://x}"},
+    {"alert_type": "DDoS Attack", "payload": None},
+    {"alert_type": "SQLi Blind", "description": "time based sqlmap probe"},
+]
+
+
+class TestSearchIndex(unittest.TestCase):
+    """全文检索测试类"""
+
+    def setUp(self):
+        self.batch = AlertBatch()
+        self.index = SearchIndex(self.batch)
+        for alert in DOCUMENTS:
+            self.index.add(self.batch.append(alert), alert)
+
+    def search(self, query):
+        return list(self.index.search(query))
+
+    def test_tokenize_and_parse(self):
+        """测试分词和查询解析"""
+        self.assertEqual(tokenize("UNION/**/SELECT CVE-2017-5638"), ["union", "select", "cve", "2017", "5638"])
+        self.assertEqual(tokenize(b"GET /a?x=1"), ["get", "a", "x", "1"])
+        self.assertEqual(tokenize(None), [])
+
+        clauses = parse_query('sql "union select" OR cve-2021* AND xss')
+        self.assertEqual([[(term.tokens, term.prefix) for term in clause] for clause in clauses],
+                         [[(["sql"], False), (["union", "select"], False)],
+                          [(["cve", "2021"], True), (["xss"], False)]])
+        for empty in ["", "   ", "OR", '"" ***']:
+            with self.assertRaises(ValueError):
+                parse_query(empty)
+        print(" 分词和查询解析测试通过")
+
+    def test_queries(self):
+        """测试 AND、OR、前缀和短语查询"""
+        self.assertEqual(self.search("SQL"), [0, 1])
+        self.assertEqual(self.search("sql injection"), [0, 1])
+        self.assertEqual(self.search("sql*"), [0, 1, 7])
+        self.assertEqual(self.search('"union select"'), [0, 1])
+        self.assertEqual(self.search('"union all"'), [1])
+        self.assertEqual(self.search('"select union"'), [])
+        self.assertEqual(self.search("union select password"), [0])
+        self.assertEqual(self.search("CVE-2017-5638"), [4])
+        self.assertEqual(self.search("cve-2021*"), [5])
+        self.assertEqual(self.search("cve-20*"), [4, 5])
+        self.assertEqual(self.search("jndi ldap"), [5])
+        self.assertEqual(self.search("xss OR ddos OR scan"), [2, 3, 6])
+        self.assertEqual(self.search("exploit AND struts OR sqlmap"), [4, 7])
+        # 短语须出现在同一个字段内
+        self.assertEqual(self.search('"attack sql"'), [])
+        self.assertEqual(self.search("nothing-here"), [])
+        self.assertEqual(self.search("zz*"), [])
+        print(" 查询测试通过")
+
+    def test_prefix_during_ingest(self):
+        """测试边写入边前缀查询（新词先待合并，再并入有序词表）"""
+        old_minimum = search_index.VOCABULARY_MERGE_MIN
+        search_index.VOCABULARY_MERGE_MIN = 4
+        try:
+            rng = random.Random(8)
+            batch = AlertBatch()
+            index = SearchIndex(batch)
+            payloads = []
+            for row in range(600):
+                payload = " ".join(f"{rng.choice('abc')}{rng.randint(0, 300)}" for _ in range(3))
+                payloads.append(payload)
+                index.add(batch.append({"payload": payload}), {"payload": payload})
+                if row % 7 == 0:
+                    prefix = f"{rng.choice('abc')}{rng.randint(1, 29)}"
+                    expected = [i for i, text in enumerate(payloads)
+                                if any(word.startswith(prefix) for word in text.split())]
+                    self.assertEqual(list(index.search(prefix + "*")), expected, prefix)
+            self.assertEqual(index._vocabulary, sorted(index._vocabulary))
+            self.assertEqual(sorted(index._vocabulary + index._new_tokens), sorted(index.postings))
+        finally:
+            search_index.VOCABULARY_MERGE_MIN = old_minimum
+        print(" 写入期间前缀查询测试通过")
+
+    def test_intersect(self):
+        """测试跳跃求交集与集合求交集一致"""
+        rng = random.Random(7)
+        for _ in range(300):
+            universe = rng.randint(1, 5000)
+            first = array('I', sorted(rng.sample(range(universe), rng.randint(0, min(universe, 40)))))
+            second = array('I', sorted(rng.sample(range(universe), rng.randint(0, universe))))
+            expected = sorted(set(first) & set(second))
+            self.assertEqual(list(intersect(first, second)), expected)
+            self.assertEqual(list(intersect(second, first)), expected)
+        print(" 求交集测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试 Snort 时间戳解码"""
+
+import sys
+import os
+import calendar
+import random
+import time
+import unittest
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import timestamp_to_epoch
+from parse_snort_logs import SnortLogParser
+from snort_timestamp import SnortTimestampDecoder, local_reference
+
+
+def reference_at(text):
+    return calendar.timegm(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+
+
+def strptime_convert(stamp, year):
+    """原来基于 strptime 的转换"""
+    try:
+        dt = datetime.strptime(f"{year}-{stamp}", "%Y-%m/%d-%H:%M:%S.%f")
+        return dt.strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+class TestSnortTimestamp(unittest.TestCase):
+    """时间戳解码测试类"""
+
+    def test_matches_strptime(self):
+        """测试与 strptime 的结果一致"""
+        # 参考时间加上允许的偏差正好到 2025 年末，所有日期都应归到 2025 年
+        decoder = SnortTimestampDecoder(reference_at("2025-12-30 23:59:59"))
+        rng = random.Random(7)
+        for _ in range(5000):
+            stamp = (f"{rng.randint(1, 12):02d}/{rng.randint(1, 31):02d}-{rng.randint(0, 23):02d}:"
+                     f"{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}.{rng.randint(0, 999999):06d}")
+            if stamp.startswith("02/29"):
+                continue   # 2025 年没有2月29日，解码器会归到2024年（见闰日测试）
+            expected = strptime_convert(stamp, 2025)
+            decoded = decoder.decode(stamp)
+            if expected is None:
+                self.assertIsNone(decoded, stamp)
+                continue
+            self.assertEqual(decoded[0], expected)
+            self.assertEqual(decoded[1], timestamp_to_epoch(expected))
+            self.assertEqual(decoder.convert(stamp), expected)
+
+        print(" strptime一致性测试通过")
+
+    def test_year_rollover(self):
+        """测试跨年推断"""
+        january = SnortTimestampDecoder(reference_at("2026-01-01 00:10:00"))
+        self.assertEqual(january.convert("12/31-23:59:58.000001"), "2025-12-31 23:59:58")
+        self.assertEqual(january.convert("01/01-00:09:00.5"), "2026-01-01 00:09:00")
+        # 略晚于参考时间（时钟偏差）仍算当年
+        self.assertEqual(january.convert("01/01-08:00:00.0"), "2026-01-01 08:00:00")
+        self.assertEqual(january.convert("06/15-12:00:00.0"), "2025-06-15 12:00:00")
+
+        december = SnortTimestampDecoder(reference_at("2025-12-31 23:50:00"))
+        self.assertEqual(december.convert("01/01-00:05:00.0"), "2026-01-01 00:05:00")
+        self.assertEqual(december.convert("12/31-23:49:00.0"), "2025-12-31 23:49:00")
+        self.assertEqual(december.decode("01/01-00:05:00.0")[1], reference_at("2026-01-01 00:05:00"))
+
+        print(" 跨年推断测试通过")
+
+    def test_leap_day(self):
+        """测试闰日归属到最近的闰年"""
+        self.assertEqual(SnortTimestampDecoder(reference_at("2026-10-17 12:00:00")).convert("02/29-01:02:03.0"),
+                         "2024-02-29 01:02:03")
+        self.assertEqual(SnortTimestampDecoder(reference_at("2028-03-01 00:00:00")).convert("02/29-01:02:03.0"),
+                         "2028-02-29 01:02:03")
+        self.assertEqual(SnortTimestampDecoder(reference_at("2028-02-28 00:00:00")).convert("02/29-01:02:03.0"),
+                         "2024-02-29 01:02:03")
+        # 2100 年不是闰年，往前找到 2096 年
+        self.assertEqual(SnortTimestampDecoder(reference_at("2103-06-01 00:00:00")).convert("02/29-00:00:00.0"),
+                         "2096-02-29 00:00:00")
+        self.assertEqual(SnortTimestampDecoder(reference_at("2026-10-17 12:00:00")).convert("02/28-23:59:59.9"),
+                         "2026-02-28 23:59:59")
+
+        print(" 闰日测试通过")
+
+    def test_malformed(self):
+        """测试不合法的时间戳"""
+        decoder = SnortTimestampDecoder(reference_at("2026-10-17 12:00:00"))
+        for stamp in ["13/01-00:00:00.0", "00/10-00:00:00.0", "04/31-00:00:00.0", "02/04-24:00:00.0",
+                      "02/04-10:60:00.0", "02/04-10:30:60.0", "02/04-10:30:15", "02/04-10:30:15.",
+                      "02/04-10:30:15.1234567", "02/04-10:30:15.12a", "02/04 10:30:15.1",
+                      "", "02/04", "١٢/04-10:30:15.1", "02/04-10:30:15.١"]:
+            self.assertIsNone(decoder.decode(stamp), stamp)
+            self.assertIsNone(decoder.convert(stamp), stamp)
+            self.assertIsNone(strptime_convert(stamp, 2026), stamp)
+
+        # 先缓存了同一秒的合法时间戳，小数部分不合法时仍要拒绝
+        self.assertIsNotNone(decoder.decode("02/04-10:30:15.1"))
+        self.assertIsNone(decoder.decode("02/04-10:30:15.x"))
+
+        # 解析器对无法转换的时间戳原样保留
+        alert = SnortLogParser.parse_line(
+            "[**] [1:1:1] Test [**]\n[Classification: Test] [Priority: 1]\n"
+            "02/30-10:30:15.123456 1.2.3.4:1 -> 5.6.7.8:2\nTCP")
+        self.assertEqual(alert["timestamp"], "02/30-10:30:15.123456")
+
+        print(" 不合法时间戳测试通过")
+
+    def test_dense_stream(self):
+        """测试同一秒内大量连续时间戳（走缓存）的结果与 strptime 一致
+
+        两者的速度对比见 docs/parser_performance.md，不在单元测试里计时
+        """
+        decoder = SnortTimestampDecoder(reference_at("2025-12-30 23:59:59"))
+        stamps = [f"02/04-10:{i // 600 % 60:02d}:{i // 10 % 60:02d}.{i:06d}" for i in range(20000)]
+        for stamp in stamps:
+            self.assertEqual(decoder.convert(stamp), strptime_convert(stamp, 2025), stamp)
+
+        print(" 连续时间戳一致性测试通过")
+
+if __name__ == '__main__':
+    unittest.main()
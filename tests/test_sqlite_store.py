@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试SQLite告警持久化"""
+
+import sys
+import os
+import random
+import tempfile
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import epoch_to_timestamp
+from alert_store import AlertStore
+from api_data_generator import APIDataGenerator
+from parse_snort_logs import SnortLogParser
+from sqlite_store import AlertRepository
+
+BASE = 1770201000
+
+
+def random_alerts(count, seed=1):
+    rng = random.Random(seed)
+    return [{
+        "id": i + 1,
+        "timestamp": epoch_to_timestamp(BASE + i * 10 + rng.randint(-300, 30)),
+        "source_ip": f"10.0.0.{rng.randint(1, 30)}",
+        "source_port": rng.randint(1024, 65535),
+        "destination_ip": "192.168.1.10",
+        "destination_port": rng.choice([22, 80, 443]),
+        "protocol": "TCP",
+        "alert_type": rng.choice(["DDoS", "XSS", "Port Scan"]),
+        "classification": "Misc activity",
+        "severity": rng.choice(["CRITICAL", "HIGH", "MEDIUM", "LOW"]),
+        "rule_id": "1:1000001:1",
+        "raw_summary": "test",
+    } for i in range(count)]
+
+
+class TestSqliteStore(unittest.TestCase):
+    """SQLite告警库测试类"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_file = os.path.join(self.tmp_dir.name, 'db', 'alerts.db')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_matches_memory_store(self):
+        """测试查询结果与内存告警存储一致"""
+        alerts = random_alerts(2000)
+        store = AlertStore()
+        store.extend(alerts)
+
+        rng = random.Random(3)
+        with AlertRepository(self.db_file, batch_size=300) as repo:
+            for alert in alerts:
+                repo.add(alert)
+
+            for _ in range(100):
+                filters = {}
+                if rng.random() < 0.6:
+                    filters["severity"] = rng.choice(["CRITICAL", "LOW"])
+                if rng.random() < 0.4:
+                    filters["alert_type"] = rng.choice(["DDoS", "XSS"])
+                if rng.random() < 0.3:
+                    filters["source_ip"] = f"10.0.0.{rng.randint(1, 30)}"
+                if rng.random() < 0.3:
+                    filters["destination_port"] = 443
+                if rng.random() < 0.5:
+                    filters["start_time"] = epoch_to_timestamp(BASE + rng.randint(0, 20000))
+                page, limit = rng.randint(1, 3), rng.choice([5, 20])
+
+                expected = store.query(page=page, limit=limit, **filters)
+                result = repo.query(page=page, limit=limit, **filters)
+                self.assertEqual(result["alerts"], expected["alerts"], filters)
+                self.assertEqual(result["pagination"]["total"], expected["pagination"]["total"])
+        print(" 与内存存储对照测试通过")
+
+    def test_cursor_and_reopen(self):
+        """测试游标翻页，以及关闭后重新打开数据仍在"""
+        alerts = random_alerts(500, seed=2)
+        with AlertRepository(self.db_file) as repo:
+            repo.add_many(alerts)
+
+        with AlertRepository(self.db_file) as repo:
+            self.assertEqual(len(repo), 500)
+            seen, cursor = [], None
+            while True:
+                result = repo.query(limit=33, cursor=cursor, severity="HIGH")
+                seen.extend(result["alerts"])
+                cursor = result["pagination"]["next_cursor"]
+                if cursor is None:
+                    break
+            self.assertEqual(seen, repo.query(limit=1000, severity="HIGH")["alerts"])
+            self.assertEqual(len(seen), sum(1 for a in alerts if a["severity"] == "HIGH"))
+
+            # 最后一页正好满页时不再给出游标
+            total = len(repo)
+            result = repo.query(limit=total // 2)
+            self.assertIsNotNone(result["pagination"]["next_cursor"])
+            result = repo.query(limit=total // 2, cursor=result["pagination"]["next_cursor"])
+            self.assertEqual(len(result["alerts"]), total // 2)
+            self.assertIsNone(result["pagination"]["next_cursor"])
+
+            with self.assertRaises(ValueError):
+                repo.query(protocol="TCP")
+        print(" 游标翻页和持久化测试通过")
+
+    def test_extra_fields_and_ingest_file(self):
+        """测试额外字段无损保存，以及日志文件直接导入"""
+        alerts = APIDataGenerator.generate_alerts_data(10)
+        log_file = os.path.join(self.tmp_dir.name, 'alert.log')
+        with open(log_file, 'w', encoding='utf-8') as f:
+            for i in range(50):
+                f.write(f'''[**] [1:{1000000 + i}:1] Attack {i % 5} [**]
+[Classification: Misc activity] [Priority: {i % 4 + 1}]
+02/04-10:{i % 60:02d}:25.123456 192.168.1.{i % 7 + 1}:54321 -> 10.0.0.1:80
+TCP TTL:64
+
+''')
+
+        with AlertRepository(self.db_file) as repo:
+            repo.add_many(alerts)
+            by_id = {a["id"]: a for a in repo.query(limit=100)["alerts"]}
+            self.assertEqual(by_id, {a["id"]: a for a in alerts})
+
+        with AlertRepository(os.path.join(self.tmp_dir.name, 'log.db')) as repo:
+            self.assertEqual(repo.ingest_file(log_file), 50)
+            parsed = list(SnortLogParser.iter_alerts(log_file))
+            stored = repo.query(limit=100)["alerts"]
+            self.assertEqual(sorted(stored, key=lambda a: a["id"]), parsed)
+            indexes = {row[0] for row in repo.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            self.assertEqual(len(indexes), 3)
+
+            # 表中已有数据时追加导入不重建索引
+            repo.bulk_load = lambda: self.fail("不应重建索引")
+            self.assertEqual(repo.ingest_file(log_file), 50)
+            self.assertEqual(len(repo), 100)
+        print(" 额外字段和文件导入测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试告警统计聚合器"""
+
+import sys
+import os
+import random
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from alert_model import epoch_to_timestamp
+from stats_aggregator import StatsAggregator
+
+NOW = 1770201000   # 2026-02-04 10:30:00
+
+
+def make_alert(epoch, severity="HIGH", alert_type="Port Scan", source_ip="10.0.0.1"):
+    return {
+        "timestamp": epoch_to_timestamp(epoch),
+        "severity": severity,
+        "alert_type": alert_type,
+        "source_ip": source_ip,
+    }
+
+
+class TestStatsAggregator(unittest.TestCase):
+    """统计聚合器测试类"""
+
+    def test_counters(self):
+        """测试总数和分布计数"""
+        stats = StatsAggregator(clock=lambda: NOW)
+        stats.add_many([
+            make_alert(NOW - 60, "CRITICAL", "DDoS", "10.0.0.9"),
+            make_alert(NOW - 120, "CRITICAL", "DDoS", "10.0.0.9"),
+            make_alert(NOW - 180, "LOW", "Port Scan", "10.0.0.1"),
+            {"timestamp": "02/30-12:00:00.000000", "severity": "HIGH", "alert_type": "XSS"},
+        ])
+
+        data = stats.snapshot()
+        self.assertEqual(data["total_alerts"], 4)
+        self.assertEqual(data["severity_distribution"], {"CRITICAL": 2, "HIGH": 1, "MEDIUM": 0, "LOW": 1})
+        self.assertEqual(data["attack_type_distribution"], {"DDoS": 2, "Port Scan": 1, "XSS": 1})
+        self.assertEqual(data["top_source_ips"][0], {"ip": "10.0.0.9", "count": 2, "threat_level": "CRITICAL"})
+        # 时间戳无法解析的告警不计入时间窗口
+        self.assertEqual(data["recent_activity"], {"last_hour": 3, "last_6h": 3, "last_24h": 3})
+        self.assertEqual(data["last_24h_alerts"], 3)
+        print(" 计数测试通过")
+
+    def test_windows_slide_forward(self):
+        """测试时间前进时窗口计数正确滑出"""
+        clock = [NOW]
+        stats = StatsAggregator(clock=lambda: clock[0])
+        for minutes_ago in (10, 3 * 60, 20 * 60, 30 * 60):
+            stats.add(make_alert(NOW - minutes_ago * 60))
+
+        self.assertEqual(stats.recent_activity(), {"last_hour": 1, "last_6h": 2, "last_24h": 3})
+
+        clock[0] = NOW + 2 * 3600
+        self.assertEqual(stats.recent_activity(), {"last_hour": 0, "last_6h": 2, "last_24h": 3})
+
+        clock[0] = NOW + 5 * 3600
+        self.assertEqual(stats.recent_activity(), {"last_hour": 0, "last_6h": 1, "last_24h": 2})
+
+        clock[0] = NOW + 3 * 86400
+        self.assertEqual(stats.recent_activity(), {"last_hour": 0, "last_6h": 0, "last_24h": 0})
+        print(" 窗口滑动测试通过")
+
+    def test_matches_full_rescan(self):
+        """测试乱序输入下与全量重新统计的结果一致"""
+        rng = random.Random(8)
+        stats = StatsAggregator(clock=lambda: NOW)
+        epochs = []
+
+        for step in range(3000):
+            epoch = NOW - 2 * 86400 + step * 50 + rng.randint(-4000, 400)
+            epochs.append(epoch)
+            stats.add(make_alert(epoch))
+
+            if step % 97 == 0:
+                now = NOW - 2 * 86400 + step * 50 + 400
+                recent = stats.recent_activity(now)
+                latest = max(max(epochs) // 60, now // 60)
+                for name, seconds in (("last_hour", 3600), ("last_6h", 21600), ("last_24h", 86400)):
+                    expected = sum(1 for e in epochs if latest - e // 60 < seconds // 60)
+                    self.assertEqual(recent[name], expected, (step, name))
+        print(" 全量对照测试通过")
+
+    def test_merge_shards(self):
+        """测试合并多个分片的聚合结果与单个聚合器一致"""
+        rng = random.Random(9)
+        alerts = [make_alert(NOW - rng.randint(0, 30 * 3600), rng.choice(["CRITICAL", "LOW"]),
+                             rng.choice(["DDoS", "XSS"]), f"10.0.0.{rng.randint(1, 20)}")
+                  for _ in range(2000)]
+
+        whole = StatsAggregator(clock=lambda: NOW)
+        whole.add_many(alerts)
+        shards = [StatsAggregator(clock=lambda: NOW) for _ in range(3)]
+        for i, alert in enumerate(alerts):
+            shards[i % 3].add(alert)
+        merged = shards[0].merge(shards[1]).merge(shards[2])
+
+        self.assertEqual(merged.snapshot(), whole.snapshot())
+        # 计数相同的IP先后顺序可能不同
+        rank = lambda top: sorted((-item["count"], item["ip"]) for item in top)
+        self.assertEqual(rank(merged.top_source_ips_by_severity("LOW", 20)),
+                         rank(whole.top_source_ips_by_severity("LOW", 20)))
+        print(" 分片合并测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""测试unified2二进制日志读取器"""
+
+import sys
+import os
+import tempfile
+import time
+import unittest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from unified2_reader import Unified2Reader, Unified2Writer, Unified2Event, Unified2Packet
+
+EVENT_SECOND = 1770201025
+
+
+class TestUnified2Reader(unittest.TestCase):
+    """unified2读取器测试类"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.spool = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_fixture(self, name, events):
+        with Unified2Writer(os.path.join(self.spool, name)) as writer:
+            for event in events:
+                writer.write_event(**event)
+                writer.write_packet(event["event_id"], event["event_second"], b'\x45' + b'\x00' * 39)
+
+    def test_ipv4_event_schema(self):
+        """测试IPv4事件转换为 parse_line 格式"""
+        self.write_fixture('snort.u2.1', [dict(
+            event_id=1, event_second=EVENT_SECOND, signature_id=1000001,
+            source_ip='192.168.1.100', destination_ip='10.0.0.1',
+            source_port=54321, destination_port=80, protocol=6,
+            classification_id=1, priority_id=1)])
+
+        reader = Unified2Reader(sid_msg={(1, 1000001): "SQL Injection Attempt"},
+                                classifications={1: "Web Application Attack"})
+        alerts = list(reader.iter_alerts(os.path.join(self.spool, 'snort.u2.1')))
+
+        expected_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(EVENT_SECOND))
+        self.assertEqual(alerts, [{
+            "id": 1,
+            "timestamp": expected_time,
+            "source_ip": "192.168.1.100",
+            "source_port": 54321,
+            "destination_ip": "10.0.0.1",
+            "destination_port": 80,
+            "protocol": "TCP",
+            "alert_type": "SQL Injection Attempt",
+            "classification": "Web Application Attack",
+            "severity": "CRITICAL",
+            "rule_id": "1:1000001:1",
+            "raw_summary": "SQL Injection Attempt"
+        }])
+        print(" IPv4事件测试通过")
+
+    def test_ipv6_v2_and_packet_records(self):
+        """测试IPv6事件、v2事件和数据包记录"""
+        path = os.path.join(self.spool, 'snort.u2.1')
+        with Unified2Writer(path) as writer:
+            writer.write_event(7, EVENT_SECOND, 2000001, '2001:db8::1', 'fe80::2',
+                               source_port=443, destination_port=5555, protocol=17, v2=True)
+            writer.write_packet(7, EVENT_SECOND, b'payload')
+            writer.write_event(8, EVENT_SECOND, 2000002, '10.0.0.5', '10.0.0.6',
+                               protocol=1, priority_id=4, v2=True)
+
+        records = list(Unified2Reader().iter_records(path))
+        self.assertIsInstance(records[0], Unified2Event)
+        self.assertIsInstance(records[1], Unified2Packet)
+        self.assertEqual(records[1].packet_data, b'payload')
+
+        alerts = list(Unified2Reader().iter_alerts(path))
+        self.assertEqual([a["source_ip"] for a in alerts], ['2001:db8::1', '10.0.0.5'])
+        self.assertEqual([a["protocol"] for a in alerts], ['UDP', 'ICMP'])
+        self.assertEqual(alerts[1]["severity"], 'LOW')
+        self.assertEqual(alerts[0]["alert_type"], 'Unknown Alert')
+        print(" IPv6/v2事件和数据包测试通过")
+
+    def test_spool_order_and_truncated_tail(self):
+        """测试spool目录按时间戳顺序读取，末尾不完整记录被忽略"""
+        for stamp, first in ((1770300000, 10), (1770200000, 1)):
+            self.write_fixture(f'snort.u2.{stamp}', [dict(
+                event_id=first + i, event_second=EVENT_SECOND + first + i, signature_id=first + i,
+                source_ip='10.0.0.1', destination_ip='10.0.0.2') for i in range(3)])
+
+        # 正在写入的文件：截掉最后一条记录的一部分
+        newest = os.path.join(self.spool, 'snort.u2.1770300000')
+        with open(newest, 'r+b') as f:
+            f.truncate(os.path.getsize(newest) - 10)
+        open(os.path.join(self.spool, 'other.u2.1'), 'wb').close()
+
+        alerts = list(Unified2Reader().iter_spool(self.spool))
+        self.assertEqual([a["rule_id"] for a in alerts],
+                         ['1:1:1', '1:2:1', '1:3:1', '1:10:1', '1:11:1', '1:12:1'])
+        self.assertEqual([a["id"] for a in alerts], [1, 2, 3, 4, 5, 6])
+        print(" spool目录读取测试通过")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)